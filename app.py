@@ -1,23 +1,30 @@
 import os
 
-from dotenv import load_dotenv
 from flask import Flask
-from flask_migrate import Migrate
 from flask_smorest import Api
 
+import settings  # noqa: F401  loads .env before the configuration is read
+from cache_extension import response_cache
+from catalog import catalog_cli
 from db import db
 from jwt_extension import jwt
+from maintenance import tokens_cli
 from resources.bakeries import blp_bakeries as BakeriesSegmentBlueprint
 from resources.breads import blp_breads as BreadsSegmentBlueprint
+from resources.metrics import blp_metrics as MetricsBlueprint
 from resources.tags import blp_tags as TagsSegmentBlueprint
 from resources.user import blp_users as UserBlueprint
+from utilities.migrate import init_migrate
+from utilities.outbox import init_outbox
+from utilities.passwords import init_password_hasher
+from utilities.revocation import init_revocation_cache
+from utilities.routing import engine_options, init_replicas, replica_binds
+from utilities.user_cache import init_user_cache
 
 
 def create_app(db_url: str | None = None) -> Flask:
     app = Flask(__name__)
 
-    load_dotenv()
-
     app.config["PROPAGATE_EXCEPTIONS"] = True
     app.config["API_TITLE"] = "Breads REST API"
     app.config["API_VERSION"] = "v1"
@@ -31,23 +38,55 @@ def create_app(db_url: str | None = None) -> Flask:
         "DATABASE_URL", "sqlite:///data.db"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DATABASE_REPLICA_URLS"] = [
+        url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url
+    ]
+    app.config["DATABASE_POOL_SIZE"] = int(os.getenv("DATABASE_POOL_SIZE", 5))
+    app.config["DATABASE_MAX_OVERFLOW"] = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+    app.config["DATABASE_POOL_PRE_PING"] = os.getenv("DATABASE_POOL_PRE_PING", "0") == "1"
+    app.config["DATABASE_POOL_RECYCLE"] = int(os.getenv("DATABASE_POOL_RECYCLE", -1))
+    # Milliseconds, 0 disables the timeout.
+    app.config["DATABASE_STATEMENT_TIMEOUT"] = int(os.getenv("DATABASE_STATEMENT_TIMEOUT", 0))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config
+    )
+    app.config["ASYNC_SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config, async_driver=True
+    )
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(app.config)
     app.config["PROPAGATE_EXCEPTIONS"] = True
     app.config["JWT_SECRET_KEY"] = "16890974721412720643745332657034989076"
     app.config["JWT_BLACKLIST_ENABLED"] = True
     app.config["JWT_BLACKLIST_TOKEN_CHECKS"] = ["access"]
+    # The cache has to be shared by all workers to be invalidated by all of them,
+    # so it is only on by default where Redis is configured.
+    app.config["RESPONSE_CACHE_BACKEND"] = os.getenv(
+        "RESPONSE_CACHE_BACKEND", "redis" if "REDIS_URL" in os.environ else "null"
+    )
+    app.config["PASSWORD_HASH_ROUNDS"] = int(os.getenv("PASSWORD_HASH_ROUNDS", 29000))
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    app.config["PASSWORD_HASH_MAX_PENDING"] = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 4))
 
     db.init_app(app)
-    migrate = Migrate(app, db)
-
-    with app.app_context():
-        db.create_all()
+    init_replicas(app)
+    # The schema is created and migrated by `flask migrate` before serving, not here.
+    init_migrate(app)
 
     jwt.init_app(app)
+    init_revocation_cache(app)
+    init_user_cache(app)
+    response_cache.init_app(app)
+    init_password_hasher(app)
+    init_outbox(app)
 
     api = Api(app)
     api.register_blueprint(UserBlueprint)
     api.register_blueprint(BreadsSegmentBlueprint)
     api.register_blueprint(BakeriesSegmentBlueprint)
     api.register_blueprint(TagsSegmentBlueprint)
+    api.register_blueprint(MetricsBlueprint)
+
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(catalog_cli)
 
     return app
@@ -0,0 +1,115 @@
+import io
+import sys
+from typing import Any, Callable, Dict, Mapping
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask, Response
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from async_db import init_async_db
+from resources.async_views import AsyncRoute, async_routes, async_url_map
+
+
+def _environ(scope: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the WSGI environ of a bodyless request from its ASGI scope.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncApp:
+    """
+    ASGI application serving the read endpoints of breads, bakeries and tags on the event loop.
+
+    Those requests wait for the database on the async engine instead of blocking a worker,
+    so one process serves many slow reads at once. They still run inside a Flask
+    request context and through the same JWT check, response cache, read replicas and ETags
+    as the sync endpoints, see AsyncRoute, so both apps answer alike. Every other request
+    is passed to the sync Flask app, which runs it on a thread pool.
+    """
+
+    def __init__(self, flask_app: Flask) -> None:
+        self.flask_app = flask_app
+        self.engines = init_async_db(flask_app)
+        self.urls = async_url_map.bind("")
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            await self.wsgi(scope, receive, send)
+            return
+        try:
+            endpoint, view_args = self.urls.match(scope["path"], scope["method"])
+        except HTTPException:
+            await self.wsgi(scope, receive, send)
+            return
+
+        environ = _environ(scope)
+        response = await self._dispatch(environ, async_routes[endpoint], view_args)
+        # Like a WSGI server: no body for HEAD requests and 304 answers.
+        body, status, headers = response.get_wsgi_response(environ)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"".join(body)})
+
+    async def _dispatch(
+        self, environ: Dict[str, Any], route: AsyncRoute, view_args: Mapping[str, Any]
+    ) -> Response:
+        with self.flask_app.request_context(environ):
+            try:
+                response = await route(**view_args)
+            except Exception as e:
+                # Aborts and JWT errors are turned into responses by the app's error handlers.
+                response = self.flask_app.make_response(self.flask_app.handle_user_exception(e))
+        return response
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for engine in self.engines.values():
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(db_url: str | None = None) -> AsyncApp:
+    return AsyncApp(create_app(db_url))
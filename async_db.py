@@ -0,0 +1,60 @@
+from typing import Callable, Dict
+
+from flask import Flask, current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    create_async_engine)
+from sqlalchemy.orm import sessionmaker
+
+from utilities.routing import engine_options
+
+# Async driver used in place of the sync one for each database backend.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Turns the sync database URL into the same URL using the async driver of its backend.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver is known for {backend}.")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def init_async_db(app: Flask) -> Dict[str | None, AsyncEngine]:
+    """
+    Creates the async engines of the primary database, under the None key, and of the read
+    replicas, under their bind keys. Models and their metadata are shared with the sync
+    engines of Flask-SQLAlchemy, only the driver and the pool differ.
+    """
+    app.config.setdefault("ASYNC_SQLALCHEMY_ENGINE_OPTIONS", {})
+    engines: Dict[str | None, AsyncEngine] = {
+        None: create_async_engine(
+            async_database_url(app.config["SQLALCHEMY_DATABASE_URI"]),
+            **app.config["ASYNC_SQLALCHEMY_ENGINE_OPTIONS"],
+        )
+    }
+    for bind_key in app.extensions["replicas"].bind_keys:
+        url = app.config["SQLALCHEMY_BINDS"][bind_key]["url"]
+        engines[bind_key] = create_async_engine(
+            async_database_url(url), **engine_options(url, app.config, async_driver=True)
+        )
+    app.extensions["async_db"] = {
+        bind_key: sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        for bind_key, engine in engines.items()
+    }
+    return engines
+
+
+def async_session(bind_key: str | None = None) -> AsyncSession:
+    """
+    Opens a session on the primary database or on the read replica with the given bind key.
+    """
+    sessionmakers: Dict[str | None, Callable[[], AsyncSession]] = current_app.extensions[
+        "async_db"
+    ]
+    return sessionmakers[bind_key]()
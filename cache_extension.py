@@ -0,0 +1,333 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import redis
+from flask import (Flask, Response, current_app, has_app_context,
+                   make_response, request)
+from sqlalchemy.orm import Session
+
+from db import db
+from settings import REDIS_URL
+from utilities.etag import DEPENDENCIES
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """
+    In-process LRU cache with a size limit and a TTL for every entry.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: int = 60) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[str | None]:
+        now = time.monotonic()
+        values: List[str | None] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] < now:
+                    self._entries.pop(key, None)
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        return values
+
+    def get(self, key: str) -> str | None:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: str, ttl: int | None = None) -> None:
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key: str, value: str, ttl: int | None = None) -> bool:
+        """Sets the value only if the key is missing. Returns True if it was set."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _set(self, key: str, value: str, ttl: int | None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by all workers, so a commit in any worker or CLI command
+    invalidates it for everyone. Works with any client implementing the used subset
+    of the redis-py API, so an in-memory stand-in can replace Redis in tests.
+
+    While Redis is unreachable every lookup is a miss and responses are computed
+    from the database. Entries that could not be invalidated expire after their TTL.
+    """
+
+    def __init__(self, client: Any, ttl: int = 60, prefix: str = "response-cache:") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get_many(self, keys: List[str]) -> List[str | None]:
+        try:
+            values = self.client.mget([self.prefix + key for key in keys])
+        except redis.RedisError:
+            logger.warning("Redis unreachable, computing the response without the cache.")
+            return [None] * len(keys)
+        return [value.decode() if isinstance(value, bytes) else value for value in values]
+
+    def get(self, key: str) -> str | None:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: str, ttl: int | None = None) -> None:
+        try:
+            self.client.set(self.prefix + key, value, ex=ttl or self.ttl)
+        except redis.RedisError:
+            logger.warning("Redis unreachable, the response is not cached.")
+
+    def add(self, key: str, value: str, ttl: int | None = None) -> bool:
+        try:
+            return bool(self.client.set(self.prefix + key, value, ex=ttl or self.ttl, nx=True))
+        except redis.RedisError:
+            # Nobody can hold the key, so the caller goes ahead instead of waiting.
+            return True
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        prefixed = [self.prefix + key for key in keys]
+        if not prefixed:
+            return
+        try:
+            self.client.delete(*prefixed)
+        except redis.RedisError:
+            logger.warning("Redis unreachable, cached responses expire after their TTL.")
+
+
+class ResponseCache:
+    """
+    Read-through cache of whole GET responses.
+
+    Every response depends on a few keys: tables for collections, `table:id` rows
+    for single rows. Each key has a random generation token that is part of the cache key,
+    so committing a change to a table or row drops its generation token
+    and every response built from it becomes unreachable at once.
+    """
+
+    GENERATION_TTL = 24 * 60 * 60
+    LOCK_TIMEOUT = 5
+    LOCK_POLL_INTERVAL = 0.05
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Backends: "redis" shared by all processes, "null" disabling the cache, and "memory"
+        which is only invalidated by commits of its own process, so it suits single-process
+        deployments only. The cache is off unless a backend is configured.
+        """
+        app.config.setdefault("RESPONSE_CACHE_BACKEND", "null")
+        app.config.setdefault("RESPONSE_CACHE_MAX_ENTRIES", 1024)
+        app.config.setdefault("RESPONSE_CACHE_TTL", 60)
+        app.config.setdefault("RESPONSE_CACHE_REDIS_TIMEOUT", 0.5)
+
+        backend_name = app.config["RESPONSE_CACHE_BACKEND"]
+        ttl = app.config["RESPONSE_CACHE_TTL"]
+        backend: LocalCacheBackend | RedisCacheBackend | None
+        if backend_name == "memory":
+            backend = LocalCacheBackend(app.config["RESPONSE_CACHE_MAX_ENTRIES"], ttl)
+        elif backend_name == "redis":
+            client = app.config.get("RESPONSE_CACHE_REDIS_CLIENT") or redis.from_url(
+                REDIS_URL,
+                socket_timeout=app.config["RESPONSE_CACHE_REDIS_TIMEOUT"],
+                socket_connect_timeout=app.config["RESPONSE_CACHE_REDIS_TIMEOUT"],
+            )
+            backend = RedisCacheBackend(client, ttl)
+        elif backend_name == "null":
+            backend = None
+        else:
+            raise ValueError(f"Unknown response cache backend {backend_name}.")
+
+        app.extensions["response_cache"] = backend
+
+    @property
+    def backend(self) -> LocalCacheBackend | RedisCacheBackend | None:
+        if not has_app_context():
+            return None
+        return current_app.extensions.get("response_cache")
+
+    def cached(
+        self,
+        model: Any,
+        id_arg: str | None = None,
+        depends_on: Iterable[str] = (),
+        arg_dependencies: Dict[str, List[str]] | None = None,
+    ) -> Callable:
+        """
+        Decorator caching responses of a GET endpoint returning the model.
+        With id_arg the response depends on that single row, otherwise on the whole table.
+        Tables of nested fields requested with `?expand=` are added automatically,
+        depends_on and arg_dependencies (query argument -> tables) add other tables.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                key, cached = self.lookup(model, kwargs, id_arg, depends_on, arg_dependencies)
+                if cached is not None:
+                    return cached
+                if key is None:
+                    return func(*args, **kwargs)
+
+                # Only one request computes a missing response, the others wait for it.
+                deadline = time.monotonic() + self.LOCK_TIMEOUT
+                while not self.lock(key):
+                    time.sleep(self.LOCK_POLL_INTERVAL)
+                    cached = self.get(key)
+                    if cached is not None:
+                        return cached
+                    if time.monotonic() > deadline:
+                        return func(*args, **kwargs)
+                try:
+                    response = make_response(func(*args, **kwargs))
+                    self.store(key, response)
+                    return response
+                finally:
+                    self.unlock(key)
+
+            return wrapper
+
+        return decorator
+
+    def lookup(
+        self,
+        model: Any,
+        view_args: Dict[str, Any],
+        id_arg: str | None = None,
+        depends_on: Iterable[str] = (),
+        arg_dependencies: Dict[str, List[str]] | None = None,
+    ) -> Tuple[str | None, Response | None]:
+        """
+        Returns the cache key of the response to the current request and the cached
+        response if there is one. The key is None while the cache is off.
+        The steps of `cached` are public for the async views, which cannot be decorated.
+        """
+        backend = self.backend
+        if backend is None:
+            return None, None
+        dependencies = self._dependencies(
+            model, id_arg, view_args, depends_on, arg_dependencies or {}
+        )
+        key = self._key(backend, dependencies)
+        return key, self.get(key)
+
+    def get(self, key: str) -> Response | None:
+        cached = self.backend.get(key) if self.backend is not None else None
+        return self._load(cached) if cached is not None else None
+
+    def lock(self, key: str) -> bool:
+        """Takes the lock of computing the response. Returns False if it is taken."""
+        return self.backend is None or self.backend.add(
+            f"lock:{key}", "1", ttl=self.LOCK_TIMEOUT
+        )
+
+    def unlock(self, key: str) -> None:
+        if self.backend is not None:
+            self.backend.delete_many([f"lock:{key}"])
+
+    def store(self, key: str, response: Response) -> None:
+        if self.backend is not None and 200 <= response.status_code < 300:
+            self.backend.set(key, self._dump(response))
+
+    def invalidate(self, dependency_keys: Iterable[str]) -> None:
+        """
+        Makes every cached response built from the given tables or rows unreachable.
+        """
+        backend = self.backend
+        if backend is not None:
+            backend.delete_many([f"generation:{key}" for key in dependency_keys])
+
+    @staticmethod
+    def _dependencies(
+        model: Any,
+        id_arg: str | None,
+        view_args: Dict[str, Any],
+        depends_on: Iterable[str],
+        arg_dependencies: Dict[str, List[str]],
+    ) -> List[str]:
+        table_name = model.__tablename__
+        dependencies = [f"{table_name}:{view_args[id_arg]}" if id_arg else table_name]
+        dependencies.extend(depends_on)
+        for name in request.args.get("expand", "").split(","):
+            dependencies.extend(DEPENDENCIES[model].get(name, []))
+        for arg, tables in arg_dependencies.items():
+            if arg in request.args:
+                dependencies.extend(tables)
+        return sorted(set(dependencies))
+
+    def _key(self, backend: Any, dependencies: List[str]) -> str:
+        generation_keys = [f"generation:{dependency}" for dependency in dependencies]
+        generations = backend.get_many(generation_keys)
+        for index, generation in enumerate(generations):
+            if generation is None:
+                backend.add(generation_keys[index], uuid.uuid4().hex, ttl=self.GENERATION_TTL)
+                generations[index] = backend.get(generation_keys[index])
+        raw_key = "|".join([request.full_path, *(str(g) for g in generations)])
+        return "response:" + hashlib.sha1(raw_key.encode()).hexdigest()
+
+    @staticmethod
+    def _dump(response: Response) -> str:
+        headers = [
+            (name, value)
+            for name, value in response.headers
+            if name not in ("Content-Length", "Set-Cookie")
+        ]
+        return json.dumps(
+            {
+                "status": response.status_code,
+                "headers": headers,
+                "body": response.get_data(as_text=True),
+            }
+        )
+
+    @staticmethod
+    def _load(cached: str) -> Response:
+        data = json.loads(cached)
+        response = Response(data["body"], status=data["status"], headers=data["headers"])
+        etag = response.get_etag()[0]
+        if etag and request.if_none_match.contains(etag):
+            return Response(status=304, headers={"ETag": response.headers["ETag"]})
+        return response
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_committed_changes(session: Session) -> None:
+    changed_keys = session.info.pop("changed_keys", None)
+    if changed_keys:
+        response_cache.invalidate(changed_keys)
+
+
+def discard_changes(session: Session, *args: Any) -> None:
+    session.info.pop("changed_keys", None)
+
+
+db.event.listen(Session, "after_commit", invalidate_committed_changes)
+db.event.listen(Session, "after_rollback", discard_changes)
@@ -0,0 +1,353 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+
+import click
+from flask.cli import AppGroup
+from marshmallow import ValidationError
+from sqlalchemy import Table, bindparam, insert, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from db import db
+from maintenance import get_maintenance_queue
+from models.bakery_model import BakeryModel
+from models.bakery_stats_model import BakeryStatsModel
+from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.change_stamp_model import ChangeStampModel
+from models.tag_model import TagModel
+from schemas import CatalogRecordSchema
+
+IMPORT_BATCH_SIZE = 5000
+STATS_RECONCILE_INTERVAL = timedelta(hours=24)
+BREAD_COLUMNS = ["name", "price", "currency", "gluten_free", "info", "bakery_id"]
+
+catalog_cli = AppGroup("catalog", help="Bulk operations on the bread catalog.")
+
+
+def read_records(path: str, file_format: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads records one at a time from a CSV file or an NDJSON file.
+    In CSV files tags are separated by "|".
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                tags = row.get("tags") or ""
+                row["tags"] = [tag for tag in tags.split("|") if tag]
+                if not row.get("info"):
+                    row["info"] = None
+                yield row
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def insert_rows(table: Table, columns: Sequence[str], rows: List[Tuple[Any, ...]]) -> None:
+    """
+    Inserts plain rows with COPY on PostgreSQL and with executemany elsewhere.
+    """
+    if not rows:
+        return
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+    else:
+        connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def reserve_ids(table: Table, count: int) -> List[int]:
+    """
+    Takes count values from the id sequence of a PostgreSQL table. They are never handed out
+    again, so rows written with them cannot collide with rows inserted concurrently.
+    """
+    return list(
+        db.session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"table": table.name, "count": count},
+        ).scalars()
+    )
+
+
+class CatalogImporter:
+    """
+    Upserts catalog records in batches, each batch in its own transaction.
+
+    Bakeries are matched by name, tags by bakery and name, breads by bakery and name.
+    All known keys are kept in memory, so resolving them costs no queries.
+    Re-importing a batch is harmless, which makes resuming after a failure safe.
+    """
+
+    def __init__(self) -> None:
+        self.bakeries: Dict[str, Tuple[int, str]] = {
+            name: (bakery_id, address)
+            for bakery_id, name, address in db.session.execute(
+                select(BakeryModel.id, BakeryModel.name, BakeryModel.address)
+            )
+        }
+        self.tags: Dict[Tuple[int, str], int] = {
+            (bakery_id, name): tag_id
+            for tag_id, bakery_id, name in db.session.execute(
+                select(TagModel.id, TagModel.bakery_id, TagModel.name)
+            )
+        }
+        self.breads: Dict[Tuple[int, str], int] = {
+            (bakery_id, name): bread_id
+            for bread_id, bakery_id, name in db.session.execute(
+                select(BreadModel.id, BreadModel.bakery_id, BreadModel.name)
+            )
+        }
+        self.links: Set[Tuple[int, int]] = set(
+            db.session.execute(select(BreadsTagsModel.bread_id, BreadsTagsModel.tag_id))
+        )
+
+    def import_batch(self, records: List[Dict[str, Any]]) -> None:
+        changed_tables = set()
+
+        new_bakeries: Dict[str, str] = {}
+        moved_bakeries = []
+        for record in records:
+            known = self.bakeries.get(record["bakery"])
+            if known is None:
+                new_bakeries[record["bakery"]] = record["bakery_address"]
+            elif known[1] != record["bakery_address"]:
+                moved_bakeries.append({"b_id": known[0], "address": record["bakery_address"]})
+                self.bakeries[record["bakery"]] = (known[0], record["bakery_address"])
+        if new_bakeries:
+            inserted = db.session.execute(
+                insert(BakeryModel.__table__).returning(
+                    BakeryModel.id, BakeryModel.name, BakeryModel.address
+                ),
+                [{"name": name, "address": address} for name, address in new_bakeries.items()],
+            )
+            self.bakeries.update({name: (id_, address) for id_, name, address in inserted})
+            changed_tables.add(BakeryModel.__tablename__)
+        if moved_bakeries:
+            db.session.connection().execute(
+                update(BakeryModel.__table__)
+                .where(BakeryModel.id == bindparam("b_id"))
+                .values(address=bindparam("address"), version_id=BakeryModel.version_id + 1),
+                moved_bakeries,
+            )
+            changed_tables.add(BakeryModel.__tablename__)
+
+        new_tags = {
+            (self.bakeries[record["bakery"]][0], tag)
+            for record in records
+            for tag in record["tags"]
+        } - self.tags.keys()
+        if new_tags:
+            inserted = db.session.execute(
+                insert(TagModel.__table__).returning(
+                    TagModel.id, TagModel.bakery_id, TagModel.name
+                ),
+                [{"bakery_id": bakery_id, "name": name} for bakery_id, name in new_tags],
+            )
+            self.tags.update({(bakery_id, name): id_ for id_, bakery_id, name in inserted})
+            changed_tables.add(TagModel.__tablename__)
+
+        # The last record wins if the batch holds the same bread twice.
+        breads: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for record in records:
+            bakery_id = self.bakeries[record["bakery"]][0]
+            breads[(bakery_id, record["name"])] = dict(record, bakery_id=bakery_id)
+        new_breads = [key for key in breads if key not in self.breads]
+        existing_breads = [key for key in breads if key in self.breads]
+
+        if new_breads and db.session.connection().dialect.name == "postgresql":
+            # COPY cannot return the ids, so they are reserved up front and written with the rows.
+            bread_ids = reserve_ids(BreadModel.__table__, len(new_breads))
+            insert_rows(
+                BreadModel.__table__,
+                ["id", *BREAD_COLUMNS],
+                [
+                    (bread_id, *(breads[key][column] for column in BREAD_COLUMNS))
+                    for bread_id, key in zip(bread_ids, new_breads)
+                ],
+            )
+            self.breads.update(zip(new_breads, bread_ids))
+        elif new_breads:
+            inserted = db.session.execute(
+                insert(BreadModel.__table__).returning(
+                    BreadModel.id, BreadModel.bakery_id, BreadModel.name
+                ),
+                [{column: breads[key][column] for column in BREAD_COLUMNS} for key in new_breads],
+            )
+            self.breads.update({(bakery_id, name): id_ for id_, bakery_id, name in inserted})
+        if existing_breads:
+            db.session.connection().execute(
+                update(BreadModel.__table__)
+                .where(BreadModel.id == bindparam("b_id"))
+                .values(
+                    {
+                        **{column: bindparam(column) for column in BREAD_COLUMNS[:-1]},
+                        "version_id": BreadModel.version_id + 1,
+                    }
+                ),
+                [
+                    {"b_id": self.breads[key], **{c: breads[key][c] for c in BREAD_COLUMNS[:-1]}}
+                    for key in existing_breads
+                ],
+            )
+        if breads:
+            changed_tables.add(BreadModel.__tablename__)
+
+        new_links = {
+            (self.breads[key], self.tags[(key[0], tag)])
+            for key, bread in breads.items()
+            for tag in bread["tags"]
+        } - self.links
+        if new_links:
+            insert_rows(BreadsTagsModel.__table__, ["bread_id", "tag_id"], sorted(new_links))
+            self.links.update(new_links)
+            changed_tables.add(BreadsTagsModel.__tablename__)
+
+        # These statements bypass the unit of work, so caches are invalidated by hand.
+        ChangeStampModel.touch(db.session, changed_tables)
+        db.session.commit()
+
+
+def load_checkpoint(path: str, input_path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as file:
+        checkpoint = json.load(file)
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise click.ClickException(f"Checkpoint {path} belongs to {checkpoint.get('input')}.")
+    return int(checkpoint["records"])
+
+
+def save_checkpoint(path: str, input_path: str, records: int) -> None:
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump({"input": os.path.abspath(input_path), "records": records}, file)
+    os.replace(temporary_path, path)
+
+
+@catalog_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "ndjson"]),
+              help="Input format, guessed from the file extension by default.")
+@click.option("--batch-size", default=IMPORT_BATCH_SIZE, show_default=True)
+@click.option("--checkpoint", "checkpoint_path",
+              help="Checkpoint file, PATH.checkpoint by default.")
+@click.option("--restart", is_flag=True, help="Ignore an existing checkpoint.")
+@click.option("--skip-invalid", is_flag=True, help="Report invalid records instead of stopping.")
+def import_command(
+    path: str,
+    file_format: str | None,
+    batch_size: int,
+    checkpoint_path: str | None,
+    restart: bool,
+    skip_invalid: bool,
+) -> None:
+    """
+    Import bakeries, breads, tags and their links from a CSV or NDJSON file.
+
+    Every record is one bread with the columns bakery, bakery_address, name, price,
+    currency, gluten_free, info and tags. After each committed batch the number of
+    processed records is saved to a checkpoint, a failed import resumes from there.
+    """
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    done = 0 if restart else load_checkpoint(checkpoint_path, path)
+    if done:
+        click.echo(f"Resuming after {done} records.")
+
+    schema = CatalogRecordSchema()
+    importer = CatalogImporter()
+    records = enumerate(read_records(path, file_format), start=1)
+    started = time.perf_counter()
+    imported = 0
+    for _ in islice(records, done):
+        pass
+
+    while batch := list(islice(records, batch_size)):
+        batch_started = time.perf_counter()
+        valid = []
+        for number, record in batch:
+            try:
+                valid.append(schema.load(record))
+            except ValidationError as e:
+                if not skip_invalid:
+                    raise click.ClickException(f"Record {number} is invalid: {e.messages}")
+                click.echo(f"Skipping invalid record {number}: {e.messages}", err=True)
+
+        try:
+            importer.import_batch(valid)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise click.ClickException(
+                f"Import failed after {done} records, run the command again to resume: {e}"
+            )
+        done = batch[-1][0]
+        imported += len(batch)
+        save_checkpoint(checkpoint_path, path, done)
+        click.echo(
+            f"{done} records processed, "
+            f"{len(batch) / (time.perf_counter() - batch_started):.0f} rows/s."
+        )
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Imported {imported} records in {elapsed:.1f} s, "
+        f"{imported / elapsed if elapsed else 0:.0f} rows/s."
+    )
+
+
+def reconcile_stats() -> str:
+    """
+    Recomputes all bakery statistics in one transaction. Needs an application context.
+    """
+    written = BakeryStatsModel.reconcile()
+    db.session.commit()
+    return ", ".join(f"{count} rows written to {table}" for table, count in written.items()) + "."
+
+
+def reconcile_stats_job(reschedule: bool = True) -> str:
+    """
+    RQ job reconciling bakery statistics. Reschedules itself to run again after
+    STATS_RECONCILE_INTERVAL, workers have to run with --with-scheduler.
+    """
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        result = reconcile_stats()
+
+    if reschedule:
+        get_maintenance_queue().enqueue_in(
+            STATS_RECONCILE_INTERVAL, reconcile_stats_job, job_id="reconcile-bakery-stats"
+        )
+    return result
+
+
+@catalog_cli.command("reconcile-stats")
+def reconcile_stats_command() -> None:
+    """Recompute bakery statistics from the breads and tags tables."""
+    click.echo(reconcile_stats())
+
+
+@catalog_cli.command("schedule-stats-reconciliation")
+def schedule_stats_reconciliation_command() -> None:
+    """Enqueue the recurring statistics reconciliation job on the RQ maintenance queue."""
+    job = get_maintenance_queue().enqueue(reconcile_stats_job, job_id="reconcile-bakery-stats")
+    click.echo(f"Enqueued job {job.id}.")
@@ -1,5 +1,19 @@
 #!/bin/sh
 
-flask db upgrade
+# Migrations run as a one-shot job before a release is served, not on every start:
+#   docker run <image> /bin/bash docker-entrypoint.sh migrate
+if [ "$1" = "migrate" ]; then
+    exec flask migrate
+fi
 
-exec gunicorn --bind 0.0.0.0:80 "app:create_app()"
+# SERVER_MODE=async serves the read endpoints on an event loop, see asgi.py.
+if [ "$SERVER_MODE" = "async" ]; then
+    exec uvicorn --factory --host 0.0.0.0 --port 80 "asgi:create_asgi_app"
+fi
+
+# Threaded workers: requests waiting for the password hashing pool do not hold a whole
+# worker, and the pool can answer 503 once PASSWORD_HASH_MAX_PENDING requests are waiting.
+# Keep PASSWORD_HASH_MAX_PENDING below GUNICORN_THREADS. Every worker process has its own
+# pool, so at most WEB_CONCURRENCY * PASSWORD_HASH_WORKERS processes hash passwords.
+exec gunicorn --bind 0.0.0.0:80 --worker-class gthread \
+    --workers "${WEB_CONCURRENCY:-2}" --threads "${GUNICORN_THREADS:-8}" "app:create_app()"
@@ -1,29 +1,161 @@
+import json
+import logging
 import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 import jinja2
+import redis
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from rq import get_current_job
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+from rq.queue import Queue
 
-load_dotenv()
+from settings import REDIS_URL
 
-MAILGUN_BASE_URL = "https://api.mailgun.net/v3"
+logger = logging.getLogger(__name__)
+
+# Overridable so that the worker can be pointed at a local stand-in for Mailgun.
+MAILGUN_BASE_URL = os.getenv("MAILGUN_BASE_URL", "https://api.mailgun.net/v3")
 MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
 MAILGUN_DOMAIN_NAME = os.getenv("MAILGUN_DOMAIN_NAME")
 
+# Mailgun accepts at most 1000 recipients in one batch send.
+EMAIL_BATCH_SIZE = min(int(os.getenv("EMAIL_BATCH_SIZE", 1000)), 1000)
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", 4))
+EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", 10))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_BACKOFF = float(os.getenv("EMAIL_BACKOFF", 0.5))
+EMAIL_BACKOFF_MAX = float(os.getenv("EMAIL_BACKOFF_MAX", 30))
+# Recipients per second, 0 disables the limit.
+EMAIL_RATE_LIMIT = float(os.getenv("EMAIL_RATE_LIMIT", 0))
+# Runs of the registration emails job, the n-th one starts n * EMAIL_JOB_RETRY_DELAY
+# seconds after the previous one failed.
+EMAIL_JOB_MAX_ATTEMPTS = int(os.getenv("EMAIL_JOB_MAX_ATTEMPTS", 5))
+EMAIL_JOB_RETRY_DELAY = float(os.getenv("EMAIL_JOB_RETRY_DELAY", 60))
+
+REGISTRATION_LIST = "emails:registration"
+REGISTRATION_SCHEDULED = "emails:registration:scheduled"
+# Prefix of the lists holding the batch a send job is sending, by job id.
+REGISTRATION_PROCESSING = "emails:registration:processing:"
+# Prefix of the ids of the send jobs, every job gets an id of its own.
+REGISTRATION_JOB_ID = "send-registration-emails"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 AUTH = ("api", MAILGUN_API_KEY)
 
 
 template_loader = jinja2.FileSystemLoader("templates")
-template_env = jinja2.Environment(loader=template_loader)
+# Templates are compiled once per process, the worker does not watch them for changes.
+template_env = jinja2.Environment(loader=template_loader, auto_reload=False)
+
+
+@lru_cache(maxsize=None)
+def get_template(template_filename: str) -> jinja2.Template:
+    return template_env.get_template(template_filename)
 
 
 def render_template(template_filename, **context):
-    return template_env.get_template(template_filename).render(**context)
+    return get_template(template_filename).render(**context)
 
 
-def send_message(to: str, subject: str, text: str, html: str) -> requests.Response:
+@lru_cache(maxsize=None)
+def get_redis_connection() -> redis.Redis:
+    """
+    Redis client of the process, its connection pool is shared by all the jobs it runs.
+    """
+    return redis.from_url(REDIS_URL)
+
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    """
+    HTTP session of the process. Connections to Mailgun are kept alive
+    and reused, at most EMAIL_POOL_SIZE of them per host.
+    """
+    session = requests.Session()
+    session.auth = AUTH  # type: ignore
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=EMAIL_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """
+    Token bucket letting through rate recipients per second on average.
+    A batch larger than the bucket is let through once the bucket is full
+    and leaves it in debt, so the following sends wait for it to be paid off.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                needed = min(tokens, self.rate)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                time.sleep((needed - self._tokens) / self.rate)
+
+
+rate_limiter = RateLimiter(EMAIL_RATE_LIMIT)
+
+
+def _backoff(attempt: int, response: requests.Response | None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), EMAIL_BACKOFF_MAX)
+    return min(EMAIL_BACKOFF * 2.0 ** (attempt - 1), EMAIL_BACKOFF_MAX)
+
+
+def post_message(data: Dict[str, str | List[str]], recipients: int = 1) -> requests.Response:
+    """
+    Posts a message to Mailgun. Rate limited errors, server errors and connection
+    failures are retried with exponential backoff, up to EMAIL_MAX_ATTEMPTS attempts.
+    """
     url = f"{MAILGUN_BASE_URL}/{MAILGUN_DOMAIN_NAME}/messages"
+    session = get_http_session()
+    rate_limiter.acquire(recipients)
+    for attempt in range(1, EMAIL_MAX_ATTEMPTS + 1):
+        last_attempt = attempt == EMAIL_MAX_ATTEMPTS
+        try:
+            response = session.post(url, data=data, timeout=EMAIL_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logger.warning("Sending an email failed, attempt %s: %s", attempt, e)
+            if last_attempt:
+                raise
+            time.sleep(_backoff(attempt, None))
+            continue
+        if response.status_code not in RETRY_STATUSES:
+            break
+        logger.warning("Sending an email failed, attempt %s: %s", attempt, response.status_code)
+        if last_attempt:
+            break
+        time.sleep(_backoff(attempt, response))
+
+    response.raise_for_status()
+    return response
+
+
+def send_message(to: str, subject: str, text: str, html: str) -> requests.Response:
     data = {
         "from": f"Maria <postmaster@{MAILGUN_DOMAIN_NAME}>",
         "to": [to],
@@ -32,13 +164,141 @@ def send_message(to: str, subject: str, text: str, html: str) -> requests.Respon
         "html": html,
     }
 
-    return requests.post(url, auth=AUTH, data=data)  # type: ignore
+    return post_message(data)  # type: ignore
 
 
-def send_user_registration_email(email: str, username: str):
-    return send_message(
-        email,
+def send_batch(
+    recipients: Dict[str, Dict[str, str]], subject: str, text: str, html: str
+) -> requests.Response:
+    """
+    Sends one message to many recipients with Mailgun's batch sending.
+    Every recipient gets their own copy, %recipient.<name>% placeholders in the texts
+    are replaced with the recipient's variables.
+    """
+    data = {
+        "from": f"Maria <postmaster@{MAILGUN_DOMAIN_NAME}>",
+        "to": list(recipients),
+        "subject": subject,
+        "text": text,
+        "html": html,
+        "recipient-variables": json.dumps(recipients),
+    }
+
+    return post_message(data, len(recipients))  # type: ignore
+
+
+def _registration_texts(username: str) -> Tuple[str, str, str]:
+    return (
         "Successfully signed up",
-        f"Welcome, {username}! Thank you for signing up to the Breads Rest API! Enjoy our service!",
+        f"Welcome, {username}! Thank you for signing up to the Breads Rest API! "
+        "Enjoy our service!",
         render_template("email/registration.html", username=username),
     )
+
+
+def send_user_registration_email(email: str, username: str):
+    return send_message(email, *_registration_texts(username))
+
+
+def send_registration_batch(users: List[Tuple[str, str]]) -> requests.Response:
+    """
+    Sends the registration email to users given as (email, username) pairs in one request.
+    """
+    return send_batch(
+        {email: {"username": username} for email, username in users},
+        *_registration_texts("%recipient.username%"),
+    )
+
+
+def queue_registration_email(email: str, username: str) -> None:
+    """
+    RQ job adding the user to the pending registration emails. The send job is enqueued
+    only if none is waiting yet, so a spike of registrations is sent in a few batches.
+    """
+    connection = get_redis_connection()
+    connection.rpush(REGISTRATION_LIST, json.dumps([email, username]))
+    if connection.set(REGISTRATION_SCHEDULED, 1, nx=True):
+        _enqueue_registration_job(connection)
+
+
+def _enqueue_registration_job(connection: redis.Redis, attempt: int = 1) -> None:
+    """
+    Enqueues the send job, after a delay growing with attempt for a retry.
+    Delayed jobs are moved to the queue by workers started with --with-scheduler.
+    """
+    queue = Queue("emails", connection=connection)
+    job_id = f"{REGISTRATION_JOB_ID}:{uuid.uuid4().hex}"
+    if attempt == 1:
+        queue.enqueue(send_registration_emails_job, job_id=job_id)
+    else:
+        delay = timedelta(seconds=(attempt - 1) * EMAIL_JOB_RETRY_DELAY)
+        queue.enqueue_in(delay, send_registration_emails_job, attempt, job_id=job_id)
+
+
+def _move(
+    connection: redis.Redis, source: str, destination: str, count: int, to_head: bool = False
+) -> List[bytes]:
+    """
+    Moves up to count items between the lists in order, in one MULTI/EXEC transaction,
+    so that every item is on one of them at any time: from the head of source to the tail
+    of destination, or with to_head from the tail of source to the head of destination.
+    """
+    with connection.pipeline() as pipeline:
+        for _ in range(count):
+            if to_head:
+                pipeline.lmove(source, destination, "RIGHT", "LEFT")
+            else:
+                pipeline.lmove(source, destination, "LEFT", "RIGHT")
+        return [item for item in pipeline.execute() if item is not None]
+
+
+def _requeue_abandoned_batches(connection: redis.Redis) -> None:
+    """
+    Puts the batches of send jobs that are no longer running, because their worker died
+    while sending them, back at the head of the pending registrations.
+    """
+    for key in connection.scan_iter(match=f"{REGISTRATION_PROCESSING}*"):
+        job_id = key.decode()[len(REGISTRATION_PROCESSING):]
+        try:
+            running = Job.fetch(job_id, connection=connection).get_status() == JobStatus.STARTED
+        except NoSuchJobError:
+            running = False
+        if not running:
+            _move(connection, key, REGISTRATION_LIST, connection.llen(key), to_head=True)
+
+
+def send_registration_emails_job(attempt: int = 1) -> int:
+    """
+    RQ job sending all pending registration emails in batches of EMAIL_BATCH_SIZE.
+    Returns the number of sent emails.
+    Each batch is moved to a processing list of the job while it is sent, and dropped
+    only once it is sent, so a batch of a worker that died is sent by a later job.
+    A batch that could not be sent is put back at the head of the list and a new job
+    is scheduled to send it, up to EMAIL_JOB_MAX_ATTEMPTS runs, before the error is raised.
+    After the last one, the next registration enqueues a job again.
+    """
+    connection = get_redis_connection()
+    # Users queued from now on enqueue a new job, none of them waits for a job that has finished.
+    connection.delete(REGISTRATION_SCHEDULED)
+    _requeue_abandoned_batches(connection)
+    job = get_current_job()
+    processing = f"{REGISTRATION_PROCESSING}{job.id if job else uuid.uuid4().hex}"
+    sent = 0
+    while True:
+        count = min(connection.llen(REGISTRATION_LIST), EMAIL_BATCH_SIZE)
+        batch = _move(connection, REGISTRATION_LIST, processing, count)
+        if not batch:
+            return sent
+        users = [(email, username) for email, username in map(json.loads, batch)]
+        try:
+            send_registration_batch(users)
+        except Exception:
+            _move(connection, processing, REGISTRATION_LIST, len(batch), to_head=True)
+            # A job enqueued by a registration since then sends the batch as well.
+            if attempt < EMAIL_JOB_MAX_ATTEMPTS and connection.set(
+                REGISTRATION_SCHEDULED, 1, nx=True
+            ):
+                _enqueue_registration_job(connection, attempt + 1)
+            raise
+        connection.delete(processing)
+        sent += len(batch)
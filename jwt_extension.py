@@ -1,10 +1,13 @@
-from typing import Dict
+from typing import Dict, List
 
 from flask import Response, jsonify, make_response
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import UserLookupError
+from werkzeug.local import LocalProxy
 
-from models.tokenblocklist_model import TokenBlocklistModel
 from models.user_model import UserModel
+from utilities.revocation import is_token_revoked
+from utilities.user_cache import get_user
 
 jwt = JWTManager()
 
@@ -18,9 +21,23 @@ def add_claims_to_jwt(identity: int) -> Dict[str, bool]:
 def user_loader_callback(
     jwt_header: Dict[str, str], jwt_payload: Dict[str, int | str | bool]
 ) -> UserModel:
-    identity = jwt_payload["sub"]
-    user: UserModel = UserModel.query.get(identity)
-    return user
+    """
+    Returns a proxy loading the user on first use, so that endpoints
+    that never call get_current_user() do not look the user up at all.
+    """
+    identity = int(jwt_payload["sub"])
+    loaded: List[UserModel | None] = []
+
+    def load_user() -> UserModel:
+        if not loaded:
+            loaded.append(get_user(identity))
+        if loaded[0] is None:
+            raise UserLookupError(
+                f"user_lookup returned None for {identity}", jwt_header, jwt_payload
+            )
+        return loaded[0]
+
+    return LocalProxy(load_user)  # type: ignore
 
 
 @jwt.token_in_blocklist_loader
@@ -29,9 +46,10 @@ def check_if_token_is_revoked(
 ) -> bool:
     """
     Check whether any JWT received is in the blocklist and token revoked.
+    Answered from the in-memory revocation cache, not from the database.
     """
     jti = jwt_payload["jti"]
-    return TokenBlocklistModel.is_jti_blacklisted(jti)
+    return is_token_revoked(str(jti), int(jwt_payload["sub"]), float(jwt_payload["iat"]))
 
 
 @jwt.revoked_token_loader
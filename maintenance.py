@@ -0,0 +1,212 @@
+import time
+from datetime import datetime, timedelta
+
+import click
+import redis
+from flask.cli import AppGroup
+from rq.queue import Queue
+from sqlalchemy import delete, select, text
+
+from db import db
+from models.tokenblocklist_model import TokenBlocklistModel
+from settings import QUEUES, REDIS_URL
+
+PRUNE_BATCH_SIZE = 1000
+PRUNE_INTERVAL = timedelta(hours=1)
+PARTITION_MONTHS_AHEAD = 2
+
+tokens_cli = AppGroup("tokens", help="Maintenance of the blocklist_tokens table.")
+
+
+def _month_start(moment: datetime, months_ahead: int = 0) -> datetime:
+    month_index = moment.year * 12 + moment.month - 1 + months_ahead
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_name(month_start: datetime) -> str:
+    return f"blocklist_tokens_p{month_start:%Y%m}"
+
+
+def is_partitioned() -> bool:
+    """
+    Checks whether blocklist_tokens is a range partitioned PostgreSQL table.
+    """
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return bool(
+        db.session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'blocklist_tokens'"
+            )
+        ).first()
+    )
+
+
+def ensure_partitions(now: datetime, months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    """
+    Creates monthly partitions from the current month up to months_ahead months.
+    """
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(now, offset), _month_start(now, offset + 1)
+        db.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {_partition_name(start)} "
+                f"PARTITION OF blocklist_tokens "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+
+def drop_expired_partitions(now: datetime) -> int:
+    """
+    Detaches and drops monthly partitions that only hold expired tokens.
+    Returns the number of dropped partitions.
+    """
+    partitions = db.session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'blocklist_tokens' AND c.relname LIKE 'blocklist_tokens_p%'"
+        )
+    ).scalars()
+    current_partition = _partition_name(_month_start(now))
+    expired = [name for name in partitions if name < current_partition]
+    for name in expired:
+        db.session.execute(text(f"ALTER TABLE blocklist_tokens DETACH PARTITION {name}"))
+        db.session.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+    return len(expired)
+
+
+def delete_expired_tokens(
+    now: datetime, batch_size: int = PRUNE_BATCH_SIZE, pause: float = 0
+) -> int:
+    """
+    Deletes expired tokens in batches, each in its own short transaction,
+    so that no lock is held on the table for long. Returns the number of deleted rows.
+    """
+    deleted = 0
+    while True:
+        ids = (
+            db.session.execute(
+                select(TokenBlocklistModel.id)
+                .where(TokenBlocklistModel.expires_at < now)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return deleted
+        db.session.execute(delete(TokenBlocklistModel).where(TokenBlocklistModel.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def prune_blocklist(batch_size: int = PRUNE_BATCH_SIZE, pause: float = 0) -> str:
+    """
+    Removes tokens that have expired. Needs an application context.
+    """
+    # expires_at is stored as a naive local time, see utilities.token.revoke_token.
+    now = datetime.now()
+    dropped = 0
+    if is_partitioned():
+        ensure_partitions(now)
+        db.session.commit()
+        dropped = drop_expired_partitions(now)
+    deleted = delete_expired_tokens(now, batch_size, pause)
+    return f"Dropped {dropped} partitions and deleted {deleted} expired tokens."
+
+
+def get_maintenance_queue() -> Queue:
+    return Queue(QUEUES[-1], connection=redis.from_url(REDIS_URL))
+
+
+def prune_expired_tokens_job(reschedule: bool = True) -> str:
+    """
+    RQ job pruning the blocklist. Reschedules itself to run again after PRUNE_INTERVAL,
+    workers have to run with --with-scheduler.
+    """
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        result = prune_blocklist()
+
+    if reschedule:
+        get_maintenance_queue().enqueue_in(
+            PRUNE_INTERVAL, prune_expired_tokens_job, job_id="prune-expired-tokens"
+        )
+    return result
+
+
+@tokens_cli.command("prune")
+@click.option("--batch-size", default=PRUNE_BATCH_SIZE, show_default=True)
+@click.option("--pause", default=0.0, show_default=True, help="Seconds to wait between batches.")
+def prune_command(batch_size: int, pause: float) -> None:
+    """Delete expired tokens from the blocklist."""
+    click.echo(prune_blocklist(batch_size, pause))
+
+
+@tokens_cli.command("schedule-pruning")
+def schedule_pruning_command() -> None:
+    """Enqueue the recurring pruning job on the RQ maintenance queue."""
+    job = get_maintenance_queue().enqueue(
+        prune_expired_tokens_job, job_id="prune-expired-tokens"
+    )
+    click.echo(f"Enqueued job {job.id}.")
+
+
+@tokens_cli.command("partition")
+@click.option("--months-ahead", default=PARTITION_MONTHS_AHEAD, show_default=True)
+def partition_command(months_ahead: int) -> None:
+    """
+    Convert blocklist_tokens into a table partitioned by month of expires_at (PostgreSQL only).
+    Runs in a single transaction, expired tokens are not copied.
+    Afterwards pruning drops whole partitions.
+    """
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("Partitioning is only supported on PostgreSQL.")
+    if is_partitioned():
+        click.echo("blocklist_tokens is already partitioned.")
+        return
+
+    now = datetime.now()
+    for statement in [
+        "DROP INDEX IF EXISTS ix_blocklist_tokens_jti",
+        "DROP INDEX IF EXISTS ix_blocklist_tokens_expires_at",
+        "ALTER TABLE blocklist_tokens RENAME TO blocklist_tokens_unpartitioned",
+        "ALTER TABLE blocklist_tokens_unpartitioned "
+        "RENAME CONSTRAINT blocklist_tokens_pkey TO blocklist_tokens_unpartitioned_pkey",
+        "CREATE TABLE blocklist_tokens ("
+        "id INTEGER NOT NULL DEFAULT nextval('blocklist_tokens_id_seq'), "
+        "jti VARCHAR(36) NOT NULL, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "type VARCHAR(10) NOT NULL, "
+        "user_id INTEGER NOT NULL REFERENCES all_users (id), "
+        "revoked BOOLEAN NOT NULL DEFAULT true, "
+        "PRIMARY KEY (id, expires_at)"
+        ") PARTITION BY RANGE (expires_at)",
+        "ALTER SEQUENCE blocklist_tokens_id_seq OWNED BY blocklist_tokens.id",
+        "CREATE INDEX ix_blocklist_tokens_jti ON blocklist_tokens (jti)",
+        "CREATE INDEX ix_blocklist_tokens_expires_at ON blocklist_tokens (expires_at)",
+        "CREATE TABLE blocklist_tokens_default PARTITION OF blocklist_tokens DEFAULT",
+    ]:
+        db.session.execute(text(statement))
+    ensure_partitions(now, months_ahead)
+    db.session.execute(
+        text(
+            "INSERT INTO blocklist_tokens "
+            "SELECT id, jti, created_at, expires_at, type, user_id, revoked "
+            "FROM blocklist_tokens_unpartitioned WHERE expires_at >= :now"
+        ),
+        {"now": now},
+    )
+    db.session.execute(text("DROP TABLE blocklist_tokens_unpartitioned"))
+    db.session.commit()
+    click.echo("blocklist_tokens is now partitioned by month of expires_at.")
@@ -0,0 +1,74 @@
+"""full-text search index on breads
+
+Revision ID: 5e27b8d1c3a0
+Revises: c81d0e5a94f7
+Create Date: 2026-10-18 12:26:07.550193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e27b8d1c3a0'
+down_revision = 'c81d0e5a94f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS all_breads_fts USING fts5("
+            "name, info, content='all_breads', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS all_breads_fts_insert AFTER INSERT ON all_breads BEGIN "
+            "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS all_breads_fts_delete AFTER DELETE ON all_breads BEGIN "
+            "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+            "VALUES ('delete', old.id, old.name, old.info); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS all_breads_fts_update "
+            "AFTER UPDATE OF name, info ON all_breads BEGIN "
+            "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+            "VALUES ('delete', old.id, old.name, old.info); "
+            "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+            "END"
+        )
+        # Index the breads that already exist.
+        op.execute("INSERT INTO all_breads_fts(all_breads_fts) VALUES ('rebuild')")
+
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE all_breads ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(info, '')), 'B')"
+            ") STORED"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_all_breads_search_vector "
+            "ON all_breads USING GIN (search_vector)"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS all_breads_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS all_breads_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS all_breads_fts_insert")
+        op.execute("DROP TABLE IF EXISTS all_breads_fts")
+
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_all_breads_search_vector")
+        op.execute("ALTER TABLE all_breads DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,71 @@
+"""cascade deletes from bakeries and breads, restrict deleting linked tags
+
+Revision ID: e7c3b9a5f210
+Revises: 6a3c9e2f1b84
+Create Date: 2026-10-18 18:21:40.117603
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3b9a5f210'
+down_revision = '6a3c9e2f1b84'
+branch_labels = None
+depends_on = None
+
+# Names unnamed SQLite foreign keys when batch mode reflects them.
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+FOREIGN_KEYS = [
+    ('all_breads', 'bakery_id', 'all_bakeries', 'CASCADE'),
+    ('all_tags', 'bakery_id', 'all_bakeries', 'CASCADE'),
+    ('all_breads_tags', 'bread_id', 'all_breads', 'CASCADE'),
+    ('all_breads_tags', 'tag_id', 'all_tags', 'RESTRICT'),
+]
+
+SEARCH_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS all_breads_fts_insert AFTER INSERT ON all_breads BEGIN "
+    "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS all_breads_fts_delete AFTER DELETE ON all_breads BEGIN "
+    "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+    "VALUES ('delete', old.id, old.name, old.info); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS all_breads_fts_update "
+    "AFTER UPDATE OF name, info ON all_breads BEGIN "
+    "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+    "VALUES ('delete', old.id, old.name, old.info); "
+    "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+    "END",
+]
+
+
+def _fk_name(table, column, referred_table):
+    if op.get_bind().dialect.name == 'sqlite':
+        return f'fk_{table}_{column}_{referred_table}'
+    return f'{table}_{column}_fkey'
+
+
+def _replace_foreign_keys(ondelete):
+    for table, column, referred_table, action in FOREIGN_KEYS:
+        name = _fk_name(table, column, referred_table)
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(
+                name, referred_table, [column], ['id'], ondelete=action if ondelete else None
+            )
+
+    # SQLite batch mode recreates all_breads, which drops the search index triggers.
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SEARCH_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    _replace_foreign_keys(ondelete=True)
+
+
+def downgrade():
+    _replace_foreign_keys(ondelete=False)
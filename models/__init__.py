@@ -1,6 +1,22 @@
 from .bakery_model import BakeryModel
+from .bakery_stats_model import BakeryPriceStatsModel, BakeryStatsModel
 from .bread_model import BreadModel
 from .bread_tags_model import BreadsTagsModel
+from .change_stamp_model import ChangeStampModel
+from .job_outbox_model import JobOutboxModel
 from .tag_model import TagModel
 from .tokenblocklist_model import TokenBlocklistModel
 from .user_model import UserModel
+
+__all__ = [
+    "BakeryModel",
+    "BakeryPriceStatsModel",
+    "BakeryStatsModel",
+    "BreadModel",
+    "BreadsTagsModel",
+    "ChangeStampModel",
+    "JobOutboxModel",
+    "TagModel",
+    "TokenBlocklistModel",
+    "UserModel",
+]
@@ -1,4 +1,22 @@
+from typing import Any, Collection, List, Tuple
+
+from sqlalchemy import delete, or_, select, text
+
 from db import db
+from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.change_stamp_model import ChangeStampModel
+from models.tag_model import TagModel
+
+
+def _enforces_foreign_keys() -> bool:
+    """
+    Checks whether the database applies ON DELETE actions of foreign keys.
+    SQLite ignores them unless they are enabled per connection.
+    """
+    if db.session.get_bind().dialect.name != "sqlite":
+        return True
+    return bool(db.session.execute(text("PRAGMA foreign_keys")).scalar())
 
 
 class BakeryModel(db.Model):  # type: ignore
@@ -7,6 +25,52 @@ class BakeryModel(db.Model):  # type: ignore
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(40), unique=True, nullable=False)
     address = db.Column(db.String(80), unique=True, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default="1")
+
+    tags = db.relationship("TagModel", back_populates="bakery", lazy="select")
+    breads = db.relationship("BreadModel", back_populates="bakery", lazy="select")
+
+    __mapper_args__ = {"version_id_col": version_id}
+
+    @classmethod
+    def delete_with_children(cls, bakery_ids: Collection[int]) -> List[Tuple[int, str]]:
+        """
+        Deletes bakeries together with their breads, tags and tag links
+        in a constant number of statements, no matter how many rows are involved.
+        Returns the id and name of every deleted bakery.
+        """
+        bakery_ids = set(bakery_ids)
+        bread_ids = select(BreadModel.id).where(BreadModel.bakery_id.in_(bakery_ids))
+        tag_ids = select(TagModel.id).where(TagModel.bakery_id.in_(bakery_ids))
+
+        # Links to the bakery's tags block deleting the tags (ON DELETE RESTRICT).
+        link_conditions = [BreadsTagsModel.tag_id.in_(tag_ids)]
+        if not _enforces_foreign_keys():
+            # Otherwise links to the bakery's breads go with them (ON DELETE CASCADE).
+            link_conditions.append(BreadsTagsModel.bread_id.in_(bread_ids))
+        db.session.execute(delete(BreadsTagsModel.__table__).where(or_(*link_conditions)))
 
-    tags = db.relationship("TagModel", back_populates="bakery", lazy="dynamic")
-    breads = db.relationship("BreadModel", back_populates="bakery", lazy="dynamic")
+        # Breads and tags are deleted explicitly rather than by ON DELETE CASCADE
+        # so that their ids are returned for cache invalidation, no row is loaded.
+        row_keys: List[str] = []
+        children: List[Any] = [BreadModel, TagModel]
+        for model in children:
+            row_ids = db.session.execute(
+                delete(model.__table__).where(model.bakery_id.in_(bakery_ids)).returning(model.id)
+            ).scalars()
+            row_keys.extend(f"{model.__tablename__}:{row_id}" for row_id in row_ids)
+        deleted = db.session.execute(
+            delete(cls.__table__).where(cls.id.in_(bakery_ids)).returning(cls.id, cls.name)
+        ).all()
+        if deleted:
+            ChangeStampModel.touch(
+                db.session,
+                [
+                    cls.__tablename__,
+                    BreadModel.__tablename__,
+                    TagModel.__tablename__,
+                    BreadsTagsModel.__tablename__,
+                ],
+                row_keys + [f"{cls.__tablename__}:{bakery_id}" for bakery_id, _ in deleted],
+            )
+        return [(bakery_id, name) for bakery_id, name in deleted]
@@ -0,0 +1,105 @@
+from typing import Dict, List
+
+from sqlalchemy import Integer, case, delete, func, insert, select
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.tag_model import TagModel
+from utilities.stats import create_stats_triggers, drop_stats_triggers
+
+
+class BakeryStatsModel(db.Model):  # type: ignore
+    __tablename__ = "bakery_stats"
+
+    bakery_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bread_count = db.Column(db.Integer, nullable=False, default=0)
+    gluten_free_count = db.Column(db.Integer, nullable=False, default=0)
+    tag_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def reconcile(cls) -> Dict[str, int]:
+        """
+        Recomputes the statistics of all bakeries from scratch in the current transaction,
+        fixing any drift of the incrementally maintained counters.
+        Returns the number of rows written to each statistics table.
+        """
+        breads = (
+            select(
+                BreadModel.bakery_id,
+                func.count().label("bread_count"),
+                func.sum(case((BreadModel.gluten_free, 1), else_=0)).label("gluten_free_count"),
+            )
+            .group_by(BreadModel.bakery_id)
+            .subquery()
+        )
+        tags = (
+            select(TagModel.bakery_id, func.count().label("tag_count"))
+            .group_by(TagModel.bakery_id)
+            .subquery()
+        )
+        bakery_stats = select(
+            BakeryModel.id,
+            func.coalesce(breads.c.bread_count, 0),
+            func.coalesce(breads.c.gluten_free_count, 0).cast(Integer),
+            func.coalesce(tags.c.tag_count, 0),
+        ).select_from(
+            BakeryModel.__table__.outerjoin(breads, breads.c.bakery_id == BakeryModel.id)
+            .outerjoin(tags, tags.c.bakery_id == BakeryModel.id)
+        )
+        price_stats = select(
+            BreadModel.bakery_id,
+            BreadModel.currency,
+            func.count(),
+            func.sum(BreadModel.price),
+            func.min(BreadModel.price),
+            func.max(BreadModel.price),
+        ).group_by(BreadModel.bakery_id, BreadModel.currency)
+
+        db.session.execute(delete(BakeryPriceStatsModel.__table__))
+        db.session.execute(delete(cls.__table__))
+        written_bakeries = db.session.execute(
+            insert(cls.__table__).from_select(
+                ["bakery_id", "bread_count", "gluten_free_count", "tag_count"], bakery_stats
+            )
+        ).rowcount
+        written_prices = db.session.execute(
+            insert(BakeryPriceStatsModel.__table__).from_select(
+                ["bakery_id", "currency", "bread_count", "price_sum", "price_min", "price_max"],
+                price_stats,
+            )
+        ).rowcount
+        return {cls.__tablename__: written_bakeries, "bakery_price_stats": written_prices}
+
+
+class BakeryPriceStatsModel(db.Model):  # type: ignore
+    __tablename__ = "bakery_price_stats"
+
+    bakery_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    currency = db.Column(db.String(3), primary_key=True)
+    bread_count = db.Column(db.Integer, nullable=False, default=0)
+    price_sum = db.Column(db.Float(precision=2), nullable=False, default=0)
+    price_min = db.Column(db.Float(precision=2), nullable=False)
+    price_max = db.Column(db.Float(precision=2), nullable=False)
+
+    @classmethod
+    def for_bakeries(cls, bakery_ids: List[int]) -> Dict[int, List["BakeryPriceStatsModel"]]:
+        """
+        Returns the price statistics of the given bakeries grouped by bakery,
+        found through the primary key index with one query.
+        """
+        prices: Dict[int, List[BakeryPriceStatsModel]] = {
+            bakery_id: [] for bakery_id in bakery_ids
+        }
+        if bakery_ids:
+            rows = cls.query.filter(cls.bakery_id.in_(bakery_ids)).order_by(
+                cls.bakery_id, cls.currency
+            )
+            for row in rows:
+                prices[row.bakery_id].append(row)
+        return prices
+
+
+# Triggers reference the bread, tag and bakery tables, so they are created after all tables.
+db.event.listen(db.metadata, "after_create", create_stats_triggers)
+db.event.listen(db.metadata, "before_drop", drop_stats_triggers)
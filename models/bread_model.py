@@ -1,21 +1,95 @@
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Numeric, case, cast, func, literal
+
 from db import db
+from models.bread_tags_model import BreadsTagsModel
+from utilities.search import create_search_index, drop_search_index
 
 
 class BreadModel(db.Model):  # type: ignore
     __tablename__ = "all_breads"
+    __table_args__ = (
+        db.Index("ix_all_breads_price", "price"),
+        db.Index("ix_all_breads_bakery_id_price", "bakery_id", "price"),
+        db.Index("ix_all_breads_currency_price", "currency", "price"),
+        db.Index("ix_all_breads_gluten_free_price", "gluten_free", "price"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=False, nullable=False)
     price = db.Column(db.Float(precision=2), unique=False, nullable=False)
     currency = db.Column(db.String(3), unique=False, nullable=False)
     gluten_free = db.Column(db.Boolean, unique=False, nullable=False)
-    info = db.Column(db.String)
+    info = db.deferred(db.Column(db.String))
+    version_id = db.Column(db.Integer, nullable=False, server_default="1")
 
     bakery_id = db.Column(
-        db.Integer, db.ForeignKey("all_bakeries.id"), unique=False, nullable=False
+        db.Integer,
+        db.ForeignKey("all_bakeries.id", ondelete="CASCADE"),
+        unique=False,
+        nullable=False,
     )
 
     tags = db.relationship(
         "TagModel", back_populates="breads", secondary="all_breads_tags"
     )
     bakery = db.relationship("BakeryModel", back_populates="breads")
+
+    __mapper_args__ = {"version_id_col": version_id}
+
+    @classmethod
+    def sort_keys(cls, sort: List[str]) -> List[Tuple[Any, bool]]:
+        """
+        Turns `?sort=` values like `-price` into (column, descending) keyset pagination keys.
+        """
+        keys = [(getattr(cls, name.lstrip("-")), name.startswith("-")) for name in sort]
+        if not any(column is cls.id for column, _ in keys):
+            # The unique tie-breaker follows the last sort key so the index can still be used.
+            keys.append((cls.id, keys[-1][1] if keys else False))
+        return keys
+
+    @classmethod
+    def filter_conditions(cls, filters: Dict[str, Any]) -> List[Any]:
+        """
+        Builds the WHERE conditions of the bread filters shared by listing and batch endpoints.
+        """
+        conditions = []
+        if "price_min" in filters:
+            conditions.append(cls.price >= filters["price_min"])
+        if "price_max" in filters:
+            conditions.append(cls.price <= filters["price_max"])
+        for name in ("gluten_free", "currency", "bakery_id"):
+            if name in filters:
+                conditions.append(getattr(cls, name) == filters[name])
+        if filters.get("tags_all"):
+            conditions.append(
+                cls.id.in_(BreadsTagsModel.bread_ids_tagged_with_all(filters["tags_all"]))
+            )
+        if filters.get("tags_any"):
+            conditions.append(
+                cls.id.in_(BreadsTagsModel.bread_ids_tagged_with_any(filters["tags_any"]))
+            )
+        return conditions
+
+    @classmethod
+    def price_expression(cls, change: Dict[str, float]) -> Any:
+        """
+        Builds the SQL expression of the new price described by PriceChangeSchema.
+        Prices never drop below zero and are rounded to cents by the database.
+        """
+        price: Any = cls.price
+        if "set" in change:
+            price = literal(change["set"])
+        elif "add" in change:
+            price = price + change["add"]
+        elif "percent" in change:
+            price = price * (1 + change["percent"] / 100)
+        if "round_to" in change:
+            price = func.round(price / change["round_to"]) * change["round_to"]
+        # PostgreSQL rounds to a number of digits only numeric values, not double precision.
+        return func.round(cast(case((price < 0, 0.0), else_=price), Numeric), 2)
+
+
+db.event.listen(BreadModel.__table__, "after_create", create_search_index)
+db.event.listen(BreadModel.__table__, "before_drop", drop_search_index)
@@ -1,10 +1,96 @@
+from typing import Any, Collection, Tuple
+
+from sqlalchemy import delete, exists, func, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.selectable import Select
+
 from db import db
 
 
 class BreadsTagsModel(db.Model):  # type: ignore
     __tablename__ = "all_breads_tags"
+    __table_args__ = (
+        db.Index("ix_all_breads_tags_tag_id_bread_id", "tag_id", "bread_id", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    bread_id = db.Column(db.Integer, db.ForeignKey("all_breads.id"))
-    tag_id = db.Column(db.Integer, db.ForeignKey("all_tags.id"))
+    bread_id = db.Column(db.Integer, db.ForeignKey("all_breads.id", ondelete="CASCADE"))
+    # Tags still linked to breads cannot be deleted.
+    tag_id = db.Column(db.Integer, db.ForeignKey("all_tags.id", ondelete="RESTRICT"))
+
+    @classmethod
+    def bread_ids_tagged_with_all(cls, tag_ids: Collection[int]) -> Select:
+        """
+        Selects ids of breads linked to every given tag.
+        """
+        tag_ids = set(tag_ids)
+        statement: Select = (
+            select(cls.bread_id)
+            .where(cls.tag_id.in_(tag_ids))
+            .group_by(cls.bread_id)
+            .having(func.count(cls.tag_id) == len(tag_ids))
+        )
+        return statement
+
+    @classmethod
+    def bread_ids_tagged_with_any(cls, tag_ids: Collection[int]) -> Select:
+        """
+        Selects ids of breads linked to at least one of the given tags.
+        """
+        statement: Select = select(cls.bread_id).where(cls.tag_id.in_(set(tag_ids)))
+        return statement
+
+    @classmethod
+    def is_tag_linked(cls, tag_id: int) -> bool:
+        """
+        Checks with EXISTS whether any bread is tagged with the tag, without loading the breads.
+        """
+        linked: bool = db.session.execute(select(exists().where(cls.tag_id == tag_id))).scalar()
+        return linked
+
+    @classmethod
+    def _insert_ignoring_linked(cls) -> Any:
+        dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[
+            db.session.get_bind().dialect.name
+        ]
+        return dialect_insert(cls.__table__).on_conflict_do_nothing(
+            index_elements=["tag_id", "bread_id"]
+        )
+
+    @classmethod
+    def link_pairs(cls, pairs: Collection[Tuple[int, int]]) -> int:
+        """
+        Links the given (bread_id, tag_id) pairs with one multi-row INSERT,
+        skipping pairs that are already linked. Returns the number of new links.
+        """
+        if not pairs:
+            return 0
+        statement = cls._insert_ignoring_linked().returning(cls.id)
+        rows = [{"bread_id": bread_id, "tag_id": tag_id} for bread_id, tag_id in pairs]
+        return len(db.session.execute(statement, rows).all())
+
+    @classmethod
+    def link_selected(cls, pairs: Select) -> int:
+        """
+        Links every (bread_id, tag_id) pair selected by the statement with one
+        INSERT ... SELECT, skipping pairs that are already linked.
+        Returns the number of new links.
+        """
+        # SQLite needs a WHERE clause to tell the upsert ON from a join ON.
+        statement = cls._insert_ignoring_linked().from_select(
+            ["bread_id", "tag_id"], pairs.where(true())
+        )
+        linked: int = db.session.execute(statement).rowcount
+        return linked
+
+    @classmethod
+    def unlink(cls, *conditions: Any) -> int:
+        """
+        Removes the links matching the conditions with one DELETE.
+        Returns the number of removed links.
+        """
+        unlinked: int = db.session.execute(
+            delete(cls).where(*conditions).execution_options(synchronize_session=False)
+        ).rowcount
+        return unlinked
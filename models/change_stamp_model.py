@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Set
+
+from sqlalchemy import insert, inspect, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, scoped_session
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+# Tables whose changes invalidate cached representations of bakeries, breads and tags.
+TRACKED_TABLES = ["all_bakeries", "all_breads", "all_tags", "all_breads_tags"]
+
+CHANGE_STAMP_BUMP_ATTEMPTS = 3
+CHANGE_STAMP_BUMP_BACKOFF = 0.05
+
+# Tables changed by commits of this process whose stamps could not be bumped yet.
+_unbumped_tables: Set[str] = set()
+_unbumped_lock = threading.Lock()
+
+
+class ChangeStampModel(db.Model):  # type: ignore
+    __tablename__ = "change_stamps"
+
+    table_name = db.Column(db.String(40), primary_key=True)
+    stamp = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(
+        cls, table_names: Iterable[str], session: Session | scoped_session | None = None
+    ) -> Dict[str, int]:
+        """
+        Returns the change stamp of every given table with one primary key lookup.
+        """
+        rows = (session or db.session).query(cls.table_name, cls.stamp).filter(
+            cls.table_name.in_(set(table_names))
+        )
+        return {table_name: stamp for table_name, stamp in rows}
+
+    @classmethod
+    def touch(
+        cls,
+        session: Session | scoped_session,
+        table_names: Iterable[str],
+        row_keys: Iterable[str] = (),
+    ) -> None:
+        """
+        Records the changed tables in session.info["changed_tables"] and the changed tables
+        and `table:id` rows in session.info["changed_keys"]. Once the transaction is committed
+        the change stamps are bumped and caches are invalidated.
+        Statements that bypass the ORM unit of work have to call it themselves.
+        """
+        table_names = set(table_names)
+        session.info.setdefault("changed_tables", set()).update(table_names)
+        session.info.setdefault("changed_keys", set()).update(table_names, row_keys)
+
+    @classmethod
+    def bump(cls, connection: Connection, table_names: Iterable[str]) -> None:
+        connection.execute(
+            update(cls).where(cls.table_name.in_(set(table_names))).values(stamp=cls.stamp + 1)
+        )
+
+
+def _changed_tables(session: Session) -> Set[str]:
+    tables = set()
+    for obj in session.new | session.deleted:
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        state = inspect(obj)
+        for relationship in state.mapper.relationships:
+            if relationship.secondary is not None and state.attrs[
+                relationship.key
+            ].history.has_changes():
+                tables.add(relationship.secondary.name)
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    return tables & set(TRACKED_TABLES)
+
+
+def _changed_rows(session: Session) -> Set[str]:
+    rows = set()
+    for obj in session.new | session.deleted | session.dirty:
+        table_name = obj.__table__.name
+        if table_name in TRACKED_TABLES:
+            rows.add(f"{table_name}:{obj.id}")
+    return rows
+
+
+def touch_changed_tables(session: Session, flush_context: object) -> None:
+    ChangeStampModel.touch(session, _changed_tables(session), _changed_rows(session))
+
+
+def bump_committed_change_stamps(session: Session) -> None:
+    """
+    Bumps the change stamps of the tables changed by the committed transaction.
+
+    The stamps are shared by every writer, so they are bumped in a short transaction
+    of their own: a row lock taken inside the writer's transaction would be held until
+    its commit and make concurrent writers wait for each other. Readers may see the new
+    rows with the old stamps for the few milliseconds in between, never the other way round.
+
+    A failed bump is retried with backoff. If every attempt fails, the tables are
+    remembered, bumped again with the next commit, and reported by unbumped_change_stamps
+    so that ETags built from them do not answer 304 Not Modified in the meantime.
+    """
+    table_names = set(session.info.pop("changed_tables", None) or ())
+    with _unbumped_lock:
+        table_names |= _unbumped_tables
+    if not table_names:
+        return
+    bind = session.get_bind(mapper=inspect(ChangeStampModel))
+    for attempt in range(1, CHANGE_STAMP_BUMP_ATTEMPTS + 1):
+        try:
+            with bind.begin() as connection:
+                ChangeStampModel.bump(connection, table_names)
+        except SQLAlchemyError:
+            if attempt < CHANGE_STAMP_BUMP_ATTEMPTS:
+                time.sleep(CHANGE_STAMP_BUMP_BACKOFF * attempt)
+                continue
+            logger.exception("Bumping the change stamps of %s failed.", sorted(table_names))
+            with _unbumped_lock:
+                _unbumped_tables.update(table_names)
+            return
+        with _unbumped_lock:
+            _unbumped_tables.difference_update(table_names)
+        return
+
+
+def unbumped_change_stamps(table_names: Iterable[str]) -> Set[str]:
+    """
+    Returns the given tables whose committed changes are not reflected in their stamps yet.
+    """
+    with _unbumped_lock:
+        return _unbumped_tables.intersection(table_names)
+
+
+def discard_change_stamps(session: Session, *args: Any) -> None:
+    session.info.pop("changed_tables", None)
+
+
+def seed_change_stamps(target: object, connection: Connection, **kw: object) -> None:
+    connection.execute(
+        insert(ChangeStampModel),
+        [{"table_name": table_name, "stamp": 0} for table_name in TRACKED_TABLES],
+    )
+
+
+db.event.listen(Session, "after_flush", touch_changed_tables)
+db.event.listen(Session, "after_commit", bump_committed_change_stamps)
+db.event.listen(Session, "after_rollback", discard_change_stamps)
+db.event.listen(ChangeStampModel.__table__, "after_create", seed_change_stamps)
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection
+
+from db import db
+
+
+class JobOutboxModel(db.Model):  # type: ignore
+    """
+    Background jobs that could not be handed to Redis yet, relayed to RQ once it is back.
+    """
+
+    __tablename__ = "job_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(40), nullable=False)
+    func = db.Column(db.String(200), nullable=False)  # import path of the job function
+    args = db.Column(db.JSON, nullable=False)
+    kwargs = db.Column(db.JSON, nullable=False)
+    job_id = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    @classmethod
+    def store(cls, connection: Connection, jobs: List[Dict[str, Any]]) -> None:
+        connection.execute(insert(cls), jobs)
+
+    @classmethod
+    def claim(cls, connection: Connection, limit: int) -> List[Any]:
+        """
+        Returns the oldest stored jobs, locked until the transaction ends
+        so that concurrent relays skip them (PostgreSQL only, SQLite has a single writer).
+        """
+        return list(
+            connection.execute(
+                select(cls.__table__)
+                .order_by(cls.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        )
+
+    @classmethod
+    def remove(cls, connection: Connection, ids: Iterable[int]) -> None:
+        connection.execute(delete(cls).where(cls.id.in_(list(ids))))
@@ -6,10 +6,15 @@ class TagModel(db.Model):  # type: ignore
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(30), unique=False, nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default="1")
 
-    bakery_id = db.Column(db.Integer, db.ForeignKey("all_bakeries.id"), nullable=False)
+    bakery_id = db.Column(
+        db.Integer, db.ForeignKey("all_bakeries.id", ondelete="CASCADE"), nullable=False
+    )
 
     bakery = db.relationship("BakeryModel", back_populates="tags")
     breads = db.relationship(
-        "BreadModel", back_populates="tags", secondary="all_breads_tags"
+        "BreadModel", back_populates="tags", secondary="all_breads_tags", passive_deletes=True
     )
+
+    __mapper_args__ = {"version_id_col": version_id}
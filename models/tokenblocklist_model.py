@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Dict
+
 from db import db
 
 
@@ -7,10 +10,10 @@ class TokenBlocklistModel(db.Model):   # type: ignore
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, index=True)  # JSON Web Token
     created_at = db.Column(db.DateTime, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     type = db.Column(db.String(10), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("all_users.id"), nullable=False)
-    revoked = db.Column(db.Boolean, nullable=False)
+    revoked = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
 
     user = db.relationship("UserModel", lazy="joined")
 
@@ -18,9 +21,16 @@ class TokenBlocklistModel(db.Model):   # type: ignore
     def is_jti_blacklisted(cls, jti: str) -> bool:
         """
         Checking if token is blacklisted.
+        Only revoked tokens are stored.
+        """
+        return cls.query.filter_by(jti=jti, revoked=True).first() is not None
+
+    @classmethod
+    def revoked_jtis(cls) -> Dict[str, float]:
+        """
+        Returns revoked tokens that have not expired yet with their expiry timestamps.
         """
-        query = cls.query.filter_by(jti=jti).first()
-        if query is not None:
-            return query.revoked
-        else:
-            return False
+        rows = db.session.query(cls.jti, cls.expires_at).filter(
+            cls.revoked.is_(True), cls.expires_at > datetime.now()
+        )
+        return {jti: expires_at.timestamp() for jti, expires_at in rows}
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from db import db
 
 
@@ -8,3 +10,15 @@ class UserModel(db.Model):  # type: ignore
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(256), nullable=False)
     email = db.Column(db.String, unique=True, nullable=False)
+    # Tokens issued at or before this moment are revoked.
+    tokens_valid_after = db.Column(db.DateTime)
+
+    @classmethod
+    def token_watermarks(cls) -> Dict[int, float]:
+        """
+        Returns the tokens_valid_after timestamp of every user who has one.
+        """
+        rows = db.session.query(cls.id, cls.tokens_valid_after).filter(
+            cls.tokens_valid_after.is_not(None)
+        )
+        return {user_id: valid_after.timestamp() for user_id, valid_after in rows}
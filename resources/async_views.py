@@ -0,0 +1,290 @@
+import asyncio
+import contextvars
+import time
+from typing import (Any, Awaitable, Callable, Dict, Iterable, List, Tuple,
+                    TypeVar)
+
+from flask import Response, current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+from flask_smorest import Blueprint, abort
+from marshmallow import EXCLUDE, Schema, ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from werkzeug.routing import Map, Rule
+
+from async_db import async_session
+from cache_extension import response_cache
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.tag_model import TagModel
+from resources.bakeries import blp_bakeries
+from resources.breads import blp_breads
+from resources.tags import blp_tags
+from schemas import (BakeryListArgsSchema, BakeryQueryArgsSchema, BakerySchema,
+                     BreadListArgsSchema, BreadQueryArgsSchema, BreadSchema,
+                     TagQueryArgsSchema, TagSchema)
+from utilities.etag import set_collection_etag, set_row_etag
+from utilities.loading import shape_query
+from utilities.pagination import keyset_page, keyset_statement
+from utilities.routing import ReplicaSet
+
+View = Callable[..., Awaitable[Tuple[Any, Dict[str, str]]]]
+T = TypeVar("T")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """
+    Runs a call blocking on Redis or on the sync database on the default thread pool,
+    inside the app and request context of the caller, and waits for it without
+    holding the event loop.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        None, lambda: context.run(func, *args)
+    )
+
+
+class AsyncRoute:
+    """
+    Read-only endpoint of the sync API served on the event loop.
+
+    It goes through the steps of the sync endpoint in the same order and with the same
+    helpers: JWT check, read replica, response cache, ETag and query arguments, so both
+    answer with the same body, headers, ETag and 304. Only the queries of the view itself
+    run on the async engine.
+    """
+
+    def __init__(
+        self,
+        view: View,
+        blp: Blueprint,
+        args_schema: Schema,
+        model: Any,
+        jwt_required: bool = False,
+        status: int = 200,
+        id_arg: str | None = None,
+        depends_on: Iterable[str] = (),
+        arg_dependencies: Dict[str, List[str]] | None = None,
+    ) -> None:
+        self.view = view
+        self.args_schema = args_schema
+        self.jwt_required = jwt_required
+        self.status = status
+        self.model = model
+        self.id_arg = id_arg
+        self.depends_on = depends_on
+        self.arg_dependencies = arg_dependencies
+        # Adds the ETag set by the view to the response, as on the sync endpoint.
+        self.add_etag = blp.etag(lambda response: response)
+
+    def load_args(self) -> Dict[str, Any]:
+        try:
+            query_args: Dict[str, Any] = self.args_schema.load(
+                request.args.to_dict(), unknown=EXCLUDE
+            )
+        except ValidationError as e:
+            abort(422, errors={"query": e.messages})
+        return query_args
+
+    async def __call__(self, **view_args: Any) -> Response:
+        if self.jwt_required:
+            await run_blocking(verify_jwt_in_request)
+        key, cached = await run_blocking(
+            response_cache.lookup,
+            self.model,
+            view_args,
+            self.id_arg,
+            self.depends_on,
+            self.arg_dependencies,
+        )
+        if cached is not None:
+            return cached
+        if key is None:
+            return await self.read(view_args)
+
+        # Only one request computes a missing response, the others wait for it.
+        deadline = time.monotonic() + response_cache.LOCK_TIMEOUT
+        while not await run_blocking(response_cache.lock, key):
+            await asyncio.sleep(response_cache.LOCK_POLL_INTERVAL)
+            cached = await run_blocking(response_cache.get, key)
+            if cached is not None:
+                return cached
+            if time.monotonic() > deadline:
+                return await self.read(view_args)
+        try:
+            response = await self.read(view_args)
+            await run_blocking(response_cache.store, key, response)
+            return response
+        finally:
+            await run_blocking(response_cache.unlock, key)
+
+    async def read(self, view_args: Dict[str, Any]) -> Response:
+        """
+        Runs the view on a read replica. If the replica fails, it is taken out of rotation
+        and the view runs again on the primary, as with read_replica.
+        """
+        replicas: ReplicaSet = current_app.extensions["replicas"]
+        bind_key = replicas.pick()
+        try:
+            return await self.read_from(bind_key, view_args)
+        except OperationalError:
+            if bind_key is None:
+                raise
+            replicas.mark_down(bind_key)
+            return await self.read_from(None, view_args)
+
+    async def read_from(self, bind_key: str | None, view_args: Dict[str, Any]) -> Response:
+        async with async_session(bind_key) as session:
+            body, headers = await self.view(session, self.load_args(), **view_args)
+        response = jsonify(body)
+        response.status_code = self.status
+        response.headers.update(headers)
+        finished: Response = self.add_etag(response)
+        return finished
+
+
+async_url_map = Map()
+async_routes: Dict[str, AsyncRoute] = {}
+
+
+def async_route(rule: str, *args: Any, **kwargs: Any) -> Callable[[View], View]:
+    def decorator(view: View) -> View:
+        async_url_map.add(Rule(rule, endpoint=view.__name__, methods=["GET"]))
+        async_routes[view.__name__] = AsyncRoute(view, *args, **kwargs)
+        return view
+
+    return decorator
+
+
+async def _set_collection_etag(
+    session: AsyncSession,
+    blp: Blueprint,
+    model: Any,
+    expand: Iterable[str],
+    extra_tables: Iterable[str] = (),
+) -> None:
+    await session.run_sync(
+        lambda sync_session: set_collection_etag(blp, model, expand, extra_tables, sync_session)
+    )
+
+
+async def _set_row_etag(
+    session: AsyncSession, blp: Blueprint, row: Any, expand: Iterable[str]
+) -> None:
+    await session.run_sync(lambda sync_session: set_row_etag(blp, row, expand, sync_session))
+
+
+async def _first_or_404(session: AsyncSession, statement: Any) -> Any:
+    row = (await session.scalars(statement)).unique().first()
+    if row is None:
+        abort(404)
+    return row
+
+
+async def _page(
+    session: AsyncSession, statement: Any, keys: List[Tuple[Any, bool]], query_args: Dict[str, Any]
+) -> Tuple[List[Any], Dict[str, str]]:
+    statement = keyset_statement(statement, keys, query_args["limit"], query_args.get("after"))
+    rows = (await session.scalars(statement)).unique().all()
+    return keyset_page(list(rows), keys, query_args["limit"])
+
+
+@async_route(
+    "/breads",
+    blp_breads,
+    BreadListArgsSchema(),
+    BreadModel,
+    jwt_required=True,
+    arg_dependencies={"tags_all": ["all_breads_tags"], "tags_any": ["all_breads_tags"]},
+)
+async def get_breads(
+    session: AsyncSession, query_args: Dict[str, Any]
+) -> Tuple[Any, Dict[str, str]]:
+    tag_filters = query_args.get("tags_all") or query_args.get("tags_any")
+    await _set_collection_etag(
+        session,
+        blp_breads,
+        BreadModel,
+        query_args["expand"],
+        extra_tables=["all_breads_tags"] if tag_filters else [],
+    )
+    statement = shape_query(select(BreadModel), BreadModel, query_args)
+    statement = statement.filter(*BreadModel.filter_conditions(query_args))
+    breads, headers = await _page(
+        session, statement, BreadModel.sort_keys(query_args["sort"]), query_args
+    )
+    return BreadSchema(many=True).dump(breads), headers
+
+
+@async_route(
+    "/breads/<int:uid>",
+    blp_breads,
+    BreadQueryArgsSchema(),
+    BreadModel,
+    jwt_required=True,
+    id_arg="uid",
+)
+async def get_bread(
+    session: AsyncSession, query_args: Dict[str, Any], uid: int
+) -> Tuple[Any, Dict[str, str]]:
+    statement = shape_query(select(BreadModel), BreadModel, query_args)
+    bread = await _first_or_404(session, statement.filter(BreadModel.id == uid))
+    await _set_row_etag(session, blp_breads, bread, query_args["expand"])
+    return BreadSchema().dump(bread), {}
+
+
+@async_route("/bakeries", blp_bakeries, BakeryListArgsSchema(), BakeryModel)
+async def get_bakeries(
+    session: AsyncSession, query_args: Dict[str, Any]
+) -> Tuple[Any, Dict[str, str]]:
+    await _set_collection_etag(session, blp_bakeries, BakeryModel, query_args["expand"])
+    statement = shape_query(select(BakeryModel), BakeryModel, query_args)
+    bakeries, headers = await _page(session, statement, [(BakeryModel.id, False)], query_args)
+    return BakerySchema(many=True).dump(bakeries), headers
+
+
+@async_route(
+    "/bakeries/<int:bakery_id>",
+    blp_bakeries,
+    BakeryQueryArgsSchema(),
+    BakeryModel,
+    id_arg="bakery_id",
+)
+async def get_bakery(
+    session: AsyncSession, query_args: Dict[str, Any], bakery_id: int
+) -> Tuple[Any, Dict[str, str]]:
+    statement = shape_query(select(BakeryModel), BakeryModel, query_args)
+    bakery = await _first_or_404(session, statement.filter(BakeryModel.id == bakery_id))
+    await _set_row_etag(session, blp_bakeries, bakery, query_args["expand"])
+    return BakerySchema().dump(bakery), {}
+
+
+@async_route(
+    "/bakeries/<int:bakery_id>/tag",
+    blp_tags,
+    TagQueryArgsSchema(),
+    TagModel,
+    depends_on=["all_bakeries"],
+)
+async def get_bakery_tags(
+    session: AsyncSession, query_args: Dict[str, Any], bakery_id: int
+) -> Tuple[Any, Dict[str, str]]:
+    if await session.get(BakeryModel, bakery_id) is None:
+        abort(404)
+    await _set_collection_etag(session, blp_tags, TagModel, query_args["expand"])
+    statement = shape_query(select(TagModel), TagModel, query_args)
+    tags = (await session.scalars(statement.filter_by(bakery_id=bakery_id))).unique().all()
+    return TagSchema(many=True).dump(tags), {}
+
+
+@async_route(
+    "/tag/<int:tag_id>", blp_tags, TagQueryArgsSchema(), TagModel, status=201, id_arg="tag_id"
+)
+async def get_tag(
+    session: AsyncSession, query_args: Dict[str, Any], tag_id: int
+) -> Tuple[Any, Dict[str, str]]:
+    statement = shape_query(select(TagModel), TagModel, query_args)
+    tag = await _first_or_404(session, statement.filter(TagModel.id == tag_id))
+    await _set_row_etag(session, blp_tags, tag, query_args["expand"])
+    return TagSchema().dump(tag), {}
@@ -1,42 +1,98 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from flask.views import MethodView
+from flask_jwt_extended import get_jwt, jwt_required
 from flask_smorest import Blueprint, abort
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from cache_extension import response_cache
 from db import db
 from models.bakery_model import BakeryModel
-from schemas import BakerySchema
+from models.bakery_stats_model import BakeryPriceStatsModel, BakeryStatsModel
+from models.bread_model import BreadModel
+from models.change_stamp_model import ChangeStampModel
+from schemas import (BakeryDeleteArgsSchema, BakeryListArgsSchema,
+                     BakeryQueryArgsSchema, BakerySchema, BakeryStatsSchema,
+                     PaginationArgsSchema, PriceChangeSchema)
+from utilities.etag import set_collection_etag, set_row_etag
+from utilities.loading import shape_query
+from utilities.pagination import keyset_paginate
+from utilities.routing import read_replica
 
 blp_bakeries = Blueprint("Bakeries", "bakeries", description="Operations on bakeries.")
 
 
 @blp_bakeries.route("/bakeries/<string:bakery_id>")
 class Bakery(MethodView):
+    @read_replica
+    @response_cache.cached(BakeryModel, id_arg="bakery_id")
+    @blp_bakeries.etag
+    @blp_bakeries.arguments(BakeryQueryArgsSchema, location="query")
     @blp_bakeries.response(200, BakerySchema)
-    def get(self, bakery_id: str):
+    def get(self, query_args: Dict[str, Any], bakery_id: str) -> BakeryModel:
         """Get requested bakery."""
-        return BakeryModel.query.get_or_404(bakery_id)
+        query = shape_query(BakeryModel.query, BakeryModel, query_args)
+        bakery = query.get_or_404(bakery_id)
+        set_row_etag(blp_bakeries, bakery, query_args["expand"])
+        return bakery
 
     def delete(self, bakery_id: str) -> Tuple[Dict[str, str | int], int]:
-        """Delete requested bakery."""
-        bakery = BakeryModel.query.get_or_404(bakery_id)
-        db.session.delete(bakery)
-        db.session.commit()
+        """Delete requested bakery with its breads and tags."""
+        try:
+            deleted = (
+                BakeryModel.delete_with_children([int(bakery_id)]) if bakery_id.isdigit() else []
+            )
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while deleting the bakery.")
+
+        if not deleted:
+            abort(404, message="Bakery not found.")
         return {
             "message": "Bakery deleted",
-            "bakery_name": bakery.name,
-            "bakery_id": bakery.id,
+            "bakery_name": deleted[0][1],
+            "bakery_id": deleted[0][0],
         }, 200
 
 
 @blp_bakeries.route("/bakeries")
 class Bakeries(MethodView):
+    @read_replica
+    @response_cache.cached(BakeryModel)
+    @blp_bakeries.etag
+    @blp_bakeries.arguments(BakeryListArgsSchema, location="query")
     @blp_bakeries.response(200, BakerySchema(many=True))
-    def get(self) -> List[BakeryModel]:
-        """Get list of all bakeries."""
-        all_bakeries = BakeryModel.query.all()
-        return all_bakeries
+    def get(self, query_args: Dict[str, Any]) -> Tuple[List[BakeryModel], Dict[str, str]]:
+        """Get a page of bakeries."""
+        set_collection_etag(blp_bakeries, BakeryModel, query_args["expand"])
+        query = shape_query(BakeryModel.query, BakeryModel, query_args)
+        return keyset_paginate(
+            query, [(BakeryModel.id, False)], query_args["limit"], query_args.get("after")
+        )
+
+    @jwt_required()
+    @blp_bakeries.arguments(BakeryDeleteArgsSchema, location="query")
+    def delete(self, query_args: Dict[str, List[int]]) -> Tuple[Dict[str, Any], int]:
+        """
+        Delete many bakeries with their breads and tags.
+        Admin rights required.
+        """
+        if not get_jwt().get("is_admin"):
+            abort(401, message="Admin rights required.")
+
+        try:
+            deleted = BakeryModel.delete_with_children(query_args["ids"])
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while deleting bakeries.")
+
+        return {
+            "message": f"{len(deleted)} bakeries deleted.",
+            "bakery_ids": sorted(bakery_id for bakery_id, _ in deleted),
+        }, 200
 
     @blp_bakeries.arguments(BakerySchema)
     @blp_bakeries.response(201, BakerySchema)
@@ -55,3 +111,110 @@ class Bakeries(MethodView):
             abort(500, message="An error occurred creating the bakery.")
 
         return bakery
+
+
+def _stats_query() -> Any:
+    # Bakeries without breads and tags have no statistics row yet.
+    return db.session.query(
+        BakeryModel.id,
+        BakeryStatsModel.bread_count,
+        BakeryStatsModel.gluten_free_count,
+        BakeryStatsModel.tag_count,
+    ).outerjoin(BakeryStatsModel, BakeryStatsModel.bakery_id == BakeryModel.id)
+
+
+def _stats(rows: List[Any]) -> List[Dict[str, Any]]:
+    prices = BakeryPriceStatsModel.for_bakeries([row.id for row in rows])
+    return [
+        {
+            "bakery_id": row.id,
+            "bread_count": row.bread_count or 0,
+            "gluten_free_count": row.gluten_free_count or 0,
+            "tag_count": row.tag_count or 0,
+            "prices": [
+                {
+                    "currency": price.currency,
+                    "bread_count": price.bread_count,
+                    "price_min": price.price_min,
+                    "price_max": price.price_max,
+                    "price_avg": round(price.price_sum / price.bread_count, 2),
+                }
+                for price in prices[row.id]
+            ],
+        }
+        for row in rows
+    ]
+
+
+@blp_bakeries.route("/bakeries/<int:bakery_id>/stats")
+class BakeryStats(MethodView):
+    @read_replica
+    @blp_bakeries.response(200, BakeryStatsSchema)
+    def get(self, bakery_id: int) -> Dict[str, Any]:
+        """
+        Get bread counts, tag count and prices per currency of the bakery.
+        Read from precomputed statistics with primary key lookups only.
+        """
+        row = _stats_query().filter(BakeryModel.id == bakery_id).first()
+        if row is None:
+            abort(404, message="Bakery not found.")
+        return _stats([row])[0]
+
+
+@blp_bakeries.route("/bakeries/stats")
+class BakeriesStats(MethodView):
+    @read_replica
+    @blp_bakeries.arguments(PaginationArgsSchema, location="query")
+    @blp_bakeries.response(200, BakeryStatsSchema(many=True))
+    def get(self, query_args: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Get a page of bakery statistics, ordered by bakery id."""
+        rows, headers = keyset_paginate(
+            _stats_query(), [(BakeryModel.id, False)], query_args["limit"], query_args.get("after")
+        )
+        return _stats(rows), headers
+
+
+@blp_bakeries.route("/bakeries/<int:bakery_id>/breads/prices")
+class BakeryBreadPrices(MethodView):
+    @jwt_required()
+    @blp_bakeries.arguments(PriceChangeSchema)
+    def patch(self, price_change: Dict[str, Any], bakery_id: int) -> Dict[str, Any]:
+        """
+        Reprice the breads of the bakery matching the filter.
+        Runs as a single UPDATE ... RETURNING, no bread is loaded.
+        Admin rights required.
+        """
+        if not get_jwt().get("is_admin"):
+            abort(401, message="Admin rights required.")
+
+        BakeryModel.query.get_or_404(bakery_id)
+        breads = BreadModel.__table__
+        statement = (
+            update(breads)
+            .where(
+                BreadModel.bakery_id == bakery_id,
+                *BreadModel.filter_conditions(price_change["filter"]),
+            )
+            .values(
+                price=BreadModel.price_expression(price_change),
+                version_id=BreadModel.version_id + 1,
+            )
+            .returning(breads.c.id, breads.c.price)
+        )
+        try:
+            updated = db.session.execute(statement).all()
+            # The UPDATE bypasses the unit of work, so caches are invalidated by hand.
+            ChangeStampModel.touch(
+                db.session,
+                [BreadModel.__tablename__] if updated else [],
+                [f"{BreadModel.__tablename__}:{bread_id}" for bread_id, _ in updated],
+            )
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while updating prices.")
+
+        return {
+            "message": f"{len(updated)} bread prices updated.",
+            "breads": [{"id": bread_id, "price": price} for bread_id, price in updated],
+        }
@@ -1,13 +1,29 @@
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
+from flask import Response, stream_with_context
 from flask.views import MethodView
 from flask_jwt_extended import get_jwt, jwt_required
 from flask_smorest import Blueprint, abort
+from marshmallow import ValidationError
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
 
+from cache_extension import response_cache
 from db import db
+from models.bakery_model import BakeryModel
 from models.bread_model import BreadModel
-from schemas import BreadSchema, BreadUpdateSchema
+from models.change_stamp_model import ChangeStampModel
+from schemas import (BreadExportArgsSchema, BreadListArgsSchema,
+                     BreadQueryArgsSchema, BreadSchema, BreadSearchArgsSchema,
+                     BreadUpdateSchema, BulkCreateArgsSchema)
+from utilities.bulk import InvalidRow, chunked, iter_request_rows
+from utilities.etag import set_collection_etag, set_row_etag
+from utilities.export import csv_lines, iter_rows, ndjson_lines
+from utilities.loading import shape_query
+from utilities.pagination import keyset_paginate
+from utilities.routing import read_replica
+from utilities.search import SearchNotSupported, search_bread_ids
 
 blp_breads = Blueprint("Breads", "breads", description="Operations on all breads")
 
@@ -35,19 +51,182 @@ class BreadsSegment(MethodView):
         return bread
 
     @jwt_required()
+    @read_replica
+    @response_cache.cached(
+        BreadModel,
+        arg_dependencies={"tags_all": ["all_breads_tags"], "tags_any": ["all_breads_tags"]},
+    )
+    @blp_breads.etag
+    @blp_breads.arguments(BreadListArgsSchema, location="query")
     @blp_breads.response(200, BreadSchema(many=True))
-    def get(self):
-        """Get all breads stored in database."""
-        return BreadModel.query.all()
+    def get(self, query_args: Dict[str, Any]) -> Tuple[List[BreadModel], Dict[str, str]]:
+        """Get a page of breads stored in database, filtered and sorted as requested."""
+        tag_filters = query_args.get("tags_all") or query_args.get("tags_any")
+        set_collection_etag(
+            blp_breads,
+            BreadModel,
+            query_args["expand"],
+            extra_tables=["all_breads_tags"] if tag_filters else [],
+        )
+
+        query = shape_query(BreadModel.query, BreadModel, query_args)
+
+        query = query.filter(*BreadModel.filter_conditions(query_args))
+
+        return keyset_paginate(
+            query,
+            BreadModel.sort_keys(query_args["sort"]),
+            query_args["limit"],
+            query_args.get("after"),
+        )
+
+
+@blp_breads.route("/breads/bulk")
+class BreadsBulk(MethodView):
+    """Creating many breads in one request."""
+
+    @jwt_required(fresh=True)
+    @blp_breads.arguments(BulkCreateArgsSchema, location="query")
+    def post(self, query_args: Dict[str, bool]) -> Tuple[Dict[str, Any], int]:
+        """
+        Create breads from a JSON array or NDJSON (application/x-ndjson) body.
+        Rows are validated and inserted in chunks of multi-row INSERTs, all in one transaction.
+        By default nothing is created if any row is invalid,
+        with `?skip_invalid=true` valid rows are created and invalid ones reported.
+        """
+        schema = BreadSchema(many=True)
+        known_bakery_ids: set[int] = set()
+        created_ids: List[int] = []
+        errors: Dict[int, Any] = {}
+
+        for chunk in chunked(iter_request_rows()):
+            rows = []
+            for index, row in chunk:
+                if isinstance(row, InvalidRow):
+                    errors[index] = {"_schema": [row.message]}
+                else:
+                    rows.append((index, row))
+
+            # Errors of a list are keyed by the position of the invalid row.
+            row_errors: Dict[Any, Any] = {}
+            try:
+                loaded = schema.load([row for _, row in rows])
+            except ValidationError as e:
+                loaded, row_errors = e.valid_data, e.messages_dict
+
+            bakery_ids = {bread["bakery_id"] for bread in loaded if "bakery_id" in bread}
+            if bakery_ids - known_bakery_ids:
+                known_bakery_ids.update(
+                    db.session.execute(
+                        select(BakeryModel.id).where(
+                            BakeryModel.id.in_(bakery_ids - known_bakery_ids)
+                        )
+                    ).scalars()
+                )
+
+            valid = []
+            for position, (index, _) in enumerate(rows):
+                if position in row_errors:
+                    errors[index] = row_errors[position]
+                elif loaded[position]["bakery_id"] not in known_bakery_ids:
+                    errors[index] = {"bakery_id": ["Bakery not found."]}
+                else:
+                    valid.append(loaded[position])
+
+            # Without skip_invalid only validation continues after the first error.
+            if valid and (query_args["skip_invalid"] or not errors):
+                try:
+                    created_ids.extend(
+                        db.session.execute(
+                            insert(BreadModel).returning(BreadModel.id), valid
+                        ).scalars()
+                    )
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    abort(500, message="An error occurred creating breads.")
+
+        if errors and not query_args["skip_invalid"]:
+            db.session.rollback()
+            abort(422, message="Invalid breads, none were created.", errors={"json": errors})
+
+        if created_ids:
+            # Multi-row INSERTs bypass the unit of work, so caches are invalidated by hand.
+            ChangeStampModel.touch(db.session, [BreadModel.__tablename__])
+        db.session.commit()
+
+        return {
+            "message": f"{len(created_ids)} breads created.",
+            "ids": sorted(created_ids),
+            "errors": errors,
+        }, 201
+
+
+@blp_breads.route("/breads/export")
+class BreadsExport(MethodView):
+    """Export of the whole bread catalog."""
+
+    EXPORT_COLUMNS = ["id", "name", "price", "currency", "gluten_free", "info", "bakery_id"]
+    MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    @jwt_required()
+    @blp_breads.arguments(BreadExportArgsSchema, location="query")
+    def get(self, query_args: Dict[str, str]) -> Response:
+        """
+        Stream every bread as NDJSON or CSV.
+        Rows are fetched in chunks and written out as they arrive,
+        so memory use does not grow with the size of the catalog.
+        """
+        export_format = query_args["format"]
+        statement = select(
+            *(getattr(BreadModel, name) for name in self.EXPORT_COLUMNS)
+        ).order_by(BreadModel.id)
+        rows = iter_rows(db.session, statement)
+        lines = (csv_lines if export_format == "csv" else ndjson_lines)(self.EXPORT_COLUMNS, rows)
+
+        return Response(
+            stream_with_context(lines),
+            mimetype=self.MIMETYPES[export_format],
+            headers={"Content-Disposition": f"attachment; filename=breads.{export_format}"},
+        )
+
+
+@blp_breads.route("/breads/search")
+class BreadsSearch(MethodView):
+    """Full-text search over bread names and descriptions."""
+
+    @jwt_required()
+    @read_replica
+    @response_cache.cached(BreadModel)
+    @blp_breads.etag
+    @blp_breads.arguments(BreadSearchArgsSchema, location="query")
+    @blp_breads.response(200, BreadSchema(many=True))
+    def get(self, query_args: Dict[str, Any]) -> List[BreadModel]:
+        """Get breads matching the search query, most relevant first."""
+        set_collection_etag(blp_breads, BreadModel, query_args["expand"])
+        try:
+            bread_ids = search_bread_ids(db.session, query_args["q"], query_args["limit"])
+        except SearchNotSupported as e:
+            abort(501, message=str(e))
+
+        query = shape_query(BreadModel.query, BreadModel, query_args)
+        breads = query.filter(BreadModel.id.in_(bread_ids)).all()
+        position = {bread_id: index for index, bread_id in enumerate(bread_ids)}
+        return sorted(breads, key=lambda bread: position[bread.id])
 
 
 @blp_breads.route("/breads/<int:uid>")
 class BreadSegment(MethodView):
     @jwt_required()
+    @read_replica
+    @response_cache.cached(BreadModel, id_arg="uid")
+    @blp_breads.etag
+    @blp_breads.arguments(BreadQueryArgsSchema, location="query")
     @blp_breads.response(200, BreadSchema)
-    def get(self, uid: int) -> BreadModel:
+    def get(self, query_args: Dict[str, Any], uid: int) -> BreadModel:
         """Get requested bread."""
-        bread = BreadModel.query.get_or_404(uid)
+        query = shape_query(BreadModel.query, BreadModel, query_args)
+        bread = query.get_or_404(uid)
+        set_row_etag(blp_breads, bread, query_args["expand"])
         return bread
 
     @jwt_required()
@@ -59,8 +238,15 @@ class BreadSegment(MethodView):
             abort(401, message="Admin rights required.")
 
         bread = BreadModel.query.get_or_404(uid)
-        db.session.delete(bread)
-        db.session.commit()
+        try:
+            db.session.delete(bread)
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            abort(409, message="The bread was changed by another request, try again.")
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while deleting the bread.")
 
         return {
             "message": "Bread deleted from database.",
@@ -78,7 +264,51 @@ class BreadSegment(MethodView):
         bread.currency = bread_data["currency"]
         bread.gluten_free = bread_data["gluten_free"]
 
-        db.session.add(bread)
-        db.session.commit()
+        try:
+            db.session.add(bread)
+            db.session.commit()
+        except StaleDataError:
+            # The version counter of the bread changed since it was loaded.
+            db.session.rollback()
+            abort(409, message="The bread was changed by another request, try again.")
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while updating the bread.")
+
+        return bread
+
+    @jwt_required()
+    @blp_breads.arguments(BreadUpdateSchema)
+    @blp_breads.response(200, BreadSchema)
+    def patch(self, bread_data: Dict[str, int | float | str | bool], uid: int) -> Any:
+        """
+        Update the given fields of the bread with a single UPDATE, without loading it first.
+        Admin rights required.
+        """
+        if not get_jwt().get("is_admin"):
+            abort(401, message="Admin rights required.")
+
+        if not bread_data:
+            abort(400, message="Nothing to update.")
+
+        breads = BreadModel.__table__
+        statement = (
+            update(breads)
+            .where(breads.c.id == uid)
+            .values(**bread_data, version_id=breads.c.version_id + 1)
+            .returning(*(column for column in breads.c if column.key != "info"))
+        )
+        try:
+            bread = db.session.execute(statement).first()
+            if bread is None:
+                abort(404, message="Bread not found.")
+            # The UPDATE bypasses the unit of work, so caches are invalidated by hand.
+            ChangeStampModel.touch(
+                db.session, [BreadModel.__tablename__], [f"{BreadModel.__tablename__}:{uid}"]
+            )
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while updating the bread.")
 
         return bread
@@ -0,0 +1,29 @@
+from typing import Any, Dict
+
+from flask import current_app
+from flask.views import MethodView
+from flask_jwt_extended import get_jwt, jwt_required
+from flask_smorest import Blueprint, abort
+
+from db import db
+from models.job_outbox_model import JobOutboxModel
+
+blp_metrics = Blueprint("Metrics", "metrics", description="Operational metrics of this worker.")
+
+
+@blp_metrics.route("/metrics/outbox")
+class OutboxMetrics(MethodView):
+    @jwt_required()
+    def get(self) -> Dict[str, Any]:
+        """
+        Get the job outbox metrics of the worker process serving the request:
+        buffer depth, flush counts and latencies, and jobs waiting in the database outbox.
+        """
+        jwt: dict[str, bool | str | int] = get_jwt()
+
+        if not jwt.get("is_admin"):
+            abort(401, message="Admin rights required.")
+
+        metrics: Dict[str, Any] = current_app.extensions["outbox"].metrics()
+        metrics["stored_waiting"] = db.session.query(JobOutboxModel.id).count()
+        return metrics
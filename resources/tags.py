@@ -1,14 +1,24 @@
 from typing import Any, Dict, List
 
 from flask.views import MethodView
+from flask_jwt_extended import jwt_required
 from flask_smorest import Blueprint, abort
+from sqlalchemy import literal, select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
 
+from cache_extension import response_cache
 from db import db
 from models.bakery_model import BakeryModel
 from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.change_stamp_model import ChangeStampModel
 from models.tag_model import TagModel
-from schemas import TagAndBreadSchema, TagSchema
+from schemas import (BreadTagsBatchSchema, TagAndBreadSchema,
+                     TagQueryArgsSchema, TagSchema)
+from utilities.etag import set_collection_etag, set_row_etag
+from utilities.loading import shape_query
+from utilities.routing import read_replica
 
 blp_tags = Blueprint("Tags", "tags", description="Operations on tags.")
 
@@ -17,11 +27,17 @@ blp_tags = Blueprint("Tags", "tags", description="Operations on tags.")
 class TagsInBakery(MethodView):
     """Segment related to the requested bakery tags."""
 
+    @read_replica
+    @response_cache.cached(TagModel, depends_on=["all_bakeries"])
+    @blp_tags.etag
+    @blp_tags.arguments(TagQueryArgsSchema, location="query")
     @blp_tags.response(200, TagSchema(many=True))
-    def get(self, bakery_id: int) -> List[TagModel]:
+    def get(self, query_args: Dict[str, Any], bakery_id: int) -> List[TagModel]:
         """Get all tags of the requested bakery."""
-        bakery = BakeryModel.query.get_or_404(bakery_id)
-        all_tags: List[TagModel] = bakery.tags.all()
+        BakeryModel.query.get_or_404(bakery_id)
+        set_collection_etag(blp_tags, TagModel, query_args["expand"])
+        query = shape_query(TagModel.query, TagModel, query_args)
+        all_tags: List[TagModel] = query.filter_by(bakery_id=bakery_id).all()
         return all_tags
 
     @blp_tags.arguments(TagSchema)
@@ -47,10 +63,16 @@ class TagsInBakery(MethodView):
 class Tag(MethodView):
     """Segment related to the requested bakery tags."""
 
+    @read_replica
+    @response_cache.cached(TagModel, id_arg="tag_id")
+    @blp_tags.etag
+    @blp_tags.arguments(TagQueryArgsSchema, location="query")
     @blp_tags.response(201, TagSchema)
-    def get(self, tag_id: int) -> TagModel:
+    def get(self, query_args: Dict[str, Any], tag_id: int) -> TagModel:
         """Get the requested tag."""
-        tag: TagModel = TagModel.query.get_or_404(tag_id)
+        query = shape_query(TagModel.query, TagModel, query_args)
+        tag: TagModel = query.get_or_404(tag_id)
+        set_row_etag(blp_tags, tag, query_args["expand"])
         return tag
 
     @blp_tags.response(
@@ -67,9 +89,13 @@ class Tag(MethodView):
         """Delete the requested tag itself if it is not associated with any breads."""
         tag = TagModel.query.get_or_404(tag_id)
 
-        if not tag.breads:
-            db.session.delete(tag)
-            db.session.commit()
+        if not BreadsTagsModel.is_tag_linked(tag_id):
+            try:
+                db.session.delete(tag)
+                db.session.commit()
+            except StaleDataError:
+                db.session.rollback()
+                abort(409, message="The tag was changed by another request, try again.")
             return {"message": "Tag deleted successfully."}
         abort(
             400,
@@ -84,17 +110,21 @@ class LinkTagsToItem(MethodView):
     @blp_tags.response(201, TagSchema)
     def post(self, bread_id: int, tag_id: int) -> TagModel:
         """Add a tag to a bread."""
-        bread = BreadModel.query.get_or_404(bread_id)
+        BreadModel.query.get_or_404(bread_id)
         tag: TagModel = TagModel.query.get_or_404(tag_id)
 
-        bread.tags.append(tag)
-
         try:
-            db.session.add(bread)
+            # A pair that is already linked inserts nothing, even under concurrent requests.
+            linked = BreadsTagsModel.link_pairs([(bread_id, tag_id)])
+            if linked:
+                ChangeStampModel.touch(db.session, [BreadsTagsModel.__tablename__])
             db.session.commit()
         except SQLAlchemyError:
+            db.session.rollback()
             abort(500, message="An error occurred while inserting the tag.")
 
+        if not linked:
+            abort(400, message="Bread is already tagged with that tag.")
         return tag
 
     @blp_tags.response(200, TagAndBreadSchema)
@@ -113,3 +143,72 @@ class LinkTagsToItem(MethodView):
             abort(500, message="An error occurred while deleting the tag.")
 
         return {"message": "Bread removed from tag", "bread": bread, "tag": tag}
+
+
+@blp_tags.route("/breads/tags")
+class BatchTagsOfBreads(MethodView):
+    """
+    Linking and unlinking many breads and tags at once,
+    either as explicit pairs or as one tag for every bread matching a filter.
+    """
+
+    @jwt_required()
+    @blp_tags.arguments(BreadTagsBatchSchema)
+    def put(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Tag breads. Pairs that are already linked or refer to missing rows are skipped."""
+        if "pairs" in batch:
+            requested = {(pair["bread_id"], pair["tag_id"]) for pair in batch["pairs"]}
+            bread_ids = set(
+                db.session.execute(
+                    select(BreadModel.id).where(BreadModel.id.in_({b for b, _ in requested}))
+                ).scalars()
+            )
+            tag_ids = set(
+                db.session.execute(
+                    select(TagModel.id).where(TagModel.id.in_({t for _, t in requested}))
+                ).scalars()
+            )
+            pairs = [(b, t) for b, t in requested if b in bread_ids and t in tag_ids]
+            linked = self._apply(lambda: BreadsTagsModel.link_pairs(pairs))
+        else:
+            TagModel.query.get_or_404(batch["tag_id"])
+            source = select(BreadModel.id, literal(batch["tag_id"])).where(
+                *BreadModel.filter_conditions(batch["filter"])
+            )
+            linked = self._apply(lambda: BreadsTagsModel.link_selected(source))
+
+        return {"message": f"{linked} breads tagged.", "linked": linked}
+
+    @jwt_required()
+    @blp_tags.arguments(BreadTagsBatchSchema)
+    def delete(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Untag breads."""
+        if "pairs" in batch:
+            conditions = [
+                tuple_(BreadsTagsModel.bread_id, BreadsTagsModel.tag_id).in_(
+                    [(pair["bread_id"], pair["tag_id"]) for pair in batch["pairs"]]
+                )
+            ]
+        else:
+            conditions = [
+                BreadsTagsModel.tag_id == batch["tag_id"],
+                BreadsTagsModel.bread_id.in_(
+                    select(BreadModel.id).where(*BreadModel.filter_conditions(batch["filter"]))
+                ),
+            ]
+
+        unlinked = self._apply(lambda: BreadsTagsModel.unlink(*conditions))
+        return {"message": f"{unlinked} breads untagged.", "unlinked": unlinked}
+
+    @staticmethod
+    def _apply(statement: Any) -> int:
+        try:
+            count: int = statement()
+            if count:
+                # Set-based statements bypass the unit of work, so caches are invalidated by hand.
+                ChangeStampModel.touch(db.session, [BreadsTagsModel.__tablename__])
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            abort(500, message="An error occurred while updating tags of breads.")
+        return count
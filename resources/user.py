@@ -1,35 +1,21 @@
-import os
 from typing import Any, Dict, Tuple
 
-import redis
-from dotenv import load_dotenv
 from flask.views import MethodView
 from flask_jwt_extended import (create_access_token, create_refresh_token,
                                 get_jwt, get_jwt_identity, jwt_required)
 from flask_smorest import Blueprint, abort
-from passlib.hash import pbkdf2_sha256
-from rq.queue import Queue
 from sqlalchemy import or_
 
 from db import db
-from emails import send_user_registration_email
 from models.user_model import UserModel
 from schemas import UserRegisterSchema, UserSchema
-from utilities.token import add_token_to_database, revoke_jti_token
-
-load_dotenv()
+from utilities.outbox import enqueue_job
+from utilities.passwords import (PasswordHasherBusy, hash_password,
+                                 verify_password)
+from utilities.token import revoke_all_user_tokens, revoke_token
 
 blp_users = Blueprint("Users", "users", description="Operations in users.")
 
-url = os.getenv("REDIS_URL")
-
-if url is None:
-    raise ValueError("Redis url must not be None.")
-
-connection = redis.from_url(url)  # Get this from Render.com or run in Docker
-
-queue = Queue("emails", connection=connection)
-
 
 @blp_users.route("/register")
 class UserRegister(MethodView):
@@ -44,16 +30,22 @@ class UserRegister(MethodView):
         ).first():
             abort(409, message="A user with that username or email already exists.")
 
+        try:
+            password_hash = hash_password(user_data["password"])
+        except PasswordHasherBusy:
+            abort(503, message="Server is busy, try again later.", headers={"Retry-After": "1"})
+
         user = UserModel(
             username=user_data["username"],
-            password=pbkdf2_sha256.hash(user_data["password"]),
+            password=password_hash,
             email=user_data["email"],
         )
 
         db.session.add(user)
         db.session.commit()
 
-        queue.enqueue(send_user_registration_email, user.email, user.username)
+        # Referenced by name, web workers do not import the email client.
+        enqueue_job("emails", "emails.queue_registration_email", user.email, user.username)
 
         return {"message": "User created successfully."}, 201
 
@@ -68,20 +60,30 @@ class UserLogin(MethodView):
 
         user = UserModel.query.filter(UserModel.username == username).first()
 
-        if user and pbkdf2_sha256.verify(password, user.password):
-            access_token = create_access_token(identity=user.id, fresh=True)
-            refresh_token = create_refresh_token(identity=user.id)
+        if user is None:
+            abort(401, message="Invalid credentials.")
+
+        try:
+            valid, new_hash = verify_password(password, user.password)
+        except PasswordHasherBusy:
+            abort(503, message="Server is busy, try again later.", headers={"Retry-After": "1"})
+
+        if not valid:
+            abort(401, message="Invalid credentials.")
 
-            add_token_to_database(access_token)
-            add_token_to_database(refresh_token)
+        # The stored hash uses outdated work factors, replace it while the password is known.
+        if new_hash is not None:
+            user.password = new_hash
+            db.session.commit()
 
-            return {
-                    "access_token": access_token,
-                    "refresh_token": refresh_token,
-                    "message": "Successfully logged in. Access token created.",
-                    }, 200
+        access_token = create_access_token(identity=user.id, fresh=True)
+        refresh_token = create_refresh_token(identity=user.id)
 
-        abort(401, message="Invalid credentials.")
+        return {
+                "access_token": access_token,
+                "refresh_token": refresh_token,
+                "message": "Successfully logged in. Access token created.",
+                }, 200
 
 
 @blp_users.route("/refresh")
@@ -89,7 +91,6 @@ class TokenRefresh(MethodView):
     @jwt_required(refresh=True)  # type: ignore
     def post(self) -> Tuple[Dict[str, str], int]:
         new_access_token = create_access_token(identity=get_jwt_identity())
-        add_token_to_database(new_access_token)
         return {
             "access_token": new_access_token,
             "message": "New access token created.",
@@ -103,10 +104,7 @@ class UserLogout(MethodView):
         """
         Log out the user.
         """
-        payload = get_jwt()
-        jti = payload["jti"]
-        user_identity = payload["sub"]
-        revoke_jti_token(jti, user_identity)
+        revoke_token(get_jwt())
         return {"message": "Successfully logged out. JWT revoked."}, 200
 
 
@@ -128,3 +126,19 @@ class User(MethodView):
         db.session.delete(user)
         db.session.commit()
         return {"message": "User deleted."}, 200
+
+
+@blp_users.route("/user/<int:user_id>/tokens")
+class UserTokens(MethodView):
+    @jwt_required()  # type: ignore
+    def delete(self, user_id: int) -> Tuple[Dict[str, str], int]:
+        """
+        Revoke all tokens issued to the user so far.
+        Admin rights required.
+        """
+        if not get_jwt().get("is_admin"):
+            abort(401, message="Admin rights required.")
+
+        user = UserModel.query.get_or_404(user_id)
+        revoke_all_user_tokens(user)
+        return {"message": "All tokens of the user revoked."}, 200
@@ -1,4 +1,54 @@
-from marshmallow import Schema, fields
+from typing import Any, Dict
+
+from marshmallow import (Schema, ValidationError, fields, missing, validate,
+                         validates_schema)
+from webargs.fields import DelimitedList
+
+from utilities.loading import is_expanded, requested_fields
+from utilities.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+class ExpandableMixin:
+    """
+    Nested field that is dumped only if the client asked for it with `?expand=`.
+    The relationship is not even accessed otherwise, so nothing is lazy loaded.
+    """
+
+    def serialize(self, attr: str, obj: Any, accessor: Any = None, **kwargs: Any) -> Any:
+        if not is_expanded(attr):
+            return missing
+        return super().serialize(attr, obj, accessor, **kwargs)  # type: ignore
+
+
+class ExpandableNested(ExpandableMixin, fields.Nested):
+    pass
+
+
+class ExpandableList(ExpandableMixin, fields.List):
+    pass
+
+
+class DeferredStr(fields.Str):
+    """
+    Large text field that is dumped only if the client named it in `?fields=`.
+    """
+
+    def serialize(self, attr: str, obj: Any, accessor: Any = None, **kwargs: Any) -> Any:
+        if attr not in (requested_fields() or ()):
+            return missing
+        return super().serialize(attr, obj, accessor, **kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    Schema that dumps only the fields requested with `?fields=`.
+    """
+
+    def dump(self, obj: Any, *, many: bool | None = None) -> Any:
+        only = requested_fields()
+        if only is None or self.only is not None:  # type: ignore
+            return super().dump(obj, many=many)  # type: ignore
+        return type(self)(only=only, many=self.many).dump(obj, many=many)  # type: ignore
 
 
 class TemplateBreadSchema(Schema):
@@ -20,21 +70,22 @@ class TemplateTagSchema(Schema):
     name = fields.Str()
 
 
-class BreadSchema(TemplateBreadSchema):
+class BreadSchema(SparseFieldsMixin, TemplateBreadSchema):
+    info = DeferredStr()
     bakery_id = fields.Int(required=True, load_only=True)
-    bakery = fields.Nested(TemplateBakerySchema(), dump_only=True)
-    tags = fields.List(fields.Nested(TemplateTagSchema()), dump_only=True)
+    bakery = ExpandableNested(TemplateBakerySchema(), dump_only=True)
+    tags = ExpandableList(fields.Nested(TemplateTagSchema()), dump_only=True)
 
 
-class BakerySchema(TemplateBakerySchema):
-    breads = fields.List(fields.Nested(TemplateBreadSchema()), dump_only=True)
-    tags = fields.List(fields.Nested(TemplateTagSchema()), dump_only=True)
+class BakerySchema(SparseFieldsMixin, TemplateBakerySchema):
+    breads = ExpandableList(fields.Nested(TemplateBreadSchema()), dump_only=True)
+    tags = ExpandableList(fields.Nested(TemplateTagSchema()), dump_only=True)
 
 
-class TagSchema(TemplateTagSchema):
+class TagSchema(SparseFieldsMixin, TemplateTagSchema):
     bakery_id = fields.Int(load_only=True)
-    breads = fields.List(fields.Nested(TemplateBreadSchema()), dump_only=True)
-    bakery = fields.Nested(TemplateBakerySchema(), dump_only=True)
+    breads = ExpandableList(fields.Nested(TemplateBreadSchema()), dump_only=True)
+    bakery = ExpandableNested(TemplateBakerySchema(), dump_only=True)
 
 
 class TagAndBreadSchema(Schema):
@@ -62,3 +113,168 @@ class UserRegisterSchema(UserSchema):
 
 class TokenBlocklistSchema(UserSchema):
     pass
+
+
+class PaginationArgsSchema(Schema):
+    limit = fields.Int(
+        load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE)
+    )
+    after = fields.Str()
+
+
+class BreadQueryArgsSchema(Schema):
+    expand = DelimitedList(
+        fields.Str(validate=validate.OneOf(["bakery", "tags"])), load_default=[]
+    )
+    field_names = DelimitedList(
+        fields.Str(
+            validate=validate.OneOf(
+                ["id", "name", "price", "currency", "gluten_free", "info", "bakery", "tags"]
+            )
+        ),
+        data_key="fields",
+        load_default=[],
+    )
+
+
+class BakeryQueryArgsSchema(Schema):
+    expand = DelimitedList(
+        fields.Str(validate=validate.OneOf(["breads", "tags"])), load_default=[]
+    )
+    field_names = DelimitedList(
+        fields.Str(validate=validate.OneOf(["id", "name", "address", "breads", "tags"])),
+        data_key="fields",
+        load_default=[],
+    )
+
+
+class TagQueryArgsSchema(Schema):
+    expand = DelimitedList(
+        fields.Str(validate=validate.OneOf(["bakery", "breads"])), load_default=[]
+    )
+    field_names = DelimitedList(
+        fields.Str(validate=validate.OneOf(["id", "name", "bakery", "breads"])),
+        data_key="fields",
+        load_default=[],
+    )
+
+
+class BreadFilterSchema(Schema):
+    price_min = fields.Float()
+    price_max = fields.Float()
+    gluten_free = fields.Bool()
+    currency = fields.Str()
+    bakery_id = fields.Int()
+    tags_all = fields.List(fields.Int())
+    tags_any = fields.List(fields.Int())
+
+
+class BreadListArgsSchema(BreadFilterSchema, PaginationArgsSchema, BreadQueryArgsSchema):
+    tags_all = DelimitedList(fields.Int())
+    tags_any = DelimitedList(fields.Int())
+    sort = DelimitedList(
+        fields.Str(
+            validate=validate.OneOf(["id", "-id", "name", "-name", "price", "-price"])
+        ),
+        load_default=[],
+    )
+
+
+class BreadSearchArgsSchema(BreadQueryArgsSchema):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+    limit = fields.Int(
+        load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE)
+    )
+
+
+class CatalogRecordSchema(Schema):
+    bakery = fields.Str(required=True, validate=validate.Length(min=1, max=40))
+    bakery_address = fields.Str(required=True, validate=validate.Length(min=1, max=80))
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=50))
+    price = fields.Float(required=True)
+    currency = fields.Str(required=True, validate=validate.Length(equal=3))
+    gluten_free = fields.Bool(required=True)
+    info = fields.Str(allow_none=True, load_default=None)
+    tags = fields.List(fields.Str(validate=validate.Length(min=1, max=30)), load_default=[])
+
+
+class BreadTagPairSchema(Schema):
+    bread_id = fields.Int(required=True)
+    tag_id = fields.Int(required=True)
+
+
+class BreadTagsBatchSchema(Schema):
+    """
+    Either explicit bread and tag pairs, or one tag and a filter selecting the breads.
+    """
+
+    pairs = fields.List(
+        fields.Nested(BreadTagPairSchema()), validate=validate.Length(min=1, max=10000)
+    )
+    tag_id = fields.Int()
+    filter = fields.Nested(BreadFilterSchema())
+
+    @validates_schema
+    def validate_target(self, data: Dict[str, Any], **kwargs: Any) -> None:
+        if ("pairs" in data) == ("tag_id" in data or "filter" in data):
+            raise ValidationError("Provide either pairs, or tag_id together with filter.")
+        if "pairs" not in data and not ("tag_id" in data and "filter" in data):
+            raise ValidationError("tag_id and filter have to be provided together.")
+
+
+class BakeryBreadFilterSchema(BreadFilterSchema):
+    class Meta:
+        exclude = ("bakery_id",)
+
+
+class PriceChangeSchema(Schema):
+    """
+    New price as an absolute value, an amount to add or a percentage change,
+    optionally rounded to the nearest multiple of round_to, for every bread matching filter.
+    """
+
+    set = fields.Float(validate=validate.Range(min=0))
+    add = fields.Float()
+    percent = fields.Float(validate=validate.Range(min=-100))
+    round_to = fields.Float(validate=validate.Range(min=0, min_inclusive=False))
+    filter = fields.Nested(BakeryBreadFilterSchema(), load_default={})
+
+    @validates_schema
+    def validate_change(self, data: Dict[str, Any], **kwargs: Any) -> None:
+        changes = [name for name in ("set", "add", "percent") if name in data]
+        if len(changes) > 1:
+            raise ValidationError("Provide only one of set, add and percent.")
+        if not changes and "round_to" not in data:
+            raise ValidationError("Provide one of set, add, percent or round_to.")
+
+
+class BreadExportArgsSchema(Schema):
+    format = fields.Str(load_default="ndjson", validate=validate.OneOf(["ndjson", "csv"]))
+
+
+class BulkCreateArgsSchema(Schema):
+    skip_invalid = fields.Bool(load_default=False)
+
+
+class BakeryDeleteArgsSchema(Schema):
+    ids = DelimitedList(fields.Int(), required=True, validate=validate.Length(min=1, max=1000))
+
+
+class BakeryListArgsSchema(PaginationArgsSchema, BakeryQueryArgsSchema):
+    pass
+
+
+class PriceStatsSchema(Schema):
+    currency = fields.Str(dump_only=True)
+    bread_count = fields.Int(dump_only=True)
+    price_min = fields.Float(dump_only=True)
+    price_max = fields.Float(dump_only=True)
+    price_avg = fields.Float(dump_only=True)
+
+
+class BakeryStatsSchema(Schema):
+    bakery_id = fields.Int(dump_only=True)
+    bread_count = fields.Int(dump_only=True)
+    gluten_free_count = fields.Int(dump_only=True)
+    tag_count = fields.Int(dump_only=True)
+    prices = fields.List(fields.Nested(PriceStatsSchema()), dump_only=True)
@@ -2,6 +2,7 @@ import os
 
 from dotenv import load_dotenv
 
+# The only place .env is loaded, every module reading the environment imports settings.
 load_dotenv()
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
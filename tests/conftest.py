@@ -0,0 +1,69 @@
+import os
+from typing import Callable, Dict, Iterator
+
+# Tests run without Redis: clients fail fast and every component falls back to the database.
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1")
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "memory")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "1000")
+
+import pytest  # noqa: E402
+from flask import Flask  # noqa: E402
+from flask.testing import FlaskClient  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import create_app  # noqa: E402
+from db import db  # noqa: E402
+from models.user_model import UserModel  # noqa: E402
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--benchmarks", action="store_true", help="Also run the benchmarks marked benchmark."
+    )
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list) -> None:
+    if config.getoption("--benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def report(capsys: pytest.CaptureFixture) -> Callable[[str], None]:
+    """
+    Prints a benchmark result to the terminal, also when output capturing is on.
+    """
+
+    def write(line: str) -> None:
+        with capsys.disabled():
+            print(f"\n{line}")
+
+    return write
+
+
+@pytest.fixture
+def app() -> Iterator[Flask]:
+    app = create_app("sqlite://")
+    with app.app_context():
+        db.metadata.create_all(db.engine)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app: Flask) -> Dict[str, str]:
+    # The first user is the admin, see jwt_extension.add_claims_to_jwt.
+    admin = UserModel(username="admin", password="unused", email="admin@example.com")
+    db.session.add(admin)
+    db.session.commit()
+    token = create_access_token(identity=admin.id, fresh=True)
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,282 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from werkzeug.datastructures import Headers
+from werkzeug.wrappers import Response
+
+import resources.async_views
+from asgi import AsyncApp, create_asgi_app
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.tag_model import TagModel
+from models.user_model import UserModel
+
+ASYNC_BENCHMARK_REQUESTS = int(os.getenv("ASYNC_BENCHMARK_REQUESTS", 2_000))
+ASYNC_BENCHMARK_CONCURRENCY = int(os.getenv("ASYNC_BENCHMARK_CONCURRENCY", 32))
+
+
+class AsgiClient:
+    """
+    Sends requests to the ASGI app on an event loop of its own.
+    """
+
+    def __init__(self, asgi_app: AsyncApp) -> None:
+        self.asgi_app = asgi_app
+        self.loop = asyncio.new_event_loop()
+
+    def get(self, path: str, headers: Dict[str, str] | None = None) -> Response:
+        return self.loop.run_until_complete(self.request("GET", path, headers))
+
+    def head(self, path: str, headers: Dict[str, str] | None = None) -> Response:
+        return self.loop.run_until_complete(self.request("HEAD", path, headers))
+
+    async def request(
+        self, method: str, path: str, headers: Dict[str, str] | None = None
+    ) -> Response:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "root_path": "",
+            "query_string": query.encode(),
+            "headers": [
+                (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+            ],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        messages: List[Dict[str, Any]] = []
+
+        async def receive() -> Dict[str, Any]:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Dict[str, Any]) -> None:
+            messages.append(message)
+
+        await self.asgi_app(scope, receive, send)
+        response = Response(messages[1]["body"], status=messages[0]["status"])
+        # Headers as sent, the Content-Length of a HEAD response is not the one of its body.
+        response.headers = Headers(
+            [(name.decode(), value.decode()) for name, value in messages[0]["headers"]]
+        )
+        return response
+
+    def close(self) -> None:
+        for engine in self.asgi_app.engines.values():
+            self.loop.run_until_complete(engine.dispose())
+        self.loop.close()
+
+
+def create_asgi_client(database: Path) -> Iterator[AsgiClient]:
+    asgi_app = create_asgi_app(f"sqlite:///{database}")
+    client = AsgiClient(asgi_app)
+    with asgi_app.flask_app.app_context():
+        db.metadata.create_all(db.engine)
+        yield client
+        db.session.remove()
+    client.close()
+
+
+@pytest.fixture
+def asgi_client(tmp_path: Path) -> Iterator[AsgiClient]:
+    yield from create_asgi_client(tmp_path / "data.db")
+
+
+@pytest.fixture
+def replicated_asgi_client(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[AsgiClient]:
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'replica.db'}")
+    yield from create_asgi_client(tmp_path / "data.db")
+
+
+@pytest.fixture
+def headers(asgi_client: AsgiClient) -> Dict[str, str]:
+    admin = UserModel(username="admin", password="unused", email="admin@example.com")
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=admin.id)}"}
+
+
+def add_catalog(bread_count: int = 3) -> None:
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.flush()
+    db.session.add_all(
+        BreadModel(
+            name=f"Bread {index}",
+            price=2.0,
+            currency="EUR",
+            gluten_free=False,
+            bakery_id=bakery.id,
+        )
+        for index in range(bread_count)
+    )
+    db.session.add(TagModel(name="dark", bakery_id=bakery.id))
+    db.session.commit()
+
+
+def test_async_endpoints_answer_like_the_sync_ones(
+    asgi_client: AsgiClient, headers: Dict[str, str]
+) -> None:
+    add_catalog()
+    flask_app = asgi_client.asgi_app.flask_app
+    flask_app.extensions["response_cache"] = None
+    sync_client = flask_app.test_client()
+
+    for path in [
+        "/breads?limit=2",
+        "/breads?limit=2&after=2",
+        "/breads/1?expand=bakery,tags",
+        "/bakeries?expand=breads",
+        "/bakeries/1",
+        "/bakeries/1/tag",
+        "/tag/1",
+        "/breads/99",
+    ]:
+        expected = sync_client.get(path, headers=headers)
+        response = asgi_client.get(path, headers)
+
+        assert response.status_code == expected.status_code, path
+        assert response.get_json() == expected.get_json(), path
+        assert response.headers.get("ETag") == expected.headers.get("ETag"), path
+        assert response.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+
+
+def test_not_modified_and_head_requests_have_no_body(asgi_client: AsgiClient) -> None:
+    add_catalog()
+
+    response = asgi_client.get("/bakeries")
+    not_modified = asgi_client.get("/bakeries", {"If-None-Match": response.headers["ETag"]})
+    head = asgi_client.head("/bakeries")
+
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b""
+    assert head.status_code == 200
+    assert head.get_data() == b""
+    assert head.headers["Content-Length"] == response.headers["Content-Length"]
+
+
+def test_async_responses_are_cached_until_a_commit(asgi_client: AsgiClient) -> None:
+    add_catalog()
+    selects: List[str] = []
+
+    def record(connection: object, cursor: object, statement: str, *args: object) -> None:
+        if "FROM all_bakeries" in statement:
+            selects.append(statement)
+
+    event.listen(asgi_client.asgi_app.engines[None].sync_engine, "before_cursor_execute", record)
+    asgi_client.get("/bakeries")
+    cached = asgi_client.get("/bakeries")
+    selected = len(selects)
+    db.session.get(BakeryModel, 1).name = "Rise"
+    db.session.commit()
+    changed = asgi_client.get("/bakeries")
+
+    assert selected == 1
+    assert cached.get_json()[0]["name"] == "Crumb"
+    assert changed.get_json()[0]["name"] == "Rise"
+
+
+def test_jwt_is_verified_off_the_event_loop(
+    asgi_client: AsgiClient, headers: Dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    threads: List[int] = []
+    verify = resources.async_views.verify_jwt_in_request
+
+    def record_thread() -> Any:
+        threads.append(threading.get_ident())
+        return verify()
+
+    monkeypatch.setattr(resources.async_views, "verify_jwt_in_request", record_thread)
+
+    assert asgi_client.get("/breads").status_code == 401
+    assert asgi_client.get("/breads", headers).status_code == 200
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+def test_reads_go_to_a_replica_and_fall_back_to_the_primary(
+    replicated_asgi_client: AsgiClient,
+) -> None:
+    asgi_client = replicated_asgi_client
+    flask_app = asgi_client.asgi_app.flask_app
+    flask_app.extensions["response_cache"] = None
+    db.session.add(BakeryModel(name="Primary", address="1 Flour Street"))
+    db.session.commit()
+    replica = db.engines["replica_0"]
+    db.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(BakeryModel.__table__.insert(), {"name": "Replica", "address": "-"})
+
+    from_replica = asgi_client.get("/bakeries")
+    db.metadata.drop_all(replica)
+    from_primary = asgi_client.get("/bakeries")
+
+    assert [bakery["name"] for bakery in from_replica.get_json()] == ["Replica"]
+    assert [bakery["name"] for bakery in from_primary.get_json()] == ["Primary"]
+    assert flask_app.extensions["replicas"].pick() is None
+
+
+@pytest.mark.benchmark
+def test_concurrent_read_throughput(tmp_path: Path, report: Callable[[str], None]) -> None:
+    """
+    Requests per second of ASYNC_BENCHMARK_REQUESTS pages of breads read by
+    ASYNC_BENCHMARK_CONCURRENCY concurrent clients, from the sync app on as many threads
+    as gunicorn's gthread workers do and from the async app on one event loop.
+    The response cache is off, so every request reads the database.
+    """
+    for asgi_client in create_asgi_client(tmp_path / "data.db"):
+        flask_app = asgi_client.asgi_app.flask_app
+        flask_app.extensions["response_cache"] = None
+        add_catalog(500)
+        db.session.add(UserModel(username="admin", password="unused", email="a@example.com"))
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1)}"}
+        per_client = ASYNC_BENCHMARK_REQUESTS // ASYNC_BENCHMARK_CONCURRENCY
+        path = "/breads?limit=20&expand=bakery"
+
+        def read_sync() -> List[int]:
+            client = flask_app.test_client()
+            return [client.get(path, headers=headers).status_code for _ in range(per_client)]
+
+        async def read_async() -> List[int]:
+            return [
+                (await asgi_client.request("GET", path, headers)).status_code
+                for _ in range(per_client)
+            ]
+
+        async def read_all_async() -> List[List[int]]:
+            return await asyncio.gather(
+                *(read_async() for _ in range(ASYNC_BENCHMARK_CONCURRENCY))
+            )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(ASYNC_BENCHMARK_CONCURRENCY) as executor:
+            sync_statuses = list(
+                executor.map(lambda _: read_sync(), range(ASYNC_BENCHMARK_CONCURRENCY))
+            )
+        sync_rate = per_client * ASYNC_BENCHMARK_CONCURRENCY / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        async_statuses = asgi_client.loop.run_until_complete(read_all_async())
+        async_rate = per_client * ASYNC_BENCHMARK_CONCURRENCY / (time.perf_counter() - start)
+
+        report(
+            f"{ASYNC_BENCHMARK_CONCURRENCY} concurrent clients reading {path}: "
+            f"sync {sync_rate:.0f} requests/s, async {async_rate:.0f} requests/s"
+        )
+        assert {status for statuses in sync_statuses + async_statuses for status in statuses} == {
+            200
+        }
@@ -0,0 +1,90 @@
+from typing import Dict, Iterator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from db import db
+from models.bakery_model import BakeryModel, _enforces_foreign_keys
+from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.tag_model import TagModel
+
+
+@pytest.fixture(params=[False, True], ids=["sqlite", "foreign_keys"])
+def foreign_keys(request: pytest.FixtureRequest, app: Flask) -> Iterator[bool]:
+    """
+    Runs a test once as on plain SQLite, and once with foreign keys enforced
+    as on PostgreSQL, where ON DELETE CASCADE removes the links of deleted breads.
+    """
+    if request.param:
+        # Outside of a transaction, the in-memory database keeps its single connection.
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA foreign_keys = ON")
+    assert _enforces_foreign_keys() is request.param
+    yield request.param
+
+
+def add_bakeries() -> None:
+    """
+    Crumb has the breads 1 and 2 and the tag 1, Rise has the bread 3 and the tag 2.
+    Every bread is tagged across bakeries.
+    """
+    db.session.add_all(
+        [
+            BakeryModel(name="Crumb", address="1 Flour Street"),
+            BakeryModel(name="Rise", address="2 Flour Street"),
+        ]
+    )
+    db.session.flush()
+    db.session.add_all(
+        BreadModel(name=name, price=2.0, currency="EUR", gluten_free=False, bakery_id=bakery_id)
+        for name, bakery_id in [("Rye", 1), ("Spelt", 1), ("Wheat", 2)]
+    )
+    db.session.add_all([TagModel(name="dark", bakery_id=1), TagModel(name="sour", bakery_id=2)])
+    db.session.flush()
+    BreadsTagsModel.link_pairs([(1, 1), (3, 1), (1, 2), (3, 2)])
+    db.session.commit()
+
+
+def test_deleting_a_bakery_deletes_its_breads_tags_and_links(
+    client: FlaskClient, admin_headers: Dict[str, str], foreign_keys: bool
+) -> None:
+    add_bakeries()
+    cached = [
+        client.get(path, headers=admin_headers).status_code
+        for path in ("/breads/1", "/tag/1", "/bakeries/1")
+    ]
+
+    response = client.delete("/bakeries/1")
+
+    assert response.status_code == 200
+    assert response.json == {"message": "Bakery deleted", "bakery_name": "Crumb", "bakery_id": 1}
+    assert db.session.execute(select(BakeryModel.id)).scalars().all() == [2]
+    assert db.session.execute(select(BreadModel.id)).scalars().all() == [3]
+    assert db.session.execute(select(TagModel.id)).scalars().all() == [2]
+    links = db.session.execute(select(BreadsTagsModel.bread_id, BreadsTagsModel.tag_id)).all()
+    assert [tuple(link) for link in links] == [(3, 2)]
+    # The cached responses of every deleted row are invalidated.
+    assert cached == [200, 201, 200]
+    for path in ("/breads/1", "/tag/1", "/bakeries/1"):
+        assert client.get(path, headers=admin_headers).status_code == 404, path
+    assert client.delete("/bakeries/1").status_code == 404
+
+
+def test_a_failed_delete_is_rolled_back(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch, foreign_keys: bool
+) -> None:
+    add_bakeries()
+
+    def fail(bakery_ids: object) -> None:
+        db.session.execute(BreadModel.__table__.delete())
+        raise OperationalError("DELETE FROM all_bakeries", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(BakeryModel, "delete_with_children", fail)
+    response = client.delete("/bakeries/1")
+
+    assert response.status_code == 500
+    assert db.session.query(BreadModel).count() == 3
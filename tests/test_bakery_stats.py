@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+
+from flask import Flask
+from flask.testing import FlaskClient
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+
+
+def add_bakeries(count: int) -> List[BakeryModel]:
+    bakeries = [BakeryModel(name=f"Bakery {i}", address=f"{i} Flour Street") for i in range(count)]
+    db.session.add_all(bakeries)
+    db.session.commit()
+    return bakeries
+
+
+def stats(client: FlaskClient, bakery_id: int) -> Dict[str, Any]:
+    response = client.get(f"/bakeries/{bakery_id}/stats")
+    assert response.status_code == 200
+    body: Dict[str, Any] = response.get_json()
+    return body
+
+
+def test_stats_follow_bread_changes(app: Flask, client: FlaskClient) -> None:
+    (bakery,) = add_bakeries(1)
+    breads = [
+        BreadModel(name=name, price=price, currency=currency, gluten_free=gluten_free)
+        for name, price, currency, gluten_free in [
+            ("Rye", 2.0, "EUR", False),
+            ("Corn", 4.0, "EUR", True),
+            ("Bagel", 3.0, "USD", False),
+        ]
+    ]
+    bakery.breads.extend(breads)
+    db.session.add_all(breads)
+    db.session.commit()
+
+    created = stats(client, bakery.id)
+    breads[0].price = 1.0
+    db.session.delete(breads[2])
+    db.session.commit()
+    changed = stats(client, bakery.id)
+
+    assert (created["bread_count"], created["gluten_free_count"]) == (3, 1)
+    assert [price["currency"] for price in created["prices"]] == ["EUR", "USD"]
+    assert created["prices"][0]["price_avg"] == 3.0
+    assert changed["bread_count"] == 2
+    assert changed["prices"] == [
+        {"currency": "EUR", "bread_count": 2, "price_min": 1.0, "price_max": 4.0, "price_avg": 2.5}
+    ]
+
+
+def test_stats_of_a_bakery_without_breads(app: Flask, client: FlaskClient) -> None:
+    (bakery,) = add_bakeries(1)
+
+    assert stats(client, bakery.id)["bread_count"] == 0
+    assert client.get("/bakeries/999/stats").status_code == 404
+
+
+def test_stats_pages(app: Flask, client: FlaskClient) -> None:
+    add_bakeries(5)
+
+    pages = []
+    url = "/bakeries/stats?limit=2"
+    while url:
+        response = client.get(url)
+        assert response.json is not None
+        pages.append([row["bakery_id"] for row in response.json])
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/bakeries/stats?limit=2&after={cursor}" if cursor else ""
+
+    assert pages == [[1, 2], [3, 4], [5]]
@@ -0,0 +1,88 @@
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from flask import Flask
+from sqlalchemy import inspect, select, text
+
+from db import db
+from models.bread_model import BreadModel
+from schemas import BreadListArgsSchema
+from utilities.pagination import keyset_statement
+
+INDEXES = {
+    "ix_all_breads_price",
+    "ix_all_breads_bakery_id_price",
+    "ix_all_breads_currency_price",
+    "ix_all_breads_gluten_free_price",
+}
+MIGRATION = Path(__file__).parent.parent / "migrations" / "versions" / "3f9a6c2e7b41_.py"
+
+
+def query_plan(query_args: Dict[str, str]) -> List[str]:
+    """
+    Returns SQLite's plan of the query GET /breads runs for the given query arguments.
+    """
+    args = BreadListArgsSchema().load(query_args)
+    statement = select(BreadModel).filter(*BreadModel.filter_conditions(args))
+    keys = BreadModel.sort_keys(args["sort"])
+    statement = keyset_statement(statement, keys, args["limit"], None)
+    sql = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+@pytest.mark.parametrize(
+    "query_args, index",
+    [
+        ({"price_min": "1", "price_max": "5"}, "ix_all_breads_price"),
+        ({"bakery_id": "1"}, "ix_all_breads_bakery_id_price"),
+        ({"bakery_id": "1", "price_max": "3"}, "ix_all_breads_bakery_id_price"),
+        ({"currency": "EUR"}, "ix_all_breads_currency_price"),
+        ({"gluten_free": "true"}, "ix_all_breads_gluten_free_price"),
+        ({"gluten_free": "false", "price_min": "2"}, "ix_all_breads_gluten_free_price"),
+    ],
+)
+def test_filters_search_an_index(app: Flask, query_args: Dict[str, str], index: str) -> None:
+    plan = query_plan(query_args)
+
+    assert any(f"SEARCH all_breads USING INDEX {index} " in step for step in plan), plan
+    assert "SCAN all_breads" not in plan
+
+
+@pytest.mark.parametrize(
+    "query_args, index",
+    [
+        ({"sort": "price"}, "ix_all_breads_price"),
+        ({"sort": "-price"}, "ix_all_breads_price"),
+        ({"price_min": "1", "sort": "price"}, "ix_all_breads_price"),
+        ({"bakery_id": "1", "sort": "price"}, "ix_all_breads_bakery_id_price"),
+        ({"bakery_id": "1", "price_min": "1", "sort": "-price"}, "ix_all_breads_bakery_id_price"),
+        ({"currency": "EUR", "sort": "-price"}, "ix_all_breads_currency_price"),
+        ({"gluten_free": "true", "sort": "price"}, "ix_all_breads_gluten_free_price"),
+    ],
+)
+def test_price_sorts_read_an_index_in_order(
+    app: Flask, query_args: Dict[str, str], index: str
+) -> None:
+    plan = query_plan(query_args)
+
+    assert any(f"all_breads USING INDEX {index}" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_migration_creates_the_indexes(app: Flask) -> None:
+    spec = importlib.util.spec_from_file_location("migration_3f9a6c2e7b41", MIGRATION)
+    migration: Any = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(migration)  # type: ignore
+
+    with db.engine.begin() as connection:
+        for name in INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("all_breads")}
+    assert INDEXES <= indexes
@@ -0,0 +1,76 @@
+from typing import List
+
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import select
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.tag_model import TagModel
+
+
+def add_catalog() -> List[int]:
+    """
+    Adds a bakery with three breads and two tags. Returns the ids of the breads.
+    """
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.flush()
+    breads = [
+        BreadModel(name=name, price=1.0, currency="EUR", gluten_free=False, bakery_id=bakery.id)
+        for name in ("Rye", "Spelt", "Wheat")
+    ]
+    db.session.add_all(breads)
+    db.session.add_all([TagModel(name=name, bakery_id=bakery.id) for name in ("dark", "sour")])
+    db.session.commit()
+    return [bread.id for bread in breads]
+
+
+def test_link_pairs_skips_existing_links(app: Flask) -> None:
+    rye, spelt, _ = add_catalog()
+
+    assert BreadsTagsModel.link_pairs([(rye, 1), (spelt, 1)]) == 2
+    assert BreadsTagsModel.link_pairs([(rye, 1), (rye, 2)]) == 1
+    assert not BreadsTagsModel.is_tag_linked(3)
+    assert BreadsTagsModel.is_tag_linked(2)
+
+
+def test_link_selected_and_tag_filters(app: Flask) -> None:
+    rye, spelt, wheat = add_catalog()
+    BreadsTagsModel.link_pairs([(rye, 2)])
+
+    linked = BreadsTagsModel.link_selected(
+        select(BreadModel.id, TagModel.id)
+        .join(TagModel, TagModel.bakery_id == BreadModel.bakery_id)
+        .where(TagModel.name == "dark")
+    )
+
+    assert linked == 3
+    tagged_with_all = db.session.execute(BreadsTagsModel.bread_ids_tagged_with_all([1, 2]))
+    assert tagged_with_all.scalars().all() == [rye]
+    tagged_with_any = db.session.execute(BreadsTagsModel.bread_ids_tagged_with_any([1, 2]))
+    assert sorted(set(tagged_with_any.scalars())) == [rye, spelt, wheat]
+
+
+def test_unlink(app: Flask) -> None:
+    rye, spelt, _ = add_catalog()
+    BreadsTagsModel.link_pairs([(rye, 1), (spelt, 1), (rye, 2)])
+
+    assert BreadsTagsModel.unlink(BreadsTagsModel.tag_id == 1) == 2
+    assert not BreadsTagsModel.is_tag_linked(1)
+    assert BreadsTagsModel.is_tag_linked(2)
+
+
+def test_linking_a_tag_twice_is_rejected(client: FlaskClient) -> None:
+    rye, _, _ = add_catalog()
+
+    first = client.post(f"/breads/{rye}/tag/1")
+    second = client.post(f"/breads/{rye}/tag/1")
+
+    assert first.status_code == 201
+    assert second.status_code == 400
+    assert second.json is not None
+    assert second.json["message"] == "Bread is already tagged with that tag."
+    assert db.session.query(BreadsTagsModel).count() == 1
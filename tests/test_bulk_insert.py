@@ -0,0 +1,121 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.user_model import UserModel
+
+BULK_BENCHMARK_ROWS = int(os.getenv("BULK_BENCHMARK_ROWS", 5_000))
+
+
+def add_bakery() -> int:
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.commit()
+    bakery_id: int = bakery.id
+    return bakery_id
+
+
+def breads(bakery_id: int, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": f"Bread {index}",
+            "price": 1.5,
+            "currency": "EUR",
+            "gluten_free": False,
+            "bakery_id": bakery_id,
+        }
+        for index in range(count)
+    ]
+
+
+def test_bulk_creates_a_json_array(client: FlaskClient, admin_headers: Dict[str, str]) -> None:
+    rows = breads(add_bakery(), 1200)
+
+    response = client.post("/breads/bulk", json=rows, headers=admin_headers)
+
+    assert response.status_code == 201
+    assert response.json is not None and len(response.json["ids"]) == 1200
+    assert db.session.query(BreadModel).count() == 1200
+
+
+def test_bulk_creates_ndjson(client: FlaskClient, admin_headers: Dict[str, str]) -> None:
+    body = "\n".join(json.dumps(row) for row in breads(add_bakery(), 3))
+
+    response = client.post(
+        "/breads/bulk",
+        data=body,
+        headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 201
+    assert db.session.query(BreadModel).count() == 3
+
+
+def test_bulk_creates_nothing_if_a_row_is_invalid(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    rows = breads(add_bakery(), 3)
+    rows[1]["price"] = "free"
+    rows[2]["bakery_id"] = 999
+
+    response = client.post("/breads/bulk", json=rows, headers=admin_headers)
+
+    assert response.status_code == 422
+    assert response.json is not None
+    assert set(response.json["errors"]["json"]) == {"1", "2"}
+    assert db.session.query(BreadModel).count() == 0
+
+
+def test_bulk_skips_invalid_rows_on_request(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    rows = breads(add_bakery(), 3)
+    rows[1]["price"] = "free"
+
+    response = client.post("/breads/bulk?skip_invalid=true", json=rows, headers=admin_headers)
+
+    assert response.status_code == 201
+    assert response.json is not None
+    assert list(response.json["errors"]) == ["1"]
+    assert db.session.query(BreadModel).count() == 2
+
+
+@pytest.mark.benchmark
+def test_bulk_insert_throughput(tmp_path: Path, report: Callable[[str], None]) -> None:
+    """
+    Rows per second created by BULK_BENCHMARK_ROWS POST /breads requests
+    against one POST /breads/bulk request, on a file database.
+    """
+    app = create_app(f"sqlite:///{tmp_path / 'data.db'}")
+    client = app.test_client()
+    with app.app_context():
+        db.metadata.create_all(db.engine)
+        db.session.add(UserModel(username="admin", password="unused", email="a@example.com"))
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1, fresh=True)}"}
+        rows = breads(add_bakery(), BULK_BENCHMARK_ROWS)
+
+    start = time.perf_counter()
+    for row in rows:
+        assert client.post("/breads", json=row, headers=headers).status_code == 201
+    per_row = BULK_BENCHMARK_ROWS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    assert client.post("/breads/bulk", json=rows, headers=headers).status_code == 201
+    bulk = BULK_BENCHMARK_ROWS / (time.perf_counter() - start)
+
+    report(
+        f"inserting {BULK_BENCHMARK_ROWS} breads: per-row POST {per_row:.0f} rows/s, "
+        f"bulk POST {bulk:.0f} rows/s ({bulk / per_row:.0f}x)"
+    )
+    assert bulk > per_row
@@ -0,0 +1,92 @@
+import csv
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from flask import Flask
+from sqlalchemy import event, select
+
+from catalog import CatalogImporter
+from db import db
+from models.bread_model import BreadModel
+from models.bread_tags_model import BreadsTagsModel
+from models.tag_model import TagModel
+
+COLUMNS = ["bakery", "bakery_address", "name", "price", "currency", "gluten_free", "info", "tags"]
+
+
+def record(name: str, price: float = 2.0, tags: List[str] | None = None) -> Dict[str, Any]:
+    return {
+        "bakery": "Crumb",
+        "bakery_address": "1 Flour Street",
+        "name": name,
+        "price": price,
+        "currency": "EUR",
+        "gluten_free": False,
+        "info": None,
+        "tags": tags or [],
+    }
+
+
+def write_csv(path: Path, records: List[Dict[str, Any]]) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, COLUMNS)
+        writer.writeheader()
+        for row in records:
+            writer.writerow({**row, "tags": "|".join(row["tags"]), "info": row["info"] or ""})
+    return str(path)
+
+
+def tagged_breads() -> Set[Tuple[str, str]]:
+    rows = db.session.execute(
+        select(BreadModel.name, TagModel.name)
+        .join(BreadsTagsModel, BreadsTagsModel.bread_id == BreadModel.id)
+        .join(TagModel, TagModel.id == BreadsTagsModel.tag_id)
+    )
+    return {(bread, tag) for bread, tag in rows}
+
+
+def test_import_command_creates_and_updates(app: Flask, tmp_path: Path) -> None:
+    runner = app.test_cli_runner()
+    path = write_csv(
+        tmp_path / "catalog.csv",
+        [record("Rye", tags=["dark", "sour"]), record("Spelt", tags=["dark"])],
+    )
+
+    result = runner.invoke(args=["catalog", "import", path, "--batch-size", "1"])
+    assert result.exit_code == 0, result.output
+    write_csv(tmp_path / "catalog.csv", [record("Rye", price=3.0, tags=["sweet"])])
+    result = runner.invoke(args=["catalog", "import", path])
+    assert result.exit_code == 0, result.output
+
+    prices = dict(db.session.execute(select(BreadModel.name, BreadModel.price)).all())
+    assert prices == {"Rye": 3.0, "Spelt": 2.0}
+    assert tagged_breads() == {
+        ("Rye", "dark"), ("Rye", "sour"), ("Rye", "sweet"), ("Spelt", "dark")
+    }
+    assert not (tmp_path / "catalog.csv.checkpoint").exists()
+
+
+def test_breads_inserted_concurrently_are_not_mistaken_for_imported_ones(app: Flask) -> None:
+    inserted: List[bool] = []
+
+    def insert_same_name_elsewhere(connection: Any, cursor: Any, statement: str, *_: Any) -> None:
+        # Another request adds a bread of the same name right after the import's INSERT.
+        if statement.startswith("INSERT INTO all_breads ") and not inserted:
+            inserted.append(True)
+            connection.exec_driver_sql(
+                "INSERT INTO all_breads (name, price, currency, gluten_free, bakery_id) "
+                "SELECT 'Rye', 1, 'EUR', 0, id FROM all_bakeries"
+            )
+
+    importer = CatalogImporter()
+    event.listen(db.engine, "after_cursor_execute", insert_same_name_elsewhere)
+    try:
+        importer.import_batch([record("Rye", tags=["dark"])])
+    finally:
+        event.remove(db.engine, "after_cursor_execute", insert_same_name_elsewhere)
+
+    imported_id = min(db.session.execute(select(BreadModel.id)).scalars())
+    assert inserted
+    assert list(importer.breads.values()) == [imported_id]
+    linked = db.session.execute(select(BreadsTagsModel.bread_id)).scalars().all()
+    assert linked == [imported_id]
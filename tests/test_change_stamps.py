@@ -0,0 +1,167 @@
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event, update
+from sqlalchemy.exc import OperationalError
+
+import models.change_stamp_model
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.change_stamp_model import ChangeStampModel
+
+
+def stamps() -> Dict[str, int]:
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            db.select(ChangeStampModel.table_name, ChangeStampModel.stamp)
+        )
+        return {table_name: stamp for table_name, stamp in rows}
+
+
+@pytest.fixture
+def failing_bumps(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[int]]:
+    """
+    Makes the next failing_bumps[0] bumps of the change stamps fail.
+    """
+    remaining = [0]
+    bump = ChangeStampModel.bump
+
+    def flaky_bump(connection: Any, table_names: Any) -> None:
+        if remaining[0]:
+            remaining[0] -= 1
+            raise OperationalError("UPDATE change_stamps", {}, Exception("database is locked"))
+        bump(connection, table_names)
+
+    monkeypatch.setattr(ChangeStampModel, "bump", flaky_bump)
+    monkeypatch.setattr(models.change_stamp_model, "CHANGE_STAMP_BUMP_BACKOFF", 0)
+    monkeypatch.setattr(models.change_stamp_model, "_unbumped_tables", set())
+    yield remaining
+
+
+def test_stamps_are_bumped_after_commit(app: Flask) -> None:
+    before = stamps()
+
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.flush()
+    # The writer's transaction leaves the shared stamp rows alone.
+    assert stamps() == before
+    assert db.session.info["changed_tables"] == {"all_bakeries"}
+
+    db.session.commit()
+
+    assert stamps() == {**before, "all_bakeries": before["all_bakeries"] + 1}
+    assert "changed_tables" not in db.session.info
+
+
+def test_rolled_back_changes_do_not_bump_stamps(app: Flask) -> None:
+    before = stamps()
+
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert stamps() == before
+
+
+def test_core_statements_bump_the_touched_tables(app: Flask) -> None:
+    before = stamps()
+
+    ChangeStampModel.touch(db.session, ["all_breads", "all_tags"], ["all_breads:1"])
+    db.session.commit()
+
+    after = stamps()
+    assert after["all_breads"] == before["all_breads"] + 1
+    assert after["all_tags"] == before["all_tags"] + 1
+    assert after["all_bakeries"] == before["all_bakeries"]
+
+
+def test_collection_etag_changes_with_writes(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    first = client.get("/bakeries", headers=admin_headers)
+    unchanged = client.get(
+        "/bakeries", headers={**admin_headers, "If-None-Match": first.headers["ETag"]}
+    )
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.commit()
+    changed = client.get(
+        "/bakeries", headers={**admin_headers, "If-None-Match": first.headers["ETag"]}
+    )
+
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_a_failed_bump_is_retried(app: Flask, failing_bumps: List[int]) -> None:
+    before = stamps()
+    failing_bumps[0] = models.change_stamp_model.CHANGE_STAMP_BUMP_ATTEMPTS - 1
+
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.commit()
+
+    assert stamps()["all_bakeries"] == before["all_bakeries"] + 1
+
+
+def test_stale_stamps_never_answer_not_modified(
+    app: Flask, client: FlaskClient, admin_headers: Dict[str, str], failing_bumps: List[int]
+) -> None:
+    # Without the response cache, which is invalidated on its own, every ETag comes from stamps.
+    app.extensions["response_cache"] = None
+    first = client.get("/bakeries", headers=admin_headers)
+    failing_bumps[0] = models.change_stamp_model.CHANGE_STAMP_BUMP_ATTEMPTS
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.commit()
+
+    lagging = client.get(
+        "/bakeries", headers={**admin_headers, "If-None-Match": first.headers["ETag"]}
+    )
+    again = client.get(
+        "/bakeries", headers={**admin_headers, "If-None-Match": lagging.headers["ETag"]}
+    )
+    db.session.add(BakeryModel(name="Rise", address="2 Flour Street"))
+    db.session.commit()
+
+    assert lagging.status_code == 200 and again.status_code == 200
+    assert lagging.json is not None and len(lagging.json) == 1
+    # The next commit bumps the stamps it missed as well.
+    assert stamps()["all_bakeries"] == 1
+    assert models.change_stamp_model.unbumped_change_stamps(["all_bakeries"]) == set()
+
+
+def test_a_concurrent_update_answers_conflict(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.flush()
+    db.session.add(
+        BreadModel(name="Rye", price=2.0, currency="EUR", gluten_free=False, bakery_id=bakery.id)
+    )
+    db.session.commit()
+
+    def concurrent_update(mapper: Any, connection: Any, target: BreadModel) -> None:
+        # Another request commits its update between loading the bread and flushing this one.
+        breads = BreadModel.__table__
+        connection.execute(
+            update(breads)
+            .where(breads.c.id == target.id)
+            .values(version_id=breads.c.version_id + 1)
+        )
+
+    event.listen(BreadModel, "before_update", concurrent_update)
+    try:
+        response = client.put(
+            "/breads/1",
+            json={"name": "Spelt", "price": 3.0, "currency": "EUR", "gluten_free": False},
+            headers=admin_headers,
+        )
+    finally:
+        event.remove(BreadModel, "before_update", concurrent_update)
+
+    assert response.status_code == 409
+    assert db.session.get(BreadModel, 1).name == "Rye"
@@ -0,0 +1,275 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import parse_qs
+
+import fakeredis
+import pytest
+import requests
+from rq.job import JobStatus
+from rq.queue import Queue
+
+import emails
+
+
+class FakeClock:
+    """
+    Stands in for the time module of emails: sleeping only moves the clock.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Mailgun(ThreadingHTTPServer):
+    """
+    Local stand-in for the Mailgun API answering with the scripted statuses and headers,
+    200 once they run out. Records the form posted and the client port of every request.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), MailgunHandler)
+        self.script: List[Tuple[int, Dict[str, str]]] = []
+        self.requests: List[Tuple[int, Dict[str, List[str]]]] = []
+
+
+class MailgunHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Mailgun
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.server.requests.append((self.client_address[1], parse_qs(body)))
+        status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        payload = json.dumps({"message": "Queued. Thank you."}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(emails, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def mailgun(monkeypatch: pytest.MonkeyPatch, clock: FakeClock) -> Iterator[Mailgun]:
+    server = Mailgun()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01})
+    thread.start()
+    monkeypatch.setattr(emails, "MAILGUN_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    emails.get_http_session.cache_clear()
+    yield server
+    emails.get_http_session().close()
+    emails.get_http_session.cache_clear()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def connection(monkeypatch: pytest.MonkeyPatch) -> Iterator[fakeredis.FakeStrictRedis]:
+    connection = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(emails, "get_redis_connection", lambda: connection)
+    yield connection
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> List[List[Tuple[str, str]]]:
+    batches: List[List[Tuple[str, str]]] = []
+    monkeypatch.setattr(emails, "send_registration_batch", batches.append)
+    return batches
+
+
+def fail_sending(monkeypatch: pytest.MonkeyPatch) -> None:
+    def send(users: List[Tuple[str, str]]) -> None:
+        raise requests.ConnectionError("Mailgun unreachable")
+
+    monkeypatch.setattr(emails, "send_registration_batch", send)
+
+
+def test_registrations_are_sent_by_one_job(
+    connection: fakeredis.FakeStrictRedis, sent: List[List[Tuple[str, str]]]
+) -> None:
+    emails.queue_registration_email("maria@example.com", "maria")
+    emails.queue_registration_email("marie@example.com", "marie")
+    queue = Queue("emails", connection=connection)
+
+    assert len(queue.job_ids) == 1
+    assert emails.send_registration_emails_job() == 2
+    assert sent == [[("maria@example.com", "maria"), ("marie@example.com", "marie")]]
+    assert not connection.exists(emails.REGISTRATION_SCHEDULED)
+
+
+def test_every_send_job_has_an_id_of_its_own(
+    connection: fakeredis.FakeStrictRedis, sent: List[List[Tuple[str, str]]]
+) -> None:
+    queue = Queue("emails", connection=connection)
+
+    emails.queue_registration_email("maria@example.com", "maria")
+    emails.send_registration_emails_job()
+    emails.queue_registration_email("marie@example.com", "marie")
+
+    assert len(set(queue.job_ids)) == 2
+    assert all(job_id.startswith(emails.REGISTRATION_JOB_ID) for job_id in queue.job_ids)
+
+
+def test_a_failed_batch_is_retried_by_a_scheduled_job(
+    connection: fakeredis.FakeStrictRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    emails.queue_registration_email("maria@example.com", "maria")
+    fail_sending(monkeypatch)
+    queue = Queue("emails", connection=connection)
+
+    with pytest.raises(requests.ConnectionError):
+        emails.send_registration_emails_job()
+    emails.queue_registration_email("marie@example.com", "marie")
+
+    (job_id,) = queue.scheduled_job_registry.get_job_ids()
+    retry = queue.fetch_job(job_id)
+    assert retry is not None and retry.args == (2,)
+    assert connection.llen(emails.REGISTRATION_LIST) == 2
+    assert len(queue.job_ids) == 1
+
+
+def test_the_last_attempt_leaves_the_batch_to_the_next_registration(
+    connection: fakeredis.FakeStrictRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    emails.queue_registration_email("maria@example.com", "maria")
+    fail_sending(monkeypatch)
+    queue = Queue("emails", connection=connection)
+
+    with pytest.raises(requests.ConnectionError):
+        emails.send_registration_emails_job(emails.EMAIL_JOB_MAX_ATTEMPTS)
+    emails.queue_registration_email("marie@example.com", "marie")
+
+    assert queue.scheduled_job_registry.get_job_ids() == []
+    assert len(queue.job_ids) == 2
+    assert connection.llen(emails.REGISTRATION_LIST) == 2
+
+
+def test_the_batch_of_a_worker_that_died_is_sent_by_the_next_job(
+    connection: fakeredis.FakeStrictRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    emails.queue_registration_email("maria@example.com", "maria")
+    emails.queue_registration_email("marie@example.com", "marie")
+
+    def die(users: List[Tuple[str, str]]) -> None:
+        raise SystemExit("worker killed")
+
+    monkeypatch.setattr(emails, "send_registration_batch", die)
+    with pytest.raises(SystemExit):
+        emails.send_registration_emails_job()
+    emails.queue_registration_email("mario@example.com", "mario")
+    batches: List[List[Tuple[str, str]]] = []
+    monkeypatch.setattr(emails, "send_registration_batch", batches.append)
+
+    assert emails.send_registration_emails_job() == 3
+    assert batches == [
+        [
+            ("maria@example.com", "maria"),
+            ("marie@example.com", "marie"),
+            ("mario@example.com", "mario"),
+        ]
+    ]
+    assert list(connection.scan_iter(match=f"{emails.REGISTRATION_PROCESSING}*")) == []
+
+
+def test_the_batch_of_a_running_job_is_left_alone(
+    connection: fakeredis.FakeStrictRedis, sent: List[List[Tuple[str, str]]]
+) -> None:
+    queue = Queue("emails", connection=connection)
+    running = queue.enqueue(emails.send_registration_emails_job)
+    running.set_status(JobStatus.STARTED)
+    processing = f"{emails.REGISTRATION_PROCESSING}{running.id}"
+    connection.rpush(processing, json.dumps(["maria@example.com", "maria"]))
+
+    assert emails.send_registration_emails_job() == 0
+    assert connection.llen(processing) == 1
+
+
+def test_rate_limited_and_failed_posts_are_retried_on_one_connection(
+    mailgun: Mailgun, clock: FakeClock
+) -> None:
+    mailgun.script = [(429, {"Retry-After": "3"}), (503, {})]
+
+    response = emails.send_registration_batch([("maria@example.com", "maria")])
+
+    assert response.status_code == 200
+    assert len(mailgun.requests) == 3
+    assert clock.sleeps == [3.0, emails.EMAIL_BACKOFF * 2]
+    assert len({port for port, _ in mailgun.requests}) == 1
+    assert mailgun.requests[-1][1]["to"] == ["maria@example.com"]
+
+
+def test_posting_gives_up_after_the_last_attempt(
+    mailgun: Mailgun, clock: FakeClock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(emails, "EMAIL_MAX_ATTEMPTS", 3)
+    mailgun.script = [(500, {}), (502, {}), (503, {}), (200, {})]
+
+    with pytest.raises(requests.HTTPError):
+        emails.send_message("maria@example.com", "Hi", "Hi", "<p>Hi</p>")
+
+    assert len(mailgun.requests) == 3
+    assert clock.sleeps == [emails.EMAIL_BACKOFF, emails.EMAIL_BACKOFF * 2]
+
+
+def test_client_errors_are_not_retried(mailgun: Mailgun, clock: FakeClock) -> None:
+    mailgun.script = [(400, {})]
+
+    with pytest.raises(requests.HTTPError):
+        emails.send_message("maria@example.com", "Hi", "Hi", "<p>Hi</p>")
+
+    assert len(mailgun.requests) == 1 and clock.sleeps == []
+
+
+def test_every_connection_failure_is_logged_and_the_last_one_raised(
+    clock: FakeClock, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    monkeypatch.setattr(emails, "MAILGUN_BASE_URL", f"http://127.0.0.1:{port}")
+    monkeypatch.setattr(emails, "EMAIL_MAX_ATTEMPTS", 3)
+
+    with pytest.raises(requests.ConnectionError):
+        emails.send_message("maria@example.com", "Hi", "Hi", "<p>Hi</p>")
+
+    assert len(caplog.records) == 3
+    assert clock.sleeps == [emails.EMAIL_BACKOFF, emails.EMAIL_BACKOFF * 2]
+
+
+def test_sends_are_rate_limited_by_recipients(
+    mailgun: Mailgun, clock: FakeClock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(emails, "rate_limiter", emails.RateLimiter(4))
+    users = [(f"user{index}@example.com", f"user{index}") for index in range(8)]
+
+    emails.send_registration_batch(users[:4])
+    emails.send_registration_batch(users[:2])
+    # A batch larger than the bucket waits for a full bucket and leaves it in debt.
+    emails.send_registration_batch(users)
+    emails.send_registration_batch(users[:1])
+
+    assert clock.sleeps == pytest.approx([0.5, 1.0, 1.25])
+    assert len(mailgun.requests) == 4
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from typing import Any, Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import insert
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from schemas import TemplateBreadSchema
+from utilities.export import EXPORT_CHUNK_SIZE
+
+EXPORT_ROWS = 2 * EXPORT_CHUNK_SIZE + 500
+
+
+@pytest.fixture
+def catalog(client: FlaskClient) -> List[Dict[str, Any]]:
+    """
+    Adds EXPORT_ROWS breads, returns them as the schema dumps them with the exported extras.
+    """
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.flush()
+    db.session.execute(
+        insert(BreadModel),
+        [
+            {
+                "name": f"Bread, {index}",
+                "price": 1.5 + index % 7,
+                "currency": "EUR",
+                "gluten_free": index % 2 == 0,
+                "info": f'"Dark" rye no. {index}' if index % 3 else None,
+                "bakery_id": bakery.id,
+            }
+            for index in range(EXPORT_ROWS)
+        ],
+    )
+    db.session.commit()
+    breads = db.session.query(BreadModel).order_by(BreadModel.id).all()
+    return [
+        {**TemplateBreadSchema().dump(bread), "info": bread.info, "bakery_id": bread.bakery_id}
+        for bread in breads
+    ]
+
+
+def stream(client: FlaskClient, path: str, headers: Dict[str, str]) -> List[str]:
+    """
+    Returns the chunks of the response body as the app yields them.
+    """
+    response = client.get(path, headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.is_streamed
+    chunks = [chunk.decode() for chunk in response.iter_encoded()]
+    response.close()
+    return chunks
+
+
+def test_ndjson_export_streams_every_bread(
+    client: FlaskClient, admin_headers: Dict[str, str], catalog: List[Dict[str, Any]]
+) -> None:
+    chunks = stream(client, "/breads/export", admin_headers)
+
+    assert len(chunks) == 3
+    assert [chunk.count("\n") for chunk in chunks] == [EXPORT_CHUNK_SIZE, EXPORT_CHUNK_SIZE, 500]
+    assert [json.loads(line) for line in "".join(chunks).splitlines()] == catalog
+
+
+def test_csv_export_streams_every_bread(
+    client: FlaskClient, admin_headers: Dict[str, str], catalog: List[Dict[str, Any]]
+) -> None:
+    chunks = stream(client, "/breads/export?format=csv", admin_headers)
+
+    reader = csv.reader(io.StringIO("".join(chunks)))
+    header = next(reader)
+    rows = [dict(zip(header, row)) for row in reader]
+    assert len(chunks) == 3
+    assert header == ["id", "name", "price", "currency", "gluten_free", "info", "bakery_id"]
+    assert len(rows) == EXPORT_ROWS
+    assert rows == [
+        {name: "" if value is None else str(value) for name, value in bread.items()}
+        for bread in catalog
+    ]
@@ -0,0 +1,145 @@
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.tag_model import TagModel
+
+
+@pytest.fixture
+def selects(app: Flask) -> Iterator[List[str]]:
+    """
+    SELECT statements run while serving requests, with the response cache off.
+    """
+    app.extensions["response_cache"] = None
+    statements: List[str] = []
+
+    def record(connection: Any, cursor: Any, statement: str, *_: Any) -> None:
+        if statement.startswith("SELECT") and "FROM change_stamps" not in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def add_bakeries(count: int) -> None:
+    for index in range(count):
+        bakery = BakeryModel(name=f"Bakery {index}", address=f"{index} Flour Street")
+        db.session.add(bakery)
+        db.session.flush()
+        db.session.add_all(
+            BreadModel(
+                name=f"Bread {index}.{bread}",
+                price=2.0,
+                currency="EUR",
+                gluten_free=False,
+                bakery_id=bakery.id,
+            )
+            for bread in range(2)
+        )
+        db.session.add(TagModel(name=f"Tag {index}", bakery_id=bakery.id))
+    db.session.commit()
+
+
+def reading(statements: List[str], table: str) -> List[str]:
+    return [statement for statement in statements if f"FROM {table}" in statement]
+
+
+def test_unexpanded_relations_are_not_loaded(
+    client: FlaskClient, selects: List[str]
+) -> None:
+    add_bakeries(3)
+
+    response = client.get("/bakeries")
+
+    assert response.status_code == 200
+    assert response.json is not None and len(response.json) == 3
+    assert all("breads" not in bakery and "tags" not in bakery for bakery in response.json)
+    assert len(selects) == 1
+    assert reading(selects, "all_breads") == [] and reading(selects, "all_tags") == []
+
+
+def test_expanded_relations_are_loaded_once_per_page(
+    client: FlaskClient, selects: List[str]
+) -> None:
+    add_bakeries(3)
+
+    response = client.get("/bakeries?expand=breads")
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert [len(bakery["breads"]) for bakery in response.json] == [2, 2, 2]
+    assert all("tags" not in bakery for bakery in response.json)
+    assert len(reading(selects, "all_breads")) == 1
+    assert reading(selects, "all_tags") == []
+
+
+def test_expanded_bakery_of_breads_is_joined(
+    client: FlaskClient, admin_headers: Dict[str, str], selects: List[str]
+) -> None:
+    add_bakeries(3)
+    selects.clear()
+
+    response = client.get("/breads?expand=bakery", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json is not None and len(response.json) == 6
+    assert response.json[0]["bakery"]["name"] == "Bakery 0"
+    assert len(reading(selects, "all_breads")) == 1
+    assert reading(selects, "all_bakeries") == []
+
+
+@pytest.mark.parametrize("path", ["/bakeries?expand=owner", "/bakeries/1?expand=bakery"])
+def test_unknown_expansions_are_rejected(client: FlaskClient, path: str) -> None:
+    add_bakeries(1)
+
+    response = client.get(path)
+
+    assert response.status_code == 422
+
+
+def test_only_requested_fields_are_selected_and_dumped(
+    client: FlaskClient, selects: List[str]
+) -> None:
+    add_bakeries(2)
+
+    collection = client.get("/bakeries?fields=id,name")
+    single = client.get("/bakeries/1?fields=name")
+
+    assert collection.json == [{"id": 1, "name": "Bakery 0"}, {"id": 2, "name": "Bakery 1"}]
+    assert single.json == {"name": "Bakery 0"}
+    assert all("address" not in statement for statement in selects)
+
+
+def test_bread_info_is_read_only_when_requested(
+    client: FlaskClient, admin_headers: Dict[str, str], selects: List[str]
+) -> None:
+    add_bakeries(1)
+    db.session.execute(BreadModel.__table__.update().values(info="Sourdough"))
+    db.session.commit()
+    selects.clear()
+
+    default = client.get("/breads", headers=admin_headers)
+    default_selects = list(selects)
+    requested = client.get("/breads?fields=id,info", headers=admin_headers)
+
+    assert default.json is not None and all("info" not in bread for bread in default.json)
+    assert all("all_breads.info" not in statement for statement in default_selects)
+    assert requested.json == [{"id": 1, "info": "Sourdough"}, {"id": 2, "info": "Sourdough"}]
+
+
+@pytest.mark.parametrize(
+    "path", ["/bakeries?fields=id,owner", "/bakeries/1?fields=price", "/tag/1?fields=address"]
+)
+def test_unknown_fields_are_rejected(client: FlaskClient, path: str) -> None:
+    add_bakeries(1)
+
+    response = client.get(path)
+
+    assert response.status_code == 422
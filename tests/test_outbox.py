@@ -0,0 +1,130 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import fakeredis
+import pytest
+import redis
+from flask import Flask
+from flask_jwt_extended import create_access_token
+from rq.queue import Queue
+
+from app import create_app
+from db import db
+from models.job_outbox_model import JobOutboxModel
+from models.user_model import UserModel
+from utilities.outbox import JobOutbox, enqueue_job
+
+UNREACHABLE_REDIS = "redis://127.0.0.1:1"
+
+
+@pytest.fixture
+def outbox_app(tmp_path: Path) -> Iterator[Flask]:
+    """
+    App on a database file, which the outbox thread reaches through connections of its own.
+    """
+    app = create_app(f"sqlite:///{tmp_path / 'data.db'}")
+    with app.app_context():
+        db.metadata.create_all(db.engine)
+        yield app
+        # The thread cannot be stopped, make it idle for the rest of the session.
+        app.extensions["outbox"].relay_interval = 3600
+        db.session.remove()
+
+
+@pytest.fixture
+def outbox(outbox_app: Flask) -> JobOutbox:
+    outbox = JobOutbox(outbox_app, redis.from_url(UNREACHABLE_REDIS), relay_interval=0.05)
+    outbox_app.extensions["outbox"] = outbox
+    return outbox
+
+
+@pytest.fixture
+def headers(outbox_app: Flask) -> Dict[str, Dict[str, str]]:
+    """
+    Authorization headers of the admin, the first user, and of another user.
+    """
+    users = [
+        UserModel(username=name, password="unused", email=f"{name}@example.com")
+        for name in ("admin", "maria")
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return {
+        user.username: {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+        for user in users
+    }
+
+
+def wait_for(outbox: JobOutbox, counter: str, value: int, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while outbox.metrics()[counter] != value:
+        assert time.monotonic() < deadline, "timed out waiting for the outbox thread"
+        time.sleep(0.01)
+
+
+def test_a_job_enqueued_while_redis_is_down_is_stored(outbox_app: Flask) -> None:
+    client = outbox_app.test_client()
+    outbox: JobOutbox = outbox_app.extensions["outbox"]
+
+    started = time.monotonic()
+    response = client.post(
+        "/register",
+        json={"username": "maria", "password": "secret", "email": "maria@example.com"},
+    )
+    answered = time.monotonic() - started
+    wait_for(outbox, "stored", 1)
+
+    assert response.status_code == 201
+    # The request does not wait for Redis to time out.
+    assert answered < 1
+    (job,) = db.session.query(JobOutboxModel).all()
+    assert (job.queue, job.func) == ("emails", "emails.queue_registration_email")
+    assert job.args == ["maria@example.com", "maria"] and job.kwargs == {}
+
+
+def test_stored_jobs_are_relayed_once_redis_is_back(
+    outbox_app: Flask, outbox: JobOutbox, headers: Dict[str, Dict[str, str]]
+) -> None:
+    client = outbox_app.test_client()
+
+    def metrics() -> Dict[str, Any]:
+        response = client.get("/metrics/outbox", headers=headers["admin"])
+        assert response.status_code == 200
+        result: Dict[str, Any] = response.get_json()
+        return result
+
+    enqueue_job("emails", "emails.queue_registration_email", "maria@example.com", "maria")
+    wait_for(outbox, "stored", 1)
+    while_down = metrics()
+    connection = fakeredis.FakeStrictRedis()
+    outbox.client = connection
+    wait_for(outbox, "relayed", 1)
+    # Later relays find nothing left to push.
+    time.sleep(outbox.relay_interval * 5)
+    relayed = metrics()
+    enqueue_job("emails", "emails.queue_registration_email", "marie@example.com", "marie")
+    wait_for(outbox, "flushed", 1)
+
+    queue = Queue("emails", connection=connection)
+    jobs = [queue.fetch_job(job_id) for job_id in queue.job_ids]
+    assert [(job.func_name, job.args) for job in jobs if job is not None] == [
+        ("emails.queue_registration_email", ["maria@example.com", "maria"]),
+        ("emails.queue_registration_email", ["marie@example.com", "marie"]),
+    ]
+    assert db.session.query(JobOutboxModel).count() == 0
+    assert (while_down["enqueued"], while_down["stored"], while_down["relayed"]) == (1, 1, 0)
+    assert while_down["stored_waiting"] == 1
+    assert (relayed["stored"], relayed["relayed"], relayed["lost"]) == (1, 1, 0)
+    assert relayed["stored_waiting"] == 0
+    assert outbox.metrics()["flushes"] == 1 and outbox.metrics()["buffered"] == 0
+
+
+def test_metrics_need_admin_rights(
+    outbox_app: Flask, headers: Dict[str, Dict[str, str]]
+) -> None:
+    client = outbox_app.test_client()
+
+    assert client.get("/metrics/outbox").status_code == 401
+    assert client.get("/metrics/outbox", headers=headers["maria"]).status_code == 401
+    assert client.get("/metrics/outbox", headers=headers["admin"]).status_code == 200
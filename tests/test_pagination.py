@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from flask.testing import FlaskClient
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from utilities.pagination import encode_cursor
+
+
+def add_breads(prices: List[float]) -> None:
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.flush()
+    db.session.add_all(
+        BreadModel(
+            name=f"Bread {index % 3}",
+            price=price,
+            currency="EUR",
+            gluten_free=False,
+            bakery_id=bakery.id,
+        )
+        for index, price in enumerate(prices)
+    )
+    db.session.commit()
+
+
+def all_pages(
+    client: FlaskClient, url: str, headers: Dict[str, str]
+) -> Tuple[List[Any], Any]:
+    """
+    Follows the Link headers from url, returns the pages and the headers of the last one.
+    """
+    pages = []
+    while True:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.json
+        pages.append(response.json)
+        if "Link" not in response.headers:
+            return pages, response.headers
+        url = response.headers["Link"].split(";")[0].strip("<>")
+
+
+@pytest.mark.parametrize(
+    "sort, expected_order",
+    [
+        ("", lambda bread: bread["id"]),
+        ("-price", lambda bread: (-bread["price"], -bread["id"])),
+        ("name,-price", lambda bread: (bread["name"], -bread["price"], -bread["id"])),
+    ],
+)
+def test_pages_cover_every_row_once_in_order(
+    client: FlaskClient, admin_headers: Dict[str, str], sort: str, expected_order: Any
+) -> None:
+    add_breads([2.0, 1.0, 2.0, 3.0, 1.0, 2.0, 3.0])
+
+    pages, last_headers = all_pages(client, f"/breads?limit=2&sort={sort}", admin_headers)
+
+    breads = [bread for page in pages for bread in page]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert breads == sorted(breads, key=expected_order)
+    assert len({bread["id"] for bread in breads}) == 7
+    assert "X-Next-Cursor" not in last_headers
+
+
+def test_a_full_last_page_has_no_next_cursor(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    add_breads([1.0, 2.0])
+
+    response = client.get("/breads?limit=2", headers=admin_headers)
+
+    assert response.json is not None and len(response.json) == 2
+    assert "Link" not in response.headers and "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("", "not a cursor"),
+        ("", encode_cursor({"id": 1})),
+        ("", encode_cursor([1, 2])),
+        ("", encode_cursor(["x"])),
+        ("", encode_cursor([True])),
+        ("", encode_cursor([None])),
+        ("-price", encode_cursor(["cheap", 1])),
+        ("name", encode_cursor([1, 1])),
+    ],
+)
+def test_a_forged_cursor_is_rejected(
+    client: FlaskClient, admin_headers: Dict[str, str], sort: str, cursor: str
+) -> None:
+    add_breads([1.0])
+
+    response = client.get(f"/breads?sort={sort}&after={cursor}", headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json is not None
+    assert response.json["message"] == "Invalid pagination cursor."
+
+
+def test_an_integer_cursor_value_fits_a_float_key(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    add_breads([1.0, 2.0, 3.0])
+
+    response = client.get(
+        f"/breads?sort=price&after={encode_cursor([2, 2])}", headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert [bread["price"] for bread in response.json] == [3.0]
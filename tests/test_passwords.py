@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app import create_app
+from db import db
+from models.bakery_model import BakeryModel
+from tests.timing import percentile
+from utilities.passwords import PasswordHasher, PasswordHasherBusy
+
+LOGIN_BENCHMARK_SECONDS = float(os.getenv("LOGIN_BENCHMARK_SECONDS", 5))
+LOGIN_BENCHMARK_CLIENTS = int(os.getenv("LOGIN_BENCHMARK_CLIENTS", 8))
+LOGIN_BENCHMARK_ROUNDS = int(os.getenv("LOGIN_BENCHMARK_ROUNDS", 29000))
+
+CREDENTIALS = {"username": "maria", "password": "secret"}
+
+
+def register(client: FlaskClient) -> None:
+    response = client.post("/register", json={**CREDENTIALS, "email": "maria@example.com"})
+    assert response.status_code == 201
+
+
+@pytest.fixture
+def busy_hasher(app: Flask) -> Iterator[PasswordHasher]:
+    """
+    Pool of one process accepting one job at a time, its only slot taken.
+    """
+    hasher = PasswordHasher(1000, workers=1, max_pending=1, queue_timeout=0.01)
+    app.extensions["password_hasher"] = hasher
+    hasher._slots.acquire()
+    yield hasher
+    if hasher._executor is not None:
+        hasher._executor.shutdown()
+
+
+def test_login_answers_503_while_the_pool_is_full(
+    client: FlaskClient, app: Flask, busy_hasher: PasswordHasher
+) -> None:
+    app.extensions["password_hasher"] = PasswordHasher(1000, workers=0)
+    register(client)
+    app.extensions["password_hasher"] = busy_hasher
+
+    busy = client.post("/login", json=CREDENTIALS)
+    busy_hasher._slots.release()
+    logged_in = client.post("/login", json=CREDENTIALS)
+
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+    assert logged_in.status_code == 200
+
+
+def test_register_answers_503_while_the_pool_is_full(
+    client: FlaskClient, busy_hasher: PasswordHasher
+) -> None:
+    response = client.post("/register", json={**CREDENTIALS, "email": "maria@example.com"})
+
+    assert response.status_code == 503
+
+
+def test_jobs_beyond_max_pending_are_rejected() -> None:
+    hasher = PasswordHasher(2_000_000, workers=1, max_pending=1, queue_timeout=0.01)
+    slow = threading.Thread(target=hasher.hash, args=("secret",))
+    slow.start()
+    try:
+        while hasher._slots.acquire(blocking=False):
+            hasher._slots.release()
+            time.sleep(0.001)
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("secret")
+    finally:
+        slow.join()
+        if hasher._executor is not None:
+            hasher._executor.shutdown()
+
+
+def test_outdated_hashes_are_replaced_on_login(client: FlaskClient, app: Flask) -> None:
+    app.extensions["password_hasher"] = PasswordHasher(1000, workers=0)
+    register(client)
+    app.extensions["password_hasher"] = PasswordHasher(2000, workers=0)
+
+    assert client.post("/login", json=CREDENTIALS).status_code == 200
+    assert client.post("/login", json=CREDENTIALS).status_code == 200
+
+    password_hash = db.session.execute(db.text("SELECT password FROM all_users")).scalar()
+    assert "$2000$" in password_hash
+
+
+def run_logins(app: Flask, seconds: float) -> Dict[str, List[float]]:
+    """
+    LOGIN_BENCHMARK_CLIENTS threads logging in while one thread lists breads, like the
+    request threads of one gthread worker. Returns login statuses and /breads latencies.
+    """
+    statuses: List[float] = []
+    breads: List[float] = []
+    deadline = time.monotonic() + seconds
+    client = app.test_client()
+    token = client.post("/login", json=CREDENTIALS).json["access_token"]  # type: ignore
+
+    def log_in() -> None:
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            statuses.append(client.post("/login", json=CREDENTIALS).status_code)
+
+    def list_breads() -> None:
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            assert client.get("/breads", headers=headers).status_code == 200
+            breads.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=log_in) for _ in range(LOGIN_BENCHMARK_CLIENTS)]
+    threads.append(threading.Thread(target=list_breads))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"statuses": statuses, "breads": sorted(breads)}
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("workers", [0, 2])
+def test_login_throughput(
+    tmp_path: Path, workers: int, report: Callable[[str], None]
+) -> None:
+    """
+    Login throughput and /breads latency during a login spike, hashing inline (workers=0)
+    and on the process pool.
+    """
+    app = create_app(f"sqlite:///{tmp_path / 'data.db'}")
+    hasher = PasswordHasher(LOGIN_BENCHMARK_ROUNDS, workers=workers)
+    app.extensions["password_hasher"] = hasher
+    with app.app_context():
+        db.metadata.create_all(db.engine)
+        db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+        db.session.commit()
+    register(app.test_client())
+
+    result = run_logins(app, LOGIN_BENCHMARK_SECONDS)
+    if hasher._executor is not None:
+        hasher._executor.shutdown()
+
+    statuses, breads = result["statuses"], result["breads"]
+    report(
+        f"logins with PASSWORD_HASH_WORKERS={workers}: "
+        f"{statuses.count(200) / LOGIN_BENCHMARK_SECONDS:.1f}/s, "
+        f"{statuses.count(503)} answered 503; /breads during logins "
+        f"p50 {percentile(breads, 50):.1f} ms p99 {percentile(breads, 99):.1f} ms"
+    )
+    assert statuses.count(200)
@@ -0,0 +1,94 @@
+from typing import Any, Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+from flask_jwt_extended import create_access_token
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.user_model import UserModel
+
+
+@pytest.fixture
+def user_headers(admin_headers: Dict[str, str]) -> Dict[str, str]:
+    user = UserModel(username="maria", password="unused", email="maria@example.com")
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+
+
+def add_breads(*breads: Dict[str, Any]) -> None:
+    for name in ("Crumb", "Rise"):
+        db.session.add(BakeryModel(name=name, address=f"{name} Street"))
+    db.session.flush()
+    db.session.add_all(
+        BreadModel(**{"currency": "EUR", "gluten_free": False, "bakery_id": 1, **bread})
+        for bread in breads
+    )
+    db.session.commit()
+
+
+def prices() -> List[float]:
+    return [price for (price,) in db.session.query(BreadModel.price).order_by(BreadModel.id)]
+
+
+def test_patch_updates_only_the_given_fields(
+    client: FlaskClient, admin_headers: Dict[str, str]
+) -> None:
+    add_breads({"name": "Rye", "price": 2.0})
+
+    response = client.patch("/breads/1", json={"price": 2.5}, headers=admin_headers)
+    missing = client.patch("/breads/2", json={"price": 2.5}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert response.json["name"] == "Rye" and response.json["price"] == 2.5
+    assert db.session.get(BreadModel, 1).version_id == 2
+    assert missing.status_code == 404
+
+
+def test_patch_and_repricing_need_admin_rights(
+    client: FlaskClient, user_headers: Dict[str, str]
+) -> None:
+    add_breads({"name": "Rye", "price": 2.0})
+
+    patch = client.patch("/breads/1", json={"price": 0.5}, headers=user_headers)
+    reprice = client.patch("/bakeries/1/breads/prices", json={"set": 0.5}, headers=user_headers)
+
+    assert patch.status_code == 401 and reprice.status_code == 401
+    assert prices() == [2.0]
+
+
+@pytest.mark.parametrize(
+    "change, expected",
+    [
+        ({"percent": 3}, [2.05, 0.1, 3.0]),
+        ({"add": 0.2}, [2.19, 0.3, 3.0]),
+        ({"add": -1}, [0.99, 0.0, 3.0]),
+        ({"percent": 10, "round_to": 0.05}, [2.2, 0.1, 3.0]),
+        ({"set": 1.5, "filter": {"price_min": 1}}, [1.5, 0.1, 3.0]),
+    ],
+)
+def test_repricing_changes_the_bakery_breads_in_cents(
+    client: FlaskClient,
+    admin_headers: Dict[str, str],
+    change: Dict[str, Any],
+    expected: List[float],
+) -> None:
+    add_breads(
+        {"name": "Rye", "price": 1.99},
+        {"name": "Spelt", "price": 0.1},
+        {"name": "Rye", "price": 3.0, "bakery_id": 2},
+    )
+
+    response = client.patch("/bakeries/1/breads/prices", json=change, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert prices() == expected
+    assert {bread["id"]: bread["price"] for bread in response.json["breads"]} == {
+        bread_id: price
+        for bread_id, price in enumerate(expected[:2], start=1)
+        if "filter" not in change or bread_id == 1
+    }
@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from cache_extension import RedisCacheBackend, response_cache
+from db import db
+from models.bakery_model import BakeryModel
+from models.user_model import UserModel
+
+
+def test_cache_is_off_unless_redis_is_configured(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("REDIS_URL")
+    monkeypatch.delenv("RESPONSE_CACHE_BACKEND")
+
+    assert create_app("sqlite://").extensions["response_cache"] is None
+
+
+def test_cache_is_shared_where_redis_is_configured(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RESPONSE_CACHE_BACKEND")
+
+    backend = create_app("sqlite://").extensions["response_cache"]
+
+    assert isinstance(backend, RedisCacheBackend)
+
+
+def test_unreachable_redis_is_a_cache_miss(app: Flask, admin_headers: Dict[str, str]) -> None:
+    # REDIS_URL of the tests points at a closed port.
+    app.config["RESPONSE_CACHE_BACKEND"] = "redis"
+    response_cache.init_app(app)
+    client = app.test_client()
+
+    before = client.get("/bakeries", headers=admin_headers)
+    db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+    db.session.commit()
+    after = client.get("/bakeries", headers=admin_headers)
+
+    assert before.status_code == after.status_code == 200
+    assert [bakery["name"] for bakery in after.json or []] == ["Crumb"]
+
+
+@pytest.fixture
+def workers(tmp_path: Path) -> Iterator[List[Flask]]:
+    """
+    Two app instances sharing one database and one Redis, like two gunicorn workers.
+    """
+    fakeredis: Any = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    apps = [create_app(f"sqlite:///{tmp_path / 'data.db'}") for _ in range(2)]
+    for app in apps:
+        app.config["RESPONSE_CACHE_BACKEND"] = "redis"
+        app.config["RESPONSE_CACHE_REDIS_CLIENT"] = client
+        response_cache.init_app(app)
+    with apps[0].app_context():
+        db.metadata.create_all(db.engine)
+        db.session.add(UserModel(username="admin", password="unused", email="a@example.com"))
+        db.session.commit()
+    yield apps
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+def test_commit_in_one_worker_invalidates_all(workers: List[Flask]) -> None:
+    first, second = workers
+    with first.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=1, fresh=True)}"}
+
+    assert second.test_client().get("/bakeries", headers=headers).json == []
+    assert cached_responses(second)
+
+    with first.app_context():
+        db.session.add(BakeryModel(name="Crumb", address="1 Flour Street"))
+        db.session.commit()
+    response = second.test_client().get("/bakeries", headers=headers)
+
+    assert [bakery["name"] for bakery in response.json or []] == ["Crumb"]
+
+
+def cached_responses(app: Flask) -> List[bytes]:
+    keys: List[bytes] = app.extensions["response_cache"].client.keys("response-cache:response:*")
+    return keys
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List
+
+import pytest
+import redis
+from flask import Flask
+
+from db import db
+from models.tokenblocklist_model import TokenBlocklistModel
+from models.user_model import UserModel
+from utilities.revocation import RevocationCache
+
+
+class FlakyRedis:
+    """
+    Redis client that raises ConnectionError on every call while down is set.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.down = False
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.client, name)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if self.down:
+                raise redis.ConnectionError("Redis is down.")
+            return method(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def flaky_redis() -> FlakyRedis:
+    fakeredis: Any = pytest.importorskip("fakeredis")
+    return FlakyRedis(fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def workers(app: Flask, flaky_redis: FlakyRedis) -> Iterator[List[RevocationCache]]:
+    """
+    Revocation caches of two workers sharing one Redis, refreshed on every check.
+    """
+    yield [RevocationCache(flaky_redis, refresh_interval=-1) for _ in range(2)]
+
+
+@pytest.fixture
+def user() -> UserModel:
+    user = UserModel(username="maria", password="unused", email="maria@example.com")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_revocation_reaches_other_workers(workers: List[RevocationCache], user: UserModel) -> None:
+    first, second = workers
+    expires_at = (datetime.now() + timedelta(hours=1)).timestamp()
+
+    first.add("jti-1", expires_at)
+
+    assert second.is_revoked("jti-1", user.id, 0)
+    assert not second.is_revoked("jti-2", user.id, 0)
+
+
+def test_revocation_made_while_redis_was_down_is_published_after_recovery(
+    workers: List[RevocationCache], flaky_redis: FlakyRedis, user: UserModel
+) -> None:
+    first, second = workers
+    assert not second.is_revoked("jti-1", user.id, 0)
+    expires_at = datetime.now() + timedelta(hours=1)
+
+    flaky_redis.down = True
+    # The database is written first, as on logout, then the revocation is published.
+    db.session.add(
+        TokenBlocklistModel(
+            jti="jti-1",
+            created_at=datetime.now(),
+            expires_at=expires_at,
+            type="access",
+            user_id=user.id,
+        )
+    )
+    user.tokens_valid_after = datetime.now()
+    db.session.commit()
+    first.add("jti-1", expires_at.timestamp())
+    first.revoke_user(user.id, user.tokens_valid_after.timestamp())
+    assert second.is_revoked("jti-1", user.id, 0)
+    flaky_redis.down = False
+
+    # The next refresh of the first worker merges the database into Redis.
+    assert first.is_revoked("jti-1", user.id, 0)
+    assert second.is_revoked("jti-1", user.id, 0)
+    assert second.is_revoked("jti-2", user.id, user.tokens_valid_after.timestamp())
+    assert not second.is_revoked("jti-2", user.id, datetime.now().timestamp() + 1)
+
+
+def test_resync_keeps_newer_watermarks(
+    workers: List[RevocationCache], flaky_redis: FlakyRedis, user: UserModel
+) -> None:
+    first, second = workers
+    user.tokens_valid_after = datetime.now() - timedelta(minutes=5)
+    db.session.commit()
+    flaky_redis.down = True
+    first.is_revoked("jti-1", user.id, 0)
+    flaky_redis.down = False
+
+    newer = datetime.now().timestamp()
+    second.revoke_user(user.id, newer)
+    first.is_revoked("jti-1", user.id, 0)
+
+    assert float(flaky_redis.hget(RevocationCache.WATERMARKS_KEY, str(user.id))) == newer
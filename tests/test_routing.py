@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, insert
+
+from app import create_app
+from db import db
+from models.bakery_model import BakeryModel
+from models.tag_model import TagModel
+
+REPLICAS = ["replica_0", "replica_1"]
+
+
+@pytest.fixture
+def replicated_app(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Flask]:
+    monkeypatch.setenv(
+        "DATABASE_REPLICA_URLS",
+        ",".join(f"sqlite:///{tmp_path / bind_key}.db" for bind_key in REPLICAS),
+    )
+    app = create_app(f"sqlite:///{tmp_path / 'data.db'}")
+    app.extensions["response_cache"] = None
+    with app.app_context():
+        for engine in [db.engine, *(db.engines[bind_key] for bind_key in REPLICAS)]:
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(insert(BakeryModel), {"name": "Crumb", "address": ""})
+                connection.execute(insert(TagModel), {"name": "dark", "bakery_id": 1})
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def selects(replicated_app: Flask) -> Dict[str, List[str]]:
+    """
+    SELECT statements run on each database, by bind key, None for the primary.
+    """
+    statements: Dict[Any, List[str]] = {}
+    for bind_key in [None, *REPLICAS]:
+
+        def record(
+            connection: Any, cursor: Any, statement: str, *_: Any, key: Any = bind_key
+        ) -> None:
+            if statement.startswith("SELECT"):
+                statements.setdefault(key, []).append(statement)
+
+        event.listen(db.engines[bind_key], "before_cursor_execute", record)
+    return statements
+
+
+def test_all_reads_of_a_response_go_to_one_replica(
+    replicated_app: Flask, selects: Dict[str, List[str]]
+) -> None:
+    client = replicated_app.test_client()
+
+    for _ in REPLICAS:
+        assert client.get("/bakeries/1/tag").status_code == 200
+        used = [bind_key for bind_key, statements in selects.items() if statements]
+        # The change stamps, the bakery and its tags are read from the same replica.
+        assert len(used) == 1 and len(selects[used[0]]) == 3
+        selects.clear()
+        assert used[0] in REPLICAS
+
+
+def test_reads_after_a_write_go_to_the_primary(
+    replicated_app: Flask, selects: Dict[str, List[str]]
+) -> None:
+    db.session.info["replica"] = "replica_0"
+    db.session.add(BakeryModel(name="Rise", address="2 Flour Street"))
+    db.session.flush()
+
+    assert db.session.query(BakeryModel).count() == 2
+    assert "replica_0" not in selects
+
+
+def test_a_failing_replica_is_replaced_by_the_primary(replicated_app: Flask) -> None:
+    for bind_key in REPLICAS:
+        db.metadata.drop_all(db.engines[bind_key])
+    client = replicated_app.test_client()
+
+    response = client.get("/bakeries/1")
+
+    assert response.status_code == 200
+    assert replicated_app.extensions["replicas"].pick() == REPLICAS[1]
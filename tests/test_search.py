@@ -0,0 +1,124 @@
+import os
+import random
+from typing import Callable, Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import insert, or_, select
+
+from db import db
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from tests.timing import measure, percentile
+from utilities.search import search_bread_ids
+
+SEARCH_BENCHMARK_ROWS = int(os.getenv("SEARCH_BENCHMARK_ROWS", 300_000))
+SEARCH_BENCHMARK_WORDS = int(os.getenv("SEARCH_BENCHMARK_WORDS", 5_000))
+SEARCH_BENCHMARK_QUERIES = int(os.getenv("SEARCH_BENCHMARK_QUERIES", 50))
+
+
+def add_bakery() -> int:
+    bakery = BakeryModel(name="Crumb", address="1 Flour Street")
+    db.session.add(bakery)
+    db.session.commit()
+    bakery_id: int = bakery.id
+    return bakery_id
+
+
+def add_breads(bakery_id: int, texts: List[Dict[str, str]]) -> None:
+    rows = [
+        {"price": 1.0, "currency": "EUR", "gluten_free": False, "bakery_id": bakery_id, **text}
+        for text in texts
+    ]
+    db.session.execute(insert(BreadModel), rows)
+    db.session.commit()
+
+
+def test_search_ranks_name_matches_first(app: Flask) -> None:
+    bakery_id = add_bakery()
+    add_breads(
+        bakery_id,
+        [
+            {"name": "Plain loaf", "info": "Goes well with rye crackers"},
+            {"name": "Dark rye", "info": "Sourdough"},
+            {"name": "Baguette", "info": "Crusty"},
+        ],
+    )
+
+    names = [db.session.get(BreadModel, i).name for i in search_bread_ids(db.session, "rye", 10)]
+
+    assert names == ["Dark rye", "Plain loaf"]
+
+
+def test_search_follows_updates_and_deletes(app: Flask) -> None:
+    add_breads(add_bakery(), [{"name": "Rye", "info": ""}, {"name": "Spelt", "info": ""}])
+    rye, spelt = BreadModel.query.order_by(BreadModel.id).all()
+
+    spelt.name = "Spelt rye"
+    db.session.delete(rye)
+    db.session.commit()
+
+    assert search_bread_ids(db.session, "rye", 10) == [spelt.id]
+
+
+def test_search_matches_query_syntax_literally(app: Flask) -> None:
+    add_breads(add_bakery(), [{"name": "Rye NEAR wheat", "info": "*"}])
+
+    assert len(search_bread_ids(db.session, 'NEAR "wheat', 10)) == 1
+    assert search_bread_ids(db.session, "*", 10) == []
+
+
+def test_search_endpoint(client: FlaskClient, admin_headers: Dict[str, str]) -> None:
+    add_breads(add_bakery(), [{"name": "Dark rye", "info": ""}])
+
+    response = client.get("/breads/search?q=rye", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert [bread["name"] for bread in response.json] == ["Dark rye"]
+
+
+@pytest.mark.benchmark
+def test_search_latency(app: Flask, report: Callable[[str], None]) -> None:
+    """
+    Full-text search against a LIKE scan over SEARCH_BENCHMARK_ROWS breads
+    described with words from a vocabulary of SEARCH_BENCHMARK_WORDS.
+    """
+    rng = random.Random(6)
+    words = [f"w{index}" for index in range(SEARCH_BENCHMARK_WORDS)]
+    bakery_id = add_bakery()
+    chunk = 10_000
+    for start in range(0, SEARCH_BENCHMARK_ROWS, chunk):
+        texts = [
+            {
+                "name": " ".join(rng.choices(words, k=2)),
+                "info": " ".join(rng.choices(words, k=12)),
+            }
+            for _ in range(min(chunk, SEARCH_BENCHMARK_ROWS - start))
+        ]
+        add_breads(bakery_id, texts)
+
+    queries = iter(rng.choices(words, k=SEARCH_BENCHMARK_QUERIES * 2))
+
+    def search() -> None:
+        search_bread_ids(db.session, next(queries), 20)
+
+    def scan() -> None:
+        pattern = f"%{next(queries)} %"
+        # Ranking needs every match, so the scan reads the whole table like the search does.
+        db.session.execute(
+            select(BreadModel.id).where(
+                or_(BreadModel.name.like(pattern), BreadModel.info.like(pattern))
+            )
+        ).all()
+
+    fts = measure(search, SEARCH_BENCHMARK_QUERIES)
+    like = measure(scan, SEARCH_BENCHMARK_QUERIES)
+
+    report(
+        f"search over {SEARCH_BENCHMARK_ROWS} breads: "
+        f"fts p50 {percentile(fts, 50):.1f} ms p95 {percentile(fts, 95):.1f} ms, "
+        f"like p50 {percentile(like, 50):.1f} ms p95 {percentile(like, 95):.1f} ms"
+    )
+    assert percentile(fts, 50) < percentile(like, 50)
@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+from tests.timing import measure, percentile
+
+REPO = Path(__file__).resolve().parent.parent
+STARTUP_BENCHMARK_RUNS = int(os.getenv("STARTUP_BENCHMARK_RUNS", 5))
+
+FIRST_REQUEST = """
+from app import create_app
+
+response = create_app().test_client().get("/bakeries")
+assert response.status_code == 200, response.get_data(as_text=True)
+"""
+
+IMPORTED_ON_CREATE = """
+import sys
+
+from app import create_app
+
+create_app()
+print(",".join(name for name in ("flask_migrate", "alembic") if name in sys.modules))
+"""
+
+
+def python(database: Path, *args: str) -> subprocess.CompletedProcess:
+    """
+    Runs a fresh interpreter in the repository, with the app configured for database.
+    """
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{database}"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def tables(database: Path) -> List[str]:
+    with sqlite3.connect(database) as connection:
+        return [name for (name,) in connection.execute("SELECT name FROM sqlite_master")]
+
+
+def import_times(stderr: str) -> Dict[str, int]:
+    """
+    Cumulative import time in microseconds of every module in `-X importtime` output.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+def test_creating_the_app_does_no_ddl_and_skips_migrations(tmp_path: Path) -> None:
+    database = tmp_path / "data.db"
+
+    imported = python(database, "-c", IMPORTED_ON_CREATE).stdout.strip()
+
+    assert imported == ""
+    assert not database.exists() or tables(database) == []
+
+
+def test_a_fresh_database_is_served_after_flask_migrate(tmp_path: Path) -> None:
+    database = tmp_path / "data.db"
+
+    python(database, "-m", "flask", "--app", "app", "migrate")
+    python(database, "-c", FIRST_REQUEST)
+
+    assert {"all_breads", "change_stamps", "alembic_version"} <= set(tables(database))
+
+
+@pytest.mark.benchmark
+def test_startup_time(tmp_path: Path, report: Callable[[str], None]) -> None:
+    """
+    Import time of the app with `python -X importtime`, and time from starting
+    the interpreter to the first response of a freshly created app, both cold
+    in a new process every run.
+    """
+    database = tmp_path / "data.db"
+    python(database, "-m", "flask", "--app", "app", "migrate")
+
+    imports = [
+        import_times(python(database, "-X", "importtime", "-c", "import app").stderr)
+        for _ in range(STARTUP_BENCHMARK_RUNS)
+    ]
+    first_request = measure(lambda: python(database, "-c", FIRST_REQUEST), STARTUP_BENCHMARK_RUNS)
+
+    import_app = sorted(times["app"] / 1000 for times in imports)
+    slowest = sorted(imports[0].items(), key=lambda item: item[1], reverse=True)
+    top_level = [(name, time) for name, time in slowest if "." not in name and name != "app"]
+    report(
+        f"startup over {STARTUP_BENCHMARK_RUNS} runs: import app p50 "
+        f"{percentile(import_app, 50):.0f} ms, interpreter start to first response p50 "
+        f"{percentile(first_request, 50):.0f} ms; slowest imports: "
+        + ", ".join(f"{name} {time / 1000:.0f} ms" for name, time in top_level[:5])
+    )
+    assert "flask_migrate" not in imports[0] and "alembic" not in imports[0]
@@ -0,0 +1,90 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from db import db
+from models.tokenblocklist_model import TokenBlocklistModel
+from models.user_model import UserModel
+from utilities.passwords import hash_password
+
+
+@pytest.fixture
+def tokens(app: Flask, client: FlaskClient) -> Dict[str, str]:
+    db.session.add(
+        UserModel(username="maria", password=hash_password("secret"), email="maria@example.com")
+    )
+    db.session.commit()
+    response = client.post("/login", json={"username": "maria", "password": "secret"})
+    assert response.status_code == 200
+    issued: Dict[str, str] = response.get_json()
+    return issued
+
+
+def bearer(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_issued_tokens_are_not_stored(client: FlaskClient, tokens: Dict[str, str]) -> None:
+    refreshed = client.post("/refresh", headers=bearer(tokens["refresh_token"]))
+
+    assert refreshed.status_code == 200
+    assert db.session.query(TokenBlocklistModel).count() == 0
+
+
+def test_logout_stores_the_revoked_token_only(
+    client: FlaskClient, tokens: Dict[str, str]
+) -> None:
+    logout = client.delete("/logout", headers=bearer(tokens["access_token"]))
+    reused = client.get("/breads", headers=bearer(tokens["access_token"]))
+
+    assert logout.status_code == 200
+    assert reused.status_code == 401
+    (revoked,) = db.session.query(TokenBlocklistModel).all()
+    assert revoked.revoked and revoked.type == "access"
+    assert client.post("/refresh", headers=bearer(tokens["refresh_token"])).status_code == 200
+
+
+def test_revoking_all_tokens_of_a_user(
+    client: FlaskClient, admin_headers: Dict[str, str], tokens: Dict[str, str]
+) -> None:
+    user = UserModel.query.filter_by(username="maria").one()
+
+    response = client.delete(f"/user/{user.id}/tokens", headers=admin_headers)
+    # Tokens issued within the second of the revocation are revoked as well.
+    time.sleep(1)
+    new_tokens = client.post("/login", json={"username": "maria", "password": "secret"})
+
+    assert response.status_code == 200
+    assert client.get("/breads", headers=bearer(tokens["access_token"])).status_code == 401
+    assert client.post("/refresh", headers=bearer(tokens["refresh_token"])).status_code == 401
+    assert new_tokens.json is not None
+    new_access_token = new_tokens.json["access_token"]
+    assert client.get("/breads", headers=bearer(new_access_token)).status_code == 200
+    assert db.session.query(TokenBlocklistModel).count() == 0
+
+
+def test_prune_deletes_expired_tokens_in_batches(app: Flask, tokens: Dict[str, str]) -> None:
+    user = UserModel.query.filter_by(username="maria").one()
+    now = datetime.now()
+    db.session.add_all(
+        TokenBlocklistModel(
+            jti=f"{index:036}",
+            type="access",
+            created_at=now - timedelta(days=2),
+            expires_at=now + timedelta(hours=hours),
+            user_id=user.id,
+        )
+        for index, hours in enumerate([-25, -2, -1, 1, 24])
+    )
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["tokens", "prune", "--batch-size", "2"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == "Dropped 0 partitions and deleted 3 expired tokens."
+    remaining = db.session.query(TokenBlocklistModel.expires_at).all()
+    assert sorted(expires_at > now for (expires_at,) in remaining) == [True, True]
@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from db import db
+from models.user_model import UserModel
+from utilities.user_cache import UserCache
+
+
+@pytest.fixture
+def user_selects(app: Flask) -> List[str]:
+    statements: List[str] = []
+
+    def record(connection: object, cursor: object, statement: str, *args: object) -> None:
+        if "FROM all_users" in statement and "all_users.id =" in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_cached_user_is_read_without_a_select(app: Flask, user_selects: List[str]) -> None:
+    user = UserModel(username="maria", password="unused", email="maria@example.com")
+    db.session.add(user)
+    db.session.commit()
+    cache = UserCache(ttl=60)
+
+    assert cache.get(user.id) is not None
+    db.session.remove()
+    selects = len(user_selects)
+    cached = cache.get(user.id)
+
+    assert cached is not None and cached.username == "maria"
+    assert len(user_selects) == selects
+
+
+def test_committed_changes_drop_the_cached_user(app: Flask) -> None:
+    user = UserModel(username="maria", password="unused", email="maria@example.com")
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    cache = app.extensions["user_cache"]
+    cache.get(user_id)
+
+    user.username = "marie"
+    db.session.commit()
+    db.session.remove()
+
+    assert cache.get(user_id).username == "marie"
+
+
+def test_endpoints_not_using_the_user_do_not_load_it(
+    client: FlaskClient, admin_headers: Dict[str, str], user_selects: List[str]
+) -> None:
+    client.application.extensions["user_cache"].invalidate([1])
+
+    assert client.get("/breads", headers=admin_headers).status_code == 200
+    assert user_selects == []
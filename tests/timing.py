@@ -0,0 +1,22 @@
+import time
+from typing import Any, Callable, List
+
+
+def measure(func: Callable[[], Any], runs: int) -> List[float]:
+    """
+    Calls func runs times and returns the durations in milliseconds, fastest first.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return sorted(durations)
+
+
+def percentile(durations: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of durations sorted fastest first.
+    """
+    index = max(0, min(len(durations) - 1, round(percent / 100 * len(durations)) - 1))
+    return durations[index]
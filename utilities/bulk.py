@@ -0,0 +1,49 @@
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from flask import request
+from flask_smorest import abort
+
+BULK_CHUNK_SIZE = 500
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl")
+
+
+class InvalidRow:
+    """
+    Placeholder for an NDJSON line that is not valid JSON.
+    """
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+
+def iter_request_rows() -> Iterator[Any]:
+    """
+    Yields the rows of a request body holding either a JSON array or NDJSON,
+    one JSON document per line. NDJSON is read from the stream line by line,
+    so the whole body is never held in memory.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield InvalidRow("Invalid JSON.")
+        return
+
+    rows = request.get_json(silent=True)
+    if not isinstance(rows, list):
+        abort(400, message="Request body must be a JSON array or NDJSON.")
+    yield from rows
+
+
+def chunked(rows: Iterable[Any], size: int = BULK_CHUNK_SIZE) -> Iterator[List[Tuple[int, Any]]]:
+    """
+    Splits rows into lists of at most size (index, row) pairs.
+    """
+    iterator = enumerate(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,73 @@
+import uuid
+from typing import Any, Dict, Iterable, List
+
+from flask import request
+from flask_smorest import Blueprint
+from sqlalchemy.orm import Session
+
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.change_stamp_model import ChangeStampModel, unbumped_change_stamps
+from models.tag_model import TagModel
+
+# Tables every nested field that can be requested with `?expand=` is built from.
+DEPENDENCIES: Dict[Any, Dict[str, List[str]]] = {
+    BakeryModel: {
+        "breads": ["all_breads"],
+        "tags": ["all_tags"],
+    },
+    BreadModel: {
+        "bakery": ["all_bakeries"],
+        "tags": ["all_tags", "all_breads_tags"],
+    },
+    TagModel: {
+        "bakery": ["all_bakeries"],
+        "breads": ["all_breads", "all_breads_tags"],
+    },
+}
+
+
+def _expanded_tables(model: Any, expand: Iterable[str]) -> List[str]:
+    return [table for name in expand for table in DEPENDENCIES[model][name]]
+
+
+def _stamps(tables: List[str], session: Session | None) -> Dict[str, Any]:
+    stamps: Dict[str, Any] = ChangeStampModel.current(tables, session)
+    if unbumped_change_stamps(tables):
+        # The stamps lag behind committed changes, a one-off token rules out a stale 304.
+        stamps["unbumped"] = uuid.uuid4().hex
+    return stamps
+
+
+def set_collection_etag(
+    blp: Blueprint,
+    model: Any,
+    expand: Iterable[str],
+    extra_tables: Iterable[str] = (),
+    session: Session | None = None,
+) -> None:
+    """
+    Sets the ETag of a collection response from the change stamps of the tables it is built from.
+    Answers 304 Not Modified right away, before any row is loaded, if the client is up to date.
+    The stamps are read with session, by default the one of Flask-SQLAlchemy.
+    """
+    tables = [model.__tablename__, *_expanded_tables(model, expand), *extra_tables]
+    blp.set_etag({"url": request.full_path, "stamps": _stamps(tables, session)})
+
+
+def set_row_etag(
+    blp: Blueprint, row: Any, expand: Iterable[str], session: Session | None = None
+) -> None:
+    """
+    Sets the ETag of a single row response from its version counter
+    and the change stamps of the nested fields requested with `?expand=`.
+    Answers 304 Not Modified right away, before serialization, if the client is up to date.
+    """
+    tables = _expanded_tables(type(row), expand)
+    blp.set_etag(
+        {
+            "url": request.full_path,
+            "version": row.version_id,
+            "stamps": _stamps(tables, session) if tables else {},
+        }
+    )
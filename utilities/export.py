@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+from typing import Any, Iterator, List
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def iter_rows(session: Any, statement: Any, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yields the rows of the statement fetching chunk_size rows at a time
+    through a server-side cursor where the driver supports it.
+    """
+    result = session.execute(statement.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield from partition
+
+
+def ndjson_lines(
+    columns: List[str], rows: Iterator[Any], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Yields the rows as JSON documents, one per line, chunk_size rows per yielded string.
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), separators=(",", ":")))
+        if len(lines) == chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def csv_lines(
+    columns: List[str], rows: Iterator[Any], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Yields the header and then the rows as CSV, chunk_size rows per yielded string.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Iterable, Set
+
+from flask import g, has_app_context
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from models.bakery_model import BakeryModel
+from models.bread_model import BreadModel
+from models.tag_model import TagModel
+
+# Loader strategy for every nested field a client can ask for with `?expand=`.
+# Collections are loaded with one extra SELECT ... IN per page, many-to-one
+# relationships are joined into the main query.
+EXPANSIONS: Dict[Any, Dict[str, Any]] = {
+    BakeryModel: {
+        "breads": selectinload(BakeryModel.breads),
+        "tags": selectinload(BakeryModel.tags),
+    },
+    BreadModel: {
+        "bakery": joinedload(BreadModel.bakery),
+        "tags": selectinload(BreadModel.tags),
+    },
+    TagModel: {
+        "bakery": joinedload(TagModel.bakery),
+        "breads": selectinload(TagModel.breads),
+    },
+}
+
+
+def expand_query(query: Any, model: Any, expand: Iterable[str]) -> Any:
+    """
+    Eager loads requested nested fields of the model
+    and remembers them so that all other nested fields are skipped on dump.
+    """
+    requested = set(expand)
+    g.expand = requested
+    return query.options(*(EXPANSIONS[model][name] for name in requested))
+
+
+def is_expanded(name: str) -> bool:
+    """
+    Checks whether a nested field has to be dumped.
+    Endpoints that do not support `?expand=` dump every nested field.
+    """
+    if not has_app_context() or getattr(g, "expand", None) is None:
+        return True
+    return name in g.expand
+
+
+def select_fields(query: Any, model: Any, only: Iterable[str]) -> Any:
+    """
+    Restricts the columns selected for the model to the fields requested with `?fields=`
+    and remembers them so that only those fields are dumped.
+    The primary key and the version counter are always selected.
+    """
+    requested = set(only)
+    if not requested:
+        g.fields = None
+        return query
+    g.fields = requested
+    column_names = inspect(model).column_attrs.keys()
+    columns = [
+        getattr(model, name) for name in requested | {"id", "version_id"} if name in column_names
+    ]
+    return query.options(load_only(*columns))
+
+
+def shape_query(query: Any, model: Any, query_args: Dict[str, Any]) -> Any:
+    """
+    Applies both `?expand=` and `?fields=` query arguments to the query.
+    """
+    query = expand_query(query, model, query_args["expand"])
+    return select_fields(query, model, query_args["field_names"])
+
+
+def requested_fields() -> Set[str] | None:
+    """
+    Returns the fields requested with `?fields=`, None if every field has to be dumped.
+    """
+    if not has_app_context():
+        return None
+    return getattr(g, "fields", None)
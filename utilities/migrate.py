@@ -0,0 +1,64 @@
+from typing import List
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+
+from db import db
+
+
+def _setup_flask_migrate(app: Flask) -> None:
+    from flask_migrate import Migrate
+
+    if "migrate" not in app.extensions:
+        Migrate(app, db)
+
+
+class LazyMigrateGroup(click.MultiCommand):
+    """
+    The `flask db` commands of Flask-Migrate. Flask-Migrate and Alembic take longer
+    to import than the rest of the app, so they are only imported and set up
+    when one of the commands runs. Serving the app does not need them.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        super().__init__("db", help="Perform database migrations.")
+        self.app = app
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return self._group().list_commands(ctx)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        return self._group().get_command(ctx, cmd_name)
+
+    def _group(self) -> click.Group:
+        from flask_migrate.cli import db as db_group  # type: ignore
+
+        _setup_flask_migrate(self.app)
+        group: click.Group = db_group
+        return group
+
+
+@click.command("migrate")
+@with_appcontext
+def migrate_command() -> None:
+    """
+    Bring the database schema up to date, meant to run once per release before serving.
+    An empty database gets the current schema and is stamped with the latest migration,
+    otherwise the pending migrations are run.
+    """
+    from flask_migrate import stamp, upgrade
+
+    _setup_flask_migrate(current_app)
+    if not inspect(db.engine).get_table_names():
+        # The first migrations expect the tables of the original schema to exist.
+        db.metadata.create_all(db.engine)
+        stamp()
+    else:
+        upgrade()
+
+
+def init_migrate(app: Flask) -> None:
+    app.cli.add_command(LazyMigrateGroup(app))
+    app.cli.add_command(migrate_command)
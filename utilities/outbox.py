@@ -0,0 +1,248 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+import redis
+from flask import Flask, current_app
+from rq.queue import Queue
+
+from db import db
+from models.job_outbox_model import JobOutboxModel
+from settings import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+def _import_path(func: Callable | str) -> str:
+    return func if isinstance(func, str) else f"{func.__module__}.{func.__qualname__}"
+
+
+class JobOutbox:
+    """
+    Hands background jobs to RQ without making requests wait for Redis.
+
+    enqueue() only appends the job to a bounded in-process buffer. A background thread
+    takes every buffered job, up to batch_size at a time, and pushes them to Redis
+    in one pipeline. Jobs that cannot reach Redis, and jobs arriving while the buffer
+    is full, are stored in the job_outbox table instead. Every relay_interval seconds
+    the thread relays stored jobs, including those of other processes, to RQ.
+    The thread is started on first use, i.e. after the web server has forked its workers.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        client: Any,
+        max_size: int = 1000,
+        batch_size: int = 100,
+        relay_interval: float = 5,
+    ) -> None:
+        self.app = app
+        self.client = client
+        self.batch_size = batch_size
+        self.relay_interval = relay_interval
+        self._buffer: queue.Queue[Dict[str, Any]] = queue.Queue(max_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._relay_at = 0.0
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._flush_seconds = {"last": 0.0, "max": 0.0, "total": 0.0}
+        self._last_delay = 0.0
+
+    def enqueue(
+        self,
+        queue_name: str,
+        func: Callable | str,
+        *args: Any,
+        job_id: str | None = None,
+        **kwargs: Any,
+    ) -> None:
+        job = {
+            "queue": queue_name,
+            "func": _import_path(func),
+            "args": list(args),
+            "kwargs": kwargs,
+            "job_id": job_id,
+        }
+        self._count("enqueued")
+        try:
+            self._buffer.put_nowait({**job, "queued_at": time.monotonic()})
+        except queue.Full:
+            logger.warning("Job outbox buffer is full, storing the job in the database.")
+            self._store([job])
+        self._ensure_thread()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            flushes = self._counters["flushes"]
+            return {
+                "buffered": self._buffer.qsize(),
+                "capacity": self._buffer.maxsize,
+                "enqueued": self._counters["enqueued"],
+                "flushed": self._counters["flushed"],
+                "stored": self._counters["stored"],
+                "relayed": self._counters["relayed"],
+                "lost": self._counters["lost"],
+                "flushes": flushes,
+                "flush_seconds": {
+                    "last": self._flush_seconds["last"],
+                    "max": self._flush_seconds["max"],
+                    "average": self._flush_seconds["total"] / flushes if flushes else 0.0,
+                },
+                "last_job_delay_seconds": self._last_delay,
+            }
+
+    def close(self) -> None:
+        """
+        Flushes what is left in the buffer, called when the process exits.
+        """
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="job-outbox", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = self._take_batch(block=True)
+                if batch:
+                    self._flush(batch)
+                if time.monotonic() >= self._relay_at:
+                    self._relay_at = time.monotonic() + self.relay_interval
+                    self._relay()
+            except Exception:
+                logger.exception("Job outbox flush failed.")
+
+    def _take_batch(self, block: bool) -> List[Dict[str, Any]]:
+        try:
+            if block:
+                batch = [self._buffer.get(timeout=self.relay_interval)]
+            else:
+                batch = [self._buffer.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        jobs = [{key: value for key, value in job.items() if key != "queued_at"} for job in batch]
+        started = time.monotonic()
+        try:
+            self._push(jobs)
+        except redis.RedisError:
+            logger.warning("Redis unreachable, storing %s jobs in the database.", len(jobs))
+            self._store(jobs)
+            return
+        finished = time.monotonic()
+        with self._lock:
+            self._counters["flushed"] += len(jobs)
+            self._counters["flushes"] += 1
+            self._flush_seconds["last"] = finished - started
+            self._flush_seconds["max"] = max(self._flush_seconds["max"], finished - started)
+            self._flush_seconds["total"] += finished - started
+            self._last_delay = finished - batch[0]["queued_at"]
+
+    def _push(self, jobs: List[Dict[str, Any]]) -> None:
+        by_queue = defaultdict(list)
+        for job in jobs:
+            by_queue[job["queue"]].append(
+                Queue.prepare_data(
+                    job["func"], job["args"], job["kwargs"], job_id=job["job_id"]
+                )
+            )
+        with self.client.pipeline() as pipeline:
+            for queue_name, job_datas in by_queue.items():
+                Queue(queue_name, connection=self.client).enqueue_many(
+                    job_datas, pipeline=pipeline
+                )
+            pipeline.execute()
+
+    def _store(self, jobs: List[Dict[str, Any]]) -> None:
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                JobOutboxModel.store(connection, jobs)
+        except Exception:
+            logger.exception("Could not store %s jobs in the database, they are lost.", len(jobs))
+            self._count("lost", len(jobs))
+            return
+        self._count("stored", len(jobs))
+
+    def _relay(self) -> None:
+        with self.app.app_context():
+            while True:
+                with db.engine.begin() as connection:
+                    rows = JobOutboxModel.claim(connection, self.batch_size)
+                    if not rows:
+                        return
+                    try:
+                        self._push(
+                            [
+                                {
+                                    "queue": row.queue,
+                                    "func": row.func,
+                                    "args": row.args,
+                                    "kwargs": row.kwargs,
+                                    "job_id": row.job_id,
+                                }
+                                for row in rows
+                            ]
+                        )
+                    except redis.RedisError:
+                        # Rolls back, the jobs stay stored until Redis is back.
+                        return
+                    JobOutboxModel.remove(connection, [row.id for row in rows])
+                self._count("relayed", len(rows))
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+
+def init_outbox(app: Flask) -> None:
+    app.config.setdefault("OUTBOX_MAX_SIZE", 1000)
+    app.config.setdefault("OUTBOX_BATCH_SIZE", 100)
+    app.config.setdefault("OUTBOX_RELAY_INTERVAL", 5)
+    app.config.setdefault("OUTBOX_REDIS_TIMEOUT", 1)
+    client = app.config.get("OUTBOX_REDIS_CLIENT") or redis.from_url(
+        REDIS_URL,
+        socket_timeout=app.config["OUTBOX_REDIS_TIMEOUT"],
+        socket_connect_timeout=app.config["OUTBOX_REDIS_TIMEOUT"],
+    )
+    app.extensions["outbox"] = JobOutbox(
+        app,
+        client,
+        app.config["OUTBOX_MAX_SIZE"],
+        app.config["OUTBOX_BATCH_SIZE"],
+        app.config["OUTBOX_RELAY_INTERVAL"],
+    )
+
+
+def enqueue_job(
+    queue_name: str, func: Callable | str, *args: Any, job_id: str | None = None, **kwargs: Any
+) -> None:
+    """
+    Enqueues func(*args, **kwargs) on the RQ queue queue_name without waiting for Redis.
+    Arguments have to be JSON serializable, so that the job can be stored in the database.
+    """
+    outbox: JobOutbox = current_app.extensions["outbox"]
+    outbox.enqueue(queue_name, func, *args, job_id=job_id, **kwargs)
@@ -0,0 +1,140 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+from urllib.parse import urlencode
+
+from flask import request
+from flask_smorest import abort
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import undefer
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(value: Any) -> str:
+    """
+    Encodes the key of the last row of a page into an opaque cursor.
+    """
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """
+    Decodes a cursor created by encode_cursor.
+    Aborts with 400 if the cursor is malformed.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        abort(400, message="Invalid pagination cursor.")
+
+
+def next_page_headers(next_cursor: str | None) -> Dict[str, str]:
+    """
+    Builds the Link header pointing to the next page, keeping all other query arguments.
+    """
+    if next_cursor is None:
+        return {}
+    args = request.args.copy()
+    args["after"] = next_cursor
+    query_string = urlencode(list(args.items(multi=True)))
+    return {
+        "Link": f'<{request.base_url}?{query_string}>; rel="next"',
+        "X-Next-Cursor": next_cursor,
+    }
+
+
+def _fits_column(column: Any, value: Any) -> bool:
+    """
+    Tells whether a decoded cursor value can be compared with the column,
+    so that a forged cursor cannot make the database raise an error.
+    """
+    if value is None:
+        return bool(column.nullable)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return True
+    if isinstance(value, bool):
+        return python_type is bool
+    if python_type is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, python_type)
+
+
+def after_key(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]) -> Any:
+    """
+    Builds the condition matching rows that come after the given sort key values.
+    For keys (a, b DESC, id) it is
+    `a > :a OR (a = :a AND b < :b) OR (a = :a AND b = :b AND id > :id)`.
+    """
+    if (
+        not isinstance(values, list)
+        or len(values) != len(keys)
+        or not all(_fits_column(column, value) for (column, _), value in zip(keys, values))
+    ):
+        abort(400, message="Invalid pagination cursor.")
+
+    conditions = []
+    for position, (column, descending) in enumerate(keys):
+        equal_prefix = [
+            prefix_column == value
+            for (prefix_column, _), value in zip(keys[:position], values)
+        ]
+        beyond = column < values[position] if descending else column > values[position]
+        conditions.append(and_(*equal_prefix, beyond))
+    return or_(*conditions)
+
+
+def keyset_statement(
+    query: Any, keys: Sequence[Tuple[Any, bool]], limit: int, after: str | None
+) -> Any:
+    """
+    Restricts a query or a select() statement to the rows of one page, plus one row
+    telling whether there is a next page. Keys are (column, descending) pairs
+    and must end with a unique column. Rows are located right after the last seen key
+    instead of using OFFSET, so with an index matching the keys every page costs the same
+    no matter how deep the client scrolls.
+    """
+    if after is not None:
+        query = query.filter(after_key(keys, decode_cursor(after)))
+
+    # Deferred key columns of selected entities are loaded with the rows for the next cursor,
+    # selected plain columns are always loaded.
+    entities = {
+        description["expr"]
+        for description in query.column_descriptions
+        if isinstance(description["expr"], type)
+    }
+    undeferred = [undefer(column) for column, _ in keys if column.class_ in entities]
+    order = [column.desc() if descending else column for column, descending in keys]
+    return query.options(*undeferred).order_by(*order).limit(limit + 1)
+
+
+def keyset_page(
+    rows: List[Any], keys: Sequence[Tuple[Any, bool]], limit: int
+) -> Tuple[List[Any], Dict[str, str]]:
+    """
+    Splits the rows loaded with keyset_statement into the page
+    and the headers describing the next page.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in keys])
+
+    return rows, next_page_headers(next_cursor)
+
+
+def keyset_paginate(
+    query: Any, keys: Sequence[Tuple[Any, bool]], limit: int, after: str | None
+) -> Tuple[List[Any], Dict[str, str]]:
+    """
+    Returns one page of the query together with the headers describing the next page.
+    """
+    rows = keyset_statement(query, keys, limit, after).all()
+    return keyset_page(rows, keys, limit)
@@ -0,0 +1,107 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Tuple
+
+from flask import Flask, current_app
+from passlib.context import CryptContext
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _crypt_context(rounds: int) -> CryptContext:
+    # Hashes made with fewer rounds still verify but are reported as needing an update.
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, password_hash: str, rounds: int) -> Tuple[bool, str | None]:
+    return _crypt_context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """
+    Runs pbkdf2 hashing on a pool of processes so that it does not block request workers.
+
+    At most max_pending hashing jobs are accepted at once, a request that cannot get
+    a slot within queue_timeout seconds fails with PasswordHasherBusy instead of
+    piling up behind the others. With workers=0 hashing runs inline.
+    The pool is started on first use, i.e. after the web server has forked its workers.
+    """
+
+    def __init__(
+        self, rounds: int, workers: int = 2, max_pending: int = 4, queue_timeout: float = 1
+    ) -> None:
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def hash(self, password: str) -> str:
+        password_hash: str = self._run(_hash, password, self.rounds)
+        return password_hash
+
+    def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, str | None]:
+        """
+        Verifies the password. If it is valid and the stored hash uses outdated parameters,
+        also returns a new hash to store instead, otherwise None.
+        """
+        result: Tuple[bool, str | None] = self._run(
+            _verify_and_update, password, password_hash, self.rounds
+        )
+        return result
+
+    def _run(self, func: Callable, *args: Any) -> Any:
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy("Too many password hashing requests in progress.")
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a multithreaded process is unsafe, so workers are spawned.
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+
+def init_password_hasher(app: Flask) -> None:
+    app.config.setdefault("PASSWORD_HASH_ROUNDS", 29000)
+    app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+    app.config.setdefault("PASSWORD_HASH_MAX_PENDING", 4)
+    app.config.setdefault("PASSWORD_HASH_QUEUE_TIMEOUT", 1)
+    app.extensions["password_hasher"] = PasswordHasher(
+        app.config["PASSWORD_HASH_ROUNDS"],
+        app.config["PASSWORD_HASH_WORKERS"],
+        app.config["PASSWORD_HASH_MAX_PENDING"],
+        app.config["PASSWORD_HASH_QUEUE_TIMEOUT"],
+    )
+
+
+def hash_password(password: str) -> str:
+    password_hasher: PasswordHasher = current_app.extensions["password_hasher"]
+    return password_hasher.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> Tuple[bool, str | None]:
+    password_hasher: PasswordHasher = current_app.extensions["password_hasher"]
+    return password_hasher.verify_and_update(password, password_hash)
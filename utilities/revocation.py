@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+import redis
+from flask import Flask, current_app
+
+from models.tokenblocklist_model import TokenBlocklistModel
+from models.user_model import UserModel
+from settings import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationCache:
+    """
+    Revoked token ids shared by all workers through a Redis sorted set scored by token expiry,
+    and per-user "tokens issued at or before T are revoked" watermarks kept in a Redis hash.
+
+    Every worker keeps an in-memory copy refreshed at most every refresh_interval seconds,
+    so checking a token is a dict lookup and a revocation reaches every worker
+    within refresh_interval. The database stays the source of truth: Redis is seeded from it
+    after a restart and it is read directly while Redis is unreachable. Revocations made
+    while Redis was unreachable are merged into Redis by the next successful refresh.
+    """
+
+    REDIS_KEY = "revoked-jtis"
+    SEEDED_KEY = "revoked-jtis:seeded"
+    WATERMARKS_KEY = "tokens-valid-after"
+
+    def __init__(self, client: Any, refresh_interval: float = 5) -> None:
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self._revoked: Dict[str, float] = {}
+        self._valid_after: Dict[int, float] = {}
+        self._refreshed_at = 0.0
+        # Set when Redis may be missing revocations that are in the database.
+        self._resync = False
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str, user_id: int, issued_at: float) -> bool:
+        now = time.time()
+        if now - self._refreshed_at > self.refresh_interval:
+            self._refresh(now)
+        valid_after = self._valid_after.get(user_id)
+        if valid_after is not None and issued_at <= valid_after:
+            return True
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > now
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """
+        Publishes a revoked token. It is dropped once the token expires.
+        """
+        with self._lock:
+            self._revoked[jti] = expires_at
+        try:
+            self.client.zadd(self.REDIS_KEY, {jti: expires_at})
+        except redis.RedisError:
+            logger.warning("Could not publish revoked token %s to Redis.", jti)
+            self._resync = True
+
+    def revoke_user(self, user_id: int, valid_after: float) -> None:
+        """
+        Publishes a watermark revoking every token of the user issued at or before valid_after.
+        """
+        with self._lock:
+            self._valid_after[user_id] = valid_after
+        try:
+            self.client.hset(self.WATERMARKS_KEY, str(user_id), valid_after)
+        except redis.RedisError:
+            logger.warning("Could not publish revoked tokens of user %s to Redis.", user_id)
+            self._resync = True
+
+    def _refresh(self, now: float) -> None:
+        with self._lock:
+            if now - self._refreshed_at <= self.refresh_interval:
+                return
+            try:
+                if self.client.set(self.SEEDED_KEY, "1", nx=True) or self._resync:
+                    self._publish_database_state()
+                    self._resync = False
+                self.client.zremrangebyscore(self.REDIS_KEY, "-inf", now)
+                entries = self.client.zrangebyscore(
+                    self.REDIS_KEY, now, "+inf", withscores=True
+                )
+                self._revoked = {
+                    jti.decode() if isinstance(jti, bytes) else jti: expires_at
+                    for jti, expires_at in entries
+                }
+                self._valid_after = {
+                    int(user_id): float(valid_after)
+                    for user_id, valid_after in self.client.hgetall(self.WATERMARKS_KEY).items()
+                }
+            except redis.RedisError:
+                logger.warning("Redis unreachable, reading revoked tokens from database.")
+                self._resync = True
+                self._revoked = TokenBlocklistModel.revoked_jtis()
+                self._valid_after = UserModel.token_watermarks()
+            self._refreshed_at = now
+
+    def _publish_database_state(self) -> None:
+        """
+        Merges the revocations in the database into Redis. Watermarks only move forward,
+        so a newer watermark published by another worker is not overwritten.
+        """
+        revoked = TokenBlocklistModel.revoked_jtis()
+        if revoked:
+            self.client.zadd(self.REDIS_KEY, revoked)
+        watermarks = UserModel.token_watermarks()
+        if watermarks:
+            published = {
+                int(user_id): float(valid_after)
+                for user_id, valid_after in self.client.hgetall(self.WATERMARKS_KEY).items()
+            }
+            newer = {
+                user_id: valid_after
+                for user_id, valid_after in watermarks.items()
+                if valid_after > published.get(user_id, float("-inf"))
+            }
+            if newer:
+                self.client.hset(self.WATERMARKS_KEY, mapping=newer)
+
+
+def init_revocation_cache(app: Flask) -> None:
+    app.config.setdefault("JWT_REVOCATION_REFRESH_INTERVAL", 5)
+    # Seconds, tokens are checked on every request so a hanging Redis must not block them.
+    app.config.setdefault("JWT_REVOCATION_REDIS_TIMEOUT", 0.5)
+    client = app.config.get("JWT_REVOCATION_REDIS_CLIENT") or redis.from_url(
+        REDIS_URL,
+        socket_timeout=app.config["JWT_REVOCATION_REDIS_TIMEOUT"],
+        socket_connect_timeout=app.config["JWT_REVOCATION_REDIS_TIMEOUT"],
+    )
+    app.extensions["revocation_cache"] = RevocationCache(
+        client, app.config["JWT_REVOCATION_REFRESH_INTERVAL"]
+    )
+
+
+def is_token_revoked(jti: str, user_id: int, issued_at: float) -> bool:
+    revocation_cache: RevocationCache = current_app.extensions["revocation_cache"]
+    return revocation_cache.is_revoked(jti, user_id, issued_at)
+
+
+def remember_revoked_token(jti: str, expires_at: float) -> None:
+    revocation_cache: RevocationCache = current_app.extensions["revocation_cache"]
+    revocation_cache.add(jti, expires_at)
+
+
+def remember_user_tokens_revoked(user_id: int, valid_after: float) -> None:
+    revocation_cache: RevocationCache = current_app.extensions["revocation_cache"]
+    revocation_cache.revoke_user(user_id, valid_after)
@@ -0,0 +1,165 @@
+import itertools
+import logging
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List
+
+from flask import Flask, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = "replica_"
+
+
+def engine_options(url: str, config: Dict[str, Any], async_driver: bool = False) -> Dict[str, Any]:
+    """
+    Builds create_engine() options for the database at url from the DATABASE_* settings.
+    Pool sizes are left to SQLite's own pool choice, statement timeouts are PostgreSQL only.
+    """
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {
+        "pool_pre_ping": config["DATABASE_POOL_PRE_PING"],
+        "pool_recycle": config["DATABASE_POOL_RECYCLE"],
+    }
+    if backend != "sqlite":
+        options["pool_size"] = config["DATABASE_POOL_SIZE"]
+        options["max_overflow"] = config["DATABASE_MAX_OVERFLOW"]
+    timeout = config["DATABASE_STATEMENT_TIMEOUT"]
+    if backend == "postgresql" and timeout:
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def replica_binds(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds the SQLALCHEMY_BINDS entries of the read replicas in DATABASE_REPLICA_URLS.
+    """
+    return {
+        f"{REPLICA_BIND_PREFIX}{index}": {"url": url, **engine_options(url, config)}
+        for index, url in enumerate(config["DATABASE_REPLICA_URLS"])
+    }
+
+
+class ReplicaSet:
+    """
+    Read replicas taken in turns. A replica that failed is skipped
+    for retry_interval seconds, reads go to the primary while no replica is left.
+    """
+
+    def __init__(self, bind_keys: List[str], retry_interval: float = 30) -> None:
+        self.bind_keys = bind_keys
+        self.retry_interval = retry_interval
+        self._down_until: Dict[str, float] = {}
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    def pick(self) -> str | None:
+        now = time.monotonic()
+        healthy = [key for key in self.bind_keys if self._down_until.get(key, 0) <= now]
+        if not healthy:
+            return None
+        return healthy[next(self._turns) % len(healthy)]
+
+    def mark_down(self, bind_key: str) -> None:
+        logger.warning("Read replica %s failed, reading from the primary.", bind_key)
+        with self._lock:
+            self._down_until[bind_key] = time.monotonic() + self.retry_interval
+
+
+def init_replicas(app: Flask) -> None:
+    app.config.setdefault("DATABASE_REPLICA_RETRY_INTERVAL", 30)
+    bind_keys = sorted(
+        key for key in app.config["SQLALCHEMY_BINDS"] if key.startswith(REPLICA_BIND_PREFIX)
+    )
+    app.extensions["replicas"] = ReplicaSet(
+        bind_keys, app.config["DATABASE_REPLICA_RETRY_INTERVAL"]
+    )
+
+
+class RoutingSession(Session):
+    """
+    Session sending the SELECTs of endpoints marked with read_replica to a read replica.
+
+    The replica is picked once by read_replica and kept in session.info["replica"],
+    so all the queries of a response read the same snapshot. Everything else goes
+    to the primary: writes, flushes, SELECT ... FOR UPDATE and raw SQL. Once
+    the session has written, it keeps reading from the primary so that it sees
+    its own changes.
+    """
+
+    def get_bind(
+        self,
+        mapper: Any | None = None,
+        clause: Any | None = None,
+        bind: Any | None = None,
+        _sa_skip_events: Any | None = None,
+        _sa_skip_for_implicit_returning: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        if bind is None:
+            bind_key = self.info.get("replica")
+            if getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+            elif (
+                bind_key is not None
+                and not self.info.get("wrote")
+                and getattr(clause, "is_select", False)
+                and getattr(clause, "_for_update_arg", None) is None
+            ):
+                self.info["read_from_replica"] = True
+                return self._db.engines[bind_key]
+        return super().get_bind(
+            mapper=mapper,
+            clause=clause,
+            bind=bind,
+            _sa_skip_events=_sa_skip_events,
+            _sa_skip_for_implicit_returning=_sa_skip_for_implicit_returning,
+            **kwargs,
+        )
+
+
+def mark_written(session: Session, flush_context: object, instances: object) -> None:
+    session.info["wrote"] = True
+
+
+event.listen(RoutingSession, "before_flush", mark_written)
+
+
+def read_replica(func: Callable) -> Callable:
+    """
+    Marks a read-only endpoint whose queries may be served by a read replica.
+    If the replica fails, it is taken out of rotation and the endpoint runs again
+    on the primary.
+    """
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        session = current_app.extensions["sqlalchemy"].session
+        replicas: ReplicaSet | None = current_app.extensions.get("replicas")
+        bind_key = replicas.pick() if replicas is not None else None
+        if replicas is None or bind_key is None:
+            return func(*args, **kwargs)
+
+        session.info["replica"] = bind_key
+        try:
+            return func(*args, **kwargs)
+        except OperationalError:
+            if not session.info.pop("read_from_replica", False):
+                raise
+            replicas.mark_down(bind_key)
+            session.rollback()
+            session.info.pop("replica", None)
+            return func(*args, **kwargs)
+        finally:
+            session.info.pop("replica", None)
+            session.info.pop("read_from_replica", None)
+
+    return wrapper
@@ -0,0 +1,98 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+# The search index lives in the database itself and is kept in sync by triggers (SQLite)
+# or a generated column (PostgreSQL), so every write path updates it without extra code.
+SEARCH_INDEX_DDL: Dict[str, List[str]] = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS all_breads_fts USING fts5("
+        "name, info, content='all_breads', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS all_breads_fts_insert AFTER INSERT ON all_breads BEGIN "
+        "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS all_breads_fts_delete AFTER DELETE ON all_breads BEGIN "
+        "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+        "VALUES ('delete', old.id, old.name, old.info); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS all_breads_fts_update "
+        "AFTER UPDATE OF name, info ON all_breads BEGIN "
+        "INSERT INTO all_breads_fts(all_breads_fts, rowid, name, info) "
+        "VALUES ('delete', old.id, old.name, old.info); "
+        "INSERT INTO all_breads_fts(rowid, name, info) VALUES (new.id, new.name, new.info); "
+        "END",
+    ],
+    "postgresql": [
+        "ALTER TABLE all_breads ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(info, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS ix_all_breads_search_vector "
+        "ON all_breads USING GIN (search_vector)",
+    ],
+}
+
+SEARCH_INDEX_DROP_DDL: Dict[str, List[str]] = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS all_breads_fts_update",
+        "DROP TRIGGER IF EXISTS all_breads_fts_delete",
+        "DROP TRIGGER IF EXISTS all_breads_fts_insert",
+        "DROP TABLE IF EXISTS all_breads_fts",
+    ],
+}
+
+SEARCH_QUERIES = {
+    # Matches in the name weigh ten times more than matches in the description.
+    "sqlite": (
+        "SELECT rowid FROM all_breads_fts WHERE all_breads_fts MATCH :terms "
+        "ORDER BY bm25(all_breads_fts, 10.0, 1.0) LIMIT :limit"
+    ),
+    "postgresql": (
+        "SELECT id FROM all_breads, plainto_tsquery('simple', :terms) query "
+        "WHERE search_vector @@ query "
+        "ORDER BY ts_rank(search_vector, query) DESC LIMIT :limit"
+    ),
+}
+
+
+class SearchNotSupported(Exception):
+    pass
+
+
+def create_search_index(target: Any, connection: Any, **kw: Any) -> None:
+    """
+    Creates the full-text search index for breads. Runs right after all_breads is created.
+    """
+    for statement in SEARCH_INDEX_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def drop_search_index(target: Any, connection: Any, **kw: Any) -> None:
+    """
+    Drops the full-text search index for breads. Runs right before all_breads is dropped.
+    """
+    for statement in SEARCH_INDEX_DROP_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def _fts5_terms(q: str) -> str:
+    """
+    Quotes every word so that FTS5 query syntax in user input is matched literally.
+    """
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in q.split())
+
+
+def search_bread_ids(session: Any, q: str, limit: int) -> List[int]:
+    """
+    Returns ids of breads matching all words of the query, most relevant first.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in SEARCH_QUERIES:
+        raise SearchNotSupported(f"Full-text search is not supported on {dialect}.")
+
+    terms = _fts5_terms(q) if dialect == "sqlite" else q
+    if not terms.strip():
+        return []
+    result = session.execute(text(SEARCH_QUERIES[dialect]), {"terms": terms, "limit": limit})
+    return [row[0] for row in result]
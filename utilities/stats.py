@@ -0,0 +1,182 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+# Row triggers apply the change of every inserted, updated or deleted bread and tag
+# to the counters of its bakery, including bulk statements and cascading deletes.
+# Min and max cannot be decremented, removing the cheapest or the most expensive bread
+# looks the new one up in the (bakery_id, price) index. Removing the last bread
+# of a currency drops its row first, so that lookup never comes back empty.
+_SQLITE_REMOVE_BREAD = (
+    "UPDATE bakery_stats SET bread_count = bread_count - 1, "
+    "gluten_free_count = gluten_free_count - old.gluten_free "
+    "WHERE bakery_id = old.bakery_id; "
+    "DELETE FROM bakery_price_stats "
+    "WHERE bakery_id = old.bakery_id AND currency = old.currency AND bread_count <= 1; "
+    "UPDATE bakery_price_stats SET bread_count = bread_count - 1, "
+    "price_sum = price_sum - old.price, "
+    "price_min = CASE WHEN old.price <= price_min THEN (SELECT min(price) FROM all_breads "
+    "WHERE bakery_id = old.bakery_id AND currency = old.currency) ELSE price_min END, "
+    "price_max = CASE WHEN old.price >= price_max THEN (SELECT max(price) FROM all_breads "
+    "WHERE bakery_id = old.bakery_id AND currency = old.currency) ELSE price_max END "
+    "WHERE bakery_id = old.bakery_id AND currency = old.currency; "
+)
+
+_SQLITE_ADD_BREAD = (
+    "INSERT INTO bakery_stats (bakery_id, bread_count, gluten_free_count, tag_count) "
+    "VALUES (new.bakery_id, 1, new.gluten_free, 0) "
+    "ON CONFLICT (bakery_id) DO UPDATE SET bread_count = bread_count + 1, "
+    "gluten_free_count = gluten_free_count + excluded.gluten_free_count; "
+    "INSERT INTO bakery_price_stats "
+    "(bakery_id, currency, bread_count, price_sum, price_min, price_max) "
+    "VALUES (new.bakery_id, new.currency, 1, new.price, new.price, new.price) "
+    "ON CONFLICT (bakery_id, currency) DO UPDATE SET bread_count = bread_count + 1, "
+    "price_sum = price_sum + excluded.price_sum, "
+    "price_min = min(price_min, excluded.price_min), "
+    "price_max = max(price_max, excluded.price_max); "
+)
+
+_SQLITE_REMOVE_TAG = (
+    "UPDATE bakery_stats SET tag_count = tag_count - 1 WHERE bakery_id = old.bakery_id; "
+)
+
+_SQLITE_ADD_TAG = (
+    "INSERT INTO bakery_stats (bakery_id, bread_count, gluten_free_count, tag_count) "
+    "VALUES (new.bakery_id, 0, 0, 1) "
+    "ON CONFLICT (bakery_id) DO UPDATE SET tag_count = tag_count + 1; "
+)
+
+_POSTGRESQL_BREADS_FUNCTION = """
+CREATE OR REPLACE FUNCTION all_breads_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bakery_stats SET bread_count = bread_count - 1,
+            gluten_free_count = gluten_free_count - OLD.gluten_free::int
+        WHERE bakery_id = OLD.bakery_id;
+        DELETE FROM bakery_price_stats
+        WHERE bakery_id = OLD.bakery_id AND currency = OLD.currency AND bread_count <= 1;
+        UPDATE bakery_price_stats SET bread_count = bread_count - 1,
+            price_sum = price_sum - OLD.price,
+            price_min = CASE WHEN OLD.price <= price_min THEN (SELECT min(price) FROM all_breads
+                WHERE bakery_id = OLD.bakery_id AND currency = OLD.currency) ELSE price_min END,
+            price_max = CASE WHEN OLD.price >= price_max THEN (SELECT max(price) FROM all_breads
+                WHERE bakery_id = OLD.bakery_id AND currency = OLD.currency) ELSE price_max END
+        WHERE bakery_id = OLD.bakery_id AND currency = OLD.currency;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bakery_stats (bakery_id, bread_count, gluten_free_count, tag_count)
+        VALUES (NEW.bakery_id, 1, NEW.gluten_free::int, 0)
+        ON CONFLICT (bakery_id) DO UPDATE SET bread_count = bakery_stats.bread_count + 1,
+            gluten_free_count = bakery_stats.gluten_free_count + excluded.gluten_free_count;
+        INSERT INTO bakery_price_stats
+            (bakery_id, currency, bread_count, price_sum, price_min, price_max)
+        VALUES (NEW.bakery_id, NEW.currency, 1, NEW.price, NEW.price, NEW.price)
+        ON CONFLICT (bakery_id, currency) DO UPDATE SET
+            bread_count = bakery_price_stats.bread_count + 1,
+            price_sum = bakery_price_stats.price_sum + excluded.price_sum,
+            price_min = least(bakery_price_stats.price_min, excluded.price_min),
+            price_max = greatest(bakery_price_stats.price_max, excluded.price_max);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_POSTGRESQL_TAGS_FUNCTION = """
+CREATE OR REPLACE FUNCTION all_tags_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bakery_stats SET tag_count = tag_count - 1 WHERE bakery_id = OLD.bakery_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bakery_stats (bakery_id, bread_count, gluten_free_count, tag_count)
+        VALUES (NEW.bakery_id, 0, 0, 1)
+        ON CONFLICT (bakery_id) DO UPDATE SET tag_count = bakery_stats.tag_count + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_POSTGRESQL_BAKERIES_FUNCTION = """
+CREATE OR REPLACE FUNCTION all_bakeries_stats() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM bakery_price_stats WHERE bakery_id = OLD.id;
+    DELETE FROM bakery_stats WHERE bakery_id = OLD.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+STATS_TRIGGERS_DDL: Dict[str, List[str]] = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS all_breads_stats_insert AFTER INSERT ON all_breads "
+        f"BEGIN {_SQLITE_ADD_BREAD}END",
+        "CREATE TRIGGER IF NOT EXISTS all_breads_stats_delete AFTER DELETE ON all_breads "
+        f"BEGIN {_SQLITE_REMOVE_BREAD}END",
+        "CREATE TRIGGER IF NOT EXISTS all_breads_stats_update "
+        "AFTER UPDATE OF price, currency, gluten_free, bakery_id ON all_breads "
+        f"BEGIN {_SQLITE_REMOVE_BREAD}{_SQLITE_ADD_BREAD}END",
+        "CREATE TRIGGER IF NOT EXISTS all_tags_stats_insert AFTER INSERT ON all_tags "
+        f"BEGIN {_SQLITE_ADD_TAG}END",
+        "CREATE TRIGGER IF NOT EXISTS all_tags_stats_delete AFTER DELETE ON all_tags "
+        f"BEGIN {_SQLITE_REMOVE_TAG}END",
+        "CREATE TRIGGER IF NOT EXISTS all_tags_stats_update "
+        "AFTER UPDATE OF bakery_id ON all_tags "
+        f"BEGIN {_SQLITE_REMOVE_TAG}{_SQLITE_ADD_TAG}END",
+        "CREATE TRIGGER IF NOT EXISTS all_bakeries_stats_delete AFTER DELETE ON all_bakeries "
+        "BEGIN DELETE FROM bakery_price_stats WHERE bakery_id = old.id; "
+        "DELETE FROM bakery_stats WHERE bakery_id = old.id; END",
+    ],
+    "postgresql": [
+        _POSTGRESQL_BREADS_FUNCTION,
+        _POSTGRESQL_TAGS_FUNCTION,
+        _POSTGRESQL_BAKERIES_FUNCTION,
+        "DROP TRIGGER IF EXISTS all_breads_stats ON all_breads",
+        "CREATE TRIGGER all_breads_stats "
+        "AFTER INSERT OR DELETE OR UPDATE OF price, currency, gluten_free, bakery_id "
+        "ON all_breads FOR EACH ROW EXECUTE FUNCTION all_breads_stats()",
+        "DROP TRIGGER IF EXISTS all_tags_stats ON all_tags",
+        "CREATE TRIGGER all_tags_stats AFTER INSERT OR DELETE OR UPDATE OF bakery_id "
+        "ON all_tags FOR EACH ROW EXECUTE FUNCTION all_tags_stats()",
+        "DROP TRIGGER IF EXISTS all_bakeries_stats ON all_bakeries",
+        "CREATE TRIGGER all_bakeries_stats AFTER DELETE "
+        "ON all_bakeries FOR EACH ROW EXECUTE FUNCTION all_bakeries_stats()",
+    ],
+}
+
+STATS_TRIGGERS_DROP_DDL: Dict[str, List[str]] = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS all_breads_stats_insert",
+        "DROP TRIGGER IF EXISTS all_breads_stats_delete",
+        "DROP TRIGGER IF EXISTS all_breads_stats_update",
+        "DROP TRIGGER IF EXISTS all_tags_stats_insert",
+        "DROP TRIGGER IF EXISTS all_tags_stats_delete",
+        "DROP TRIGGER IF EXISTS all_tags_stats_update",
+        "DROP TRIGGER IF EXISTS all_bakeries_stats_delete",
+    ],
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS all_breads_stats ON all_breads",
+        "DROP TRIGGER IF EXISTS all_tags_stats ON all_tags",
+        "DROP TRIGGER IF EXISTS all_bakeries_stats ON all_bakeries",
+        "DROP FUNCTION IF EXISTS all_breads_stats()",
+        "DROP FUNCTION IF EXISTS all_tags_stats()",
+        "DROP FUNCTION IF EXISTS all_bakeries_stats()",
+    ],
+}
+
+
+def create_stats_triggers(target: Any, connection: Any, **kw: Any) -> None:
+    """
+    Creates the triggers maintaining bakery statistics. Runs after all tables are created.
+    """
+    for statement in STATS_TRIGGERS_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+def drop_stats_triggers(target: Any, connection: Any, **kw: Any) -> None:
+    """
+    Drops the triggers maintaining bakery statistics. Runs before any table is dropped.
+    """
+    for statement in STATS_TRIGGERS_DROP_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
@@ -1,45 +1,37 @@
 from datetime import datetime, timezone
+from typing import Dict
 
 from db import db
-from flask_jwt_extended import decode_token
 from models.tokenblocklist_model import TokenBlocklistModel
-from sqlalchemy.orm.exc import NoResultFound
+from models.user_model import UserModel
+from utilities.revocation import (remember_revoked_token,
+                                  remember_user_tokens_revoked)
 
 
-def add_token_to_database(encoded_token: str) -> None:
+def revoke_token(jwt_payload: Dict[str, int | str | bool]) -> None:
     """
-    Function adds provided token to blocklist_tokens table in database.
+    Adds provided token to blocklist_tokens table in database.
+    Using it only on logout. Issued tokens are not stored, only revoked ones.
     """
-    decoded_token = decode_token(encoded_token)
-    jti = decoded_token["jti"]
-    token_type = decoded_token["type"]
-    token_created_at = datetime.now(timezone.utc)
-    token_expires = datetime.fromtimestamp(decoded_token["exp"])
-    token_revoked = False
-    user_identity = decoded_token["sub"]
-
+    token_expires = datetime.fromtimestamp(int(jwt_payload["exp"]))
     db_token = TokenBlocklistModel(
-        jti=jti,
-        type=token_type,
-        created_at=token_created_at,
+        jti=jwt_payload["jti"],
+        type=jwt_payload["type"],
+        created_at=datetime.now(timezone.utc),
         expires_at=token_expires,
-        revoked=token_revoked,
-        user_id=user_identity,
+        revoked=True,
+        user_id=jwt_payload["sub"],
     )
     db.session.add(db_token)
     db.session.commit()
+    remember_revoked_token(str(jwt_payload["jti"]), token_expires.timestamp())
 
 
-def revoke_jti_token(token_jti: str, user_identity: int) -> None:
+def revoke_all_user_tokens(user: UserModel) -> None:
     """
-    Revokes given token.
-    Using it only on logout.
+    Revokes every token issued to the user so far.
+    Tokens issued within the same second as the revocation are revoked as well.
     """
-    try:
-        token = TokenBlocklistModel.query.filter_by(
-            jti=token_jti, user_id=user_identity
-        ).one()
-        token.revoked = True
-        db.session.commit()
-    except NoResultFound:
-        raise Exception(f"Could not find the token {token_jti}.")
+    user.tokens_valid_after = datetime.now().replace(microsecond=0)
+    db.session.commit()
+    remember_user_tokens_revoked(user.id, user.tokens_valid_after.timestamp())
@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from db import db
+from models.user_model import UserModel
+
+
+class UserCache:
+    """
+    Per-worker cache of user rows keyed by id, each entry lives for ttl seconds.
+
+    Column values are cached instead of ORM instances, which belong to the session of
+    the request that loaded them. A hit is merged into the current session without a SELECT.
+    Users changed or deleted in this worker are dropped once the change is committed,
+    changes made by other workers are picked up after ttl at the latest.
+    """
+
+    def __init__(self, ttl: float = 60) -> None:
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> UserModel | None:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            user = UserModel(**entry[1])
+            make_transient_to_detached(user)
+            merged: UserModel = db.session.merge(user, load=False)
+            return merged
+
+        user = db.session.get(UserModel, user_id)
+        if user is not None:
+            values = {
+                attr.key: getattr(user, attr.key) for attr in inspect(UserModel).column_attrs
+            }
+            with self._lock:
+                self._entries[user_id] = (time.monotonic() + self.ttl, values)
+        return user
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+
+def init_user_cache(app: Flask) -> None:
+    app.config.setdefault("JWT_USER_CACHE_TTL", 60)
+    app.extensions["user_cache"] = UserCache(app.config["JWT_USER_CACHE_TTL"])
+
+
+def get_user(user_id: int) -> UserModel | None:
+    user_cache: UserCache = current_app.extensions["user_cache"]
+    return user_cache.get(user_id)
+
+
+def remember_changed_user(mapper: Any, connection: Any, target: UserModel) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_users", set()).add(target.id)
+
+
+def forget_committed_users(session: Session) -> None:
+    changed_users = session.info.pop("changed_users", None)
+    if changed_users and has_app_context():
+        user_cache: UserCache | None = current_app.extensions.get("user_cache")
+        if user_cache is not None:
+            user_cache.invalidate(changed_users)
+
+
+def discard_changed_users(session: Session, *args: Any) -> None:
+    session.info.pop("changed_users", None)
+
+
+db.event.listen(UserModel, "after_update", remember_changed_user)
+db.event.listen(UserModel, "after_delete", remember_changed_user)
+db.event.listen(Session, "after_commit", forget_committed_users)
+db.event.listen(Session, "after_rollback", discard_changed_users)